@@ -1,6 +1,6 @@
 from flask import Flask, jsonify
 from flask_pymongo import PyMongo
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, jwt_required
 from flask_cors import CORS
 from flask_mail import Mail
 from flask_socketio import SocketIO, emit, join_room, leave_room
@@ -46,7 +46,7 @@ def create_app(config_class=Config):
     CORS(app, 
          origins="*",
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-         allow_headers=['Content-Type', 'Authorization'],
+         allow_headers=['Content-Type', 'Authorization', 'X-BE-Key', 'Content-Encoding'],
          supports_credentials=True)
     
     mail.init_app(app)
@@ -149,6 +149,25 @@ def create_app(config_class=Config):
     def health_check():
         return jsonify({'status': 'healthy', 'service': 'break-even-backend'}), 200
 
+    # Background job leases and run metrics (cluster-wide lease table)
+    @app.route('/health/jobs', methods=['GET'])
+    @jwt_required()
+    def job_health():
+        from app.services.job_coordinator import job_coordinator
+        from app.services.deploy_queue import deploy_queue
+        return jsonify({
+            'status': 'ok',
+            'jobs': job_coordinator.stats(),
+            'deploys': deploy_queue.stats()
+        }), 200
+
+    # Shared LLM transport: circuit state and latency histograms per model
+    @app.route('/health/llm', methods=['GET'])
+    @jwt_required()
+    def llm_health():
+        from app.services.llm_transport import llm_transport
+        return jsonify({'status': 'ok', 'llm': llm_transport.stats()}), 200
+
     # Initialize database on first run
     with app.app_context():
         from app.utils.database import init_database
@@ -159,11 +178,19 @@ def create_app(config_class=Config):
     # have sat long enough to evaluate against real event data.
     # Updates business_memory records from "applied_pending_results" to
     # "success" / "FAILED" with observed conversion deltas and re-vectorizes.
+    #
+    # Every process that builds the app schedules the jobs; the
+    # JobCoordinator's Mongo leases make sure only one of them runs each
+    # job (or each tenant shard of it) at a time.
     try:
+        from app.services.job_coordinator import job_coordinator
         from app.services.outcome_updater import run_outcome_updates
         scheduler = BackgroundScheduler(daemon=True)
         scheduler.add_job(
-            func=run_outcome_updates,
+            func=job_coordinator.wrap(
+                "outcome_updater", run_outcome_updates,
+                shards=int(os.environ.get("OUTCOME_UPDATER_SHARDS", 1)),
+            ),
             args=[app],
             trigger="interval",
             seconds=15,
@@ -171,10 +198,43 @@ def create_app(config_class=Config):
             replace_existing=True,
             max_instances=1,
         )
+        # Fold raw analytics events into hourly / daily buckets
+        from app.services.event_store import run_downsampling, DOWNSAMPLE_INTERVAL_MINUTES
+        scheduler.add_job(
+            func=job_coordinator.wrap("event_downsampler", run_downsampling),
+            args=[app],
+            trigger="interval",
+            minutes=DOWNSAMPLE_INTERVAL_MINUTES,
+            id="event_downsampler",
+            replace_existing=True,
+            max_instances=1,
+        )
+        # Re-encode full website_history snapshots as keyframe + delta chains
+        from app.services.history_store import run_compaction, COMPACTION_INTERVAL_HOURS
+        scheduler.add_job(
+            func=job_coordinator.wrap("history_compactor", run_compaction),
+            args=[app],
+            trigger="interval",
+            hours=COMPACTION_INTERVAL_HOURS,
+            id="history_compactor",
+            replace_existing=True,
+            max_instances=1,
+        )
+        # Score messages / feedback written without a stored sentiment
+        from app.services.sentiment_pipeline import run_sentiment_backfill, BACKFILL_INTERVAL_MINUTES
+        scheduler.add_job(
+            func=job_coordinator.wrap("sentiment_backfill", run_sentiment_backfill),
+            args=[app],
+            trigger="interval",
+            minutes=BACKFILL_INTERVAL_MINUTES,
+            id="sentiment_backfill",
+            replace_existing=True,
+            max_instances=1,
+        )
         scheduler.start()
         import logging
         logging.getLogger(__name__).info(
-            "🔄 OutcomeUpdater scheduler started (interval=15s)"
+            f"🔄 OutcomeUpdater scheduler started (interval=15s, worker={job_coordinator.worker_id})"
         )
     except Exception as e:
         import logging
@@ -2,12 +2,13 @@
 AI Business Chatbot Routes
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import logging
+import uuid
 from datetime import datetime
 from app.services.ai_business_chatbot import ai_business_chatbot
-from app import mongo
+from app import mongo, socketio
 from bson import ObjectId
 
 ai_chatbot_bp = Blueprint('ai_chatbot', __name__)
@@ -35,15 +36,7 @@ def business_chat():
         conversation_history = data.get('conversation_history', [])
         
         # Get user information for context
-        user = mongo.db.users.find_one({'_id': ObjectId(current_user_id)})
-        if user:
-            user_context.update({
-                'name': user.get('name', 'Business Owner'),
-                'business_type': user.get('business_category', 'General Business'),
-                'business_name': user.get('business_name', user.get('name', 'Business')),
-                'business_id': str(user['_id']),
-                'user_id': str(user['_id'])
-            })
+        _add_user_context(current_user_id, user_context)
         
         # Get AI response
         response = ai_business_chatbot.get_business_response(
@@ -54,19 +47,7 @@ def business_chat():
         )
         
         # Log the interaction
-        chat_log = {
-            'user_id': ObjectId(current_user_id),
-            'message': message,
-            'response': response,
-            'language': language,
-            'timestamp': datetime.utcnow(),
-            'type': 'business_chat'
-        }
-        
-        try:
-            mongo.db.ai_chat_logs.insert_one(chat_log)
-        except Exception as e:
-            logger.warning(f"Could not log chat interaction: {e}")
+        _log_business_chat(current_user_id, message, response, language)
         
         return jsonify({
             'success': True,
@@ -82,6 +63,53 @@ def business_chat():
             'response': 'I apologize, but I encountered an error. Please try again.'
         }), 500
 
+@ai_chatbot_bp.route('/api/ai/business-chat/stream', methods=['POST'])
+@jwt_required()
+def business_chat_stream():
+    """
+    Streaming AI Business Chatbot endpoint.
+
+    Returns 202 at once and streams the answer to the user's Socket.IO room:
+    chat_stream_start, chat_stream_chunk {stream_id, delta, index} per
+    chunk, then chat_stream_end {stream_id, response} (or chat_stream_error).
+    Clients without a socket connection use /api/ai/business-chat.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        if not data or 'message' not in data:
+            return jsonify({
+                'success': False,
+                'error': 'Message is required'
+            }), 400
+        
+        message = data['message']
+        language = data.get('language', 'en')
+        user_context = data.get('user_context', {})
+        conversation_history = data.get('conversation_history', [])
+        stream_id = str(data.get('stream_id') or uuid.uuid4().hex)
+        
+        _add_user_context(current_user_id, user_context)
+        
+        socketio.start_background_task(
+            _stream_business_chat, current_app._get_current_object(), current_user_id,
+            stream_id, message, language, user_context, conversation_history
+        )
+        
+        return jsonify({
+            'success': True,
+            'stream_id': stream_id,
+            'room': str(current_user_id)
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Error starting business chat stream: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
 @ai_chatbot_bp.route('/api/ai/business-insights', methods=['GET'])
 @jwt_required()
 def get_business_insights():
@@ -148,4 +176,70 @@ def get_chat_history():
         return jsonify({
             'success': False,
             'error': 'Could not fetch chat history'
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+def _add_user_context(current_user_id, user_context):
+    user = mongo.db.users.find_one({'_id': ObjectId(current_user_id)})
+    if user:
+        user_context.update({
+            'name': user.get('name', 'Business Owner'),
+            'business_type': user.get('business_category', 'General Business'),
+            'business_name': user.get('business_name', user.get('name', 'Business')),
+            'business_id': str(user['_id']),
+            'user_id': str(user['_id'])
+        })
+
+
+def _log_business_chat(current_user_id, message, response, language, streamed=False):
+    chat_log = {
+        'user_id': ObjectId(current_user_id),
+        'message': message,
+        'response': response,
+        'language': language,
+        'timestamp': datetime.utcnow(),
+        'type': 'business_chat'
+    }
+    if streamed:
+        chat_log['streamed'] = True
+    
+    try:
+        mongo.db.ai_chat_logs.insert_one(chat_log)
+    except Exception as e:
+        logger.warning(f"Could not log chat interaction: {e}")
+
+
+def _stream_business_chat(app, current_user_id, stream_id, message, language, user_context, conversation_history):
+    """Background task: relays Gemini chunks to the user's room, logs the final answer once."""
+    room = str(current_user_id)
+    index = 0
+
+    def on_chunk(delta):
+        nonlocal index
+        socketio.emit('chat_stream_chunk', {'stream_id': stream_id, 'delta': delta, 'index': index}, room=room)
+        index += 1
+
+    with app.app_context():
+        try:
+            socketio.emit('chat_stream_start', {'stream_id': stream_id}, room=room)
+            response = ai_business_chatbot.stream_business_response(
+                message,
+                on_chunk,
+                language=language,
+                user_context=user_context,
+                conversation_history=conversation_history
+            )
+            _log_business_chat(current_user_id, message, response, language, streamed=True)
+            socketio.emit('chat_stream_end', {
+                'stream_id': stream_id,
+                'response': response,
+                'chunks': index,
+                'timestamp': datetime.utcnow().isoformat()
+            }, room=room)
+        except Exception as e:
+            logger.error(f"Error in business chat stream {stream_id}: {e}")
+            socketio.emit('chat_stream_error', {
+                'stream_id': stream_id,
+                'error': 'Internal server error',
+                'response': 'I apologize, but I encountered an error. Please try again.'
+            }, room=room)
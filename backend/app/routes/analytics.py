@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import mongo
-from app.services.sentiment_service import SentimentService
+from app.services.sentiment_pipeline import sentiment_pipeline
 from bson import ObjectId
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
+from app.utils.ttl_cache import TTLCache
+from app.services.metrics_rollup import MetricsRollup
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -13,6 +15,13 @@ import logging
 
 analytics_bp = Blueprint('analytics', __name__)
 
+# Overview responses are reused across dashboard polls for this long
+OVERVIEW_CACHE_TTL_SECONDS = 60
+_overview_cache = TTLCache(ttl=OVERVIEW_CACHE_TTL_SECONDS, maxsize=2048)
+
+# Scored messages / feedback entries listed by /analytics/sentiment
+SENTIMENT_RECENT_LIMIT = 50
+
 @analytics_bp.route('/analytics/overview', methods=['GET'])
 @jwt_required()
 def get_analytics_overview():
@@ -21,67 +30,46 @@ def get_analytics_overview():
         
         # Date range
         days = int(request.args.get('days', 30))
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Messages analytics
-        messages = list(mongo.db.messages.find({
-            'recipient_id': ObjectId(current_user_id),
-            'created_at': {'$gte': start_date}
-        }))
-        
-        # Customer analytics
-        customers = list(mongo.db.child_customers.find({
-            'business_owner_id': ObjectId(current_user_id),
-            'created_at': {'$gte': start_date}
-        }))
-        
+
+        cache_key = (current_user_id, days)
+        cached = _overview_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(cached), 200
+
+        owner_id = ObjectId(current_user_id)
+
+        # Messages, customers and website visits come from the daily rollups
+        buckets = MetricsRollup.daily(
+            current_user_id, days=days, fields=['messages', 'customers', 'visits']
+        )
+
         # QR scans analytics
-        qr_analytics = mongo.db.qr_analytics.find_one({
-            'user_id': ObjectId(current_user_id)
-        })
-        
-        # Website visits analytics
-        website_visits = list(mongo.db.website_analytics.find({
-            'business_owner_id': ObjectId(current_user_id),
-            'visited_at': {'$gte': start_date}
-        }))
-        
-        # Group data by date
-        daily_data = defaultdict(lambda: {
-            'messages': 0,
-            'customers': 0,
-            'visits': 0,
-            'date': None
-        })
-        
-        # Process messages
-        for message in messages:
-            date_key = message['created_at'].date()
-            daily_data[date_key]['messages'] += 1
-            daily_data[date_key]['date'] = date_key.isoformat()
-        
-        # Process customers
-        for customer in customers:
-            date_key = customer['created_at'].date()
-            daily_data[date_key]['customers'] += 1
-            daily_data[date_key]['date'] = date_key.isoformat()
-        
-        # Process visits
-        for visit in website_visits:
-            date_key = visit['visited_at'].date()
-            daily_data[date_key]['visits'] += 1
-            daily_data[date_key]['date'] = date_key.isoformat()
-        
-        # Convert to list and sort
-        analytics_data = sorted(daily_data.values(), key=lambda x: x['date'] or '1900-01-01')
-        
-        return jsonify({
+        qr_analytics = mongo.db.qr_analytics.find_one(
+            {'user_id': owner_id},
+            {'total_scans': 1},
+        )
+
+        analytics_data = []
+        for bucket in buckets:
+            row = {
+                'messages': bucket.get('messages', {}).get('messages', 0),
+                'customers': bucket.get('customers', 0),
+                'visits': bucket.get('visits', 0),
+            }
+            # Days with only other activity (bookings, events) are skipped
+            if any(row.values()):
+                row['date'] = bucket['day'].date().isoformat()
+                analytics_data.append(row)
+
+        response = {
             'timeSeriesData': analytics_data,
-            'totalMessages': len(messages),
-            'totalCustomers': len(customers),
+            'totalMessages': sum(row['messages'] for row in analytics_data),
+            'totalCustomers': sum(row['customers'] for row in analytics_data),
             'totalScans': qr_analytics.get('total_scans', 0) if qr_analytics else 0,
-            'totalVisits': len(website_visits)
-        }), 200
+            'totalVisits': sum(row['visits'] for row in analytics_data)
+        }
+        _overview_cache.set(cache_key, response)
+        return jsonify(response), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -91,63 +79,64 @@ def get_analytics_overview():
 def get_sentiment_analysis():
     try:
         current_user_id = get_jwt_identity()
+        owner_id = ObjectId(current_user_id)
+        
+        # Scores are stored at write time; catch up on a bounded slice of
+        # anything still unscored (older data) before reading them
+        sentiment_pipeline.score_pending(owner_id=current_user_id)
+        summary = sentiment_pipeline.summary(current_user_id)
+        
+        # Most recent scored messages and feedback
+        projection = {'content': 1, 'feedback_text': 1, 'sentiment': 1, 'customer_name': 1, 'rating': 1, 'created_at': 1}
+        messages = mongo.db.messages.find(
+            {'recipient_id': owner_id, 'sentiment.label': {'$exists': True}}, projection
+        ).sort('created_at', -1).limit(SENTIMENT_RECENT_LIMIT)
+        feedback_entries = mongo.db.customer_feedback.find(
+            {'business_owner_id': owner_id, 'sentiment.label': {'$exists': True}}, projection
+        ).sort('created_at', -1).limit(SENTIMENT_RECENT_LIMIT)
+        
+        message_sentiments = [
+            {
+                'id': str(message['_id']),
+                'content': message['content'][:100] + '...' if len(message['content']) > 100 else message['content'],
+                'sentiment': _public_sentiment(message['sentiment']),
+                'customer_name': message.get('customer_name', 'Anonymous'),
+                'created_at': message.get('created_at')
+            }
+            for message in messages
+        ]
         
-        # Get messages and feedback
-        messages = list(mongo.db.messages.find({
-            'recipient_id': ObjectId(current_user_id)
-        }))
-        
-        feedback_entries = list(mongo.db.customer_feedback.find({
-            'business_owner_id': ObjectId(current_user_id)
-        }))
-        
-        sentiment_service = SentimentService()
-        
-        # Analyze message sentiment
-        message_sentiments = []
-        for message in messages:
-            if message.get('content'):
-                sentiment = sentiment_service.analyze_sentiment(message['content'])
-                message_sentiments.append({
-                    'id': str(message['_id']),
-                    'content': message['content'][:100] + '...' if len(message['content']) > 100 else message['content'],
-                    'sentiment': sentiment,
-                    'customer_name': message.get('customer_name', 'Anonymous'),
-                    'created_at': message['created_at']
-                })
-        
-        # Analyze feedback sentiment
-        feedback_sentiments = []
-        for feedback in feedback_entries:
-            if feedback.get('feedback_text'):
-                sentiment = sentiment_service.analyze_sentiment(feedback['feedback_text'])
-                feedback_sentiments.append({
-                    'id': str(feedback['_id']),
-                    'feedback': feedback['feedback_text'][:100] + '...' if len(feedback['feedback_text']) > 100 else feedback['feedback_text'],
-                    'sentiment': sentiment,
-                    'rating': feedback.get('rating'),
-                    'created_at': feedback['created_at']
-                })
-        
-        # Calculate sentiment distribution
-        all_sentiments = [m['sentiment']['label'] for m in message_sentiments] + [f['sentiment']['label'] for f in feedback_sentiments]
-        sentiment_distribution = Counter(all_sentiments)
-        
-        # Calculate average sentiment score
-        all_scores = [m['sentiment']['score'] for m in message_sentiments] + [f['sentiment']['score'] for f in feedback_sentiments]
-        avg_sentiment_score = sum(all_scores) / len(all_scores) if all_scores else 0
+        feedback_sentiments = [
+            {
+                'id': str(feedback['_id']),
+                'feedback': feedback['feedback_text'][:100] + '...' if len(feedback['feedback_text']) > 100 else feedback['feedback_text'],
+                'sentiment': _public_sentiment(feedback['sentiment']),
+                'rating': feedback.get('rating'),
+                'created_at': feedback.get('created_at')
+            }
+            for feedback in feedback_entries
+        ]
         
         return jsonify({
             'messageSentiments': message_sentiments,
             'feedbackSentiments': feedback_sentiments,
-            'sentimentDistribution': dict(sentiment_distribution),
-            'averageSentimentScore': avg_sentiment_score,
-            'totalAnalyzed': len(message_sentiments) + len(feedback_sentiments)
+            'sentimentDistribution': summary['distribution'],
+            'averageSentimentScore': summary['average_score'],
+            'totalAnalyzed': summary['total'],
+            'pendingAnalysis': sentiment_pipeline.pending_count(current_user_id)
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _public_sentiment(stored):
+    return {
+        'label': stored.get('label', 'neutral'),
+        'score': stored.get('score', 0.0),
+        'confidence': stored.get('confidence', 0.0),
+        'method': stored.get('method')
+    }
+
 @analytics_bp.route('/analytics/customers', methods=['GET'])
 @jwt_required()
 def get_customer_analytics():
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import mongo
+from app.services.metrics_rollup import MetricsRollup, day_key, merge_counters
 from bson import ObjectId
 from datetime import datetime, timedelta
 
@@ -109,6 +110,7 @@ def update_consultation_booking(booking_id):
             {'_id': ObjectId(booking_id)},
             {'$set': update_data}
         )
+        MetricsRollup.record_transition(user_id, 'consultation_bookings', booking, update_data)
         
         return jsonify({
             'success': True,
@@ -224,6 +226,7 @@ def update_measurement_booking(booking_id):
             {'_id': ObjectId(booking_id)},
             {'$set': update_data}
         )
+        MetricsRollup.record_transition(user_id, 'measurement_bookings', booking, update_data)
         
         return jsonify({
             'success': True,
@@ -339,6 +342,7 @@ def update_order_inquiry(inquiry_id):
             {'_id': ObjectId(inquiry_id)},
             {'$set': update_data}
         )
+        MetricsRollup.record_transition(user_id, 'order_inquiries', inquiry, update_data)
         
         return jsonify({
             'success': True,
@@ -478,6 +482,7 @@ def update_contact_message(message_id):
                 {'_id': ObjectId(message_id)},
                 {'$set': update_data}
             )
+        MetricsRollup.record_transition(user_id, collection, message, update_data)
         
         return jsonify({
             'success': True,
@@ -499,56 +504,41 @@ def get_booking_stats():
     Get booking and inquiry statistics for dashboard
     """
     try:
-        user_id = ObjectId(get_jwt_identity())
+        user_id = get_jwt_identity()
         days = int(request.args.get('days', 30))
         
-        # Date filter
-        start_date = datetime.utcnow() - timedelta(days=days)
-        date_query = {'created_at': {'$gte': start_date}}
-        
-        # Base query
-        base_query = {'business_id': user_id}
-        query_with_date = {**base_query, **date_query}
-        
-        # Get consultation bookings stats
-        consultation_stats = {
-            'total': mongo.db.consultation_bookings.count_documents(base_query),
-            'recent': mongo.db.consultation_bookings.count_documents(query_with_date),
-            'pending': mongo.db.consultation_bookings.count_documents({**base_query, 'status': 'pending'}),
-            'confirmed': mongo.db.consultation_bookings.count_documents({**base_query, 'status': 'confirmed'}),
-            'unread': mongo.db.consultation_bookings.count_documents({**base_query, 'is_read': False})
-        }
-        
-        # Get measurement bookings stats
-        measurement_stats = {
-            'total': mongo.db.measurement_bookings.count_documents(base_query),
-            'recent': mongo.db.measurement_bookings.count_documents(query_with_date),
-            'pending': mongo.db.measurement_bookings.count_documents({**base_query, 'status': 'pending'}),
-            'confirmed': mongo.db.measurement_bookings.count_documents({**base_query, 'status': 'confirmed'}),
-            'unread': mongo.db.measurement_bookings.count_documents({**base_query, 'is_read': False})
-        }
-        
-        # Get order inquiries stats
-        order_stats = {
-            'total': mongo.db.order_inquiries.count_documents(base_query),
-            'recent': mongo.db.order_inquiries.count_documents(query_with_date),
-            'new': mongo.db.order_inquiries.count_documents({**base_query, 'status': 'new'}),
-            'quoted': mongo.db.order_inquiries.count_documents({**base_query, 'status': 'quoted'}),
-            'unread': mongo.db.order_inquiries.count_documents({**base_query, 'is_read': False})
-        }
+        # One read of the tenant's daily rollups serves both the all-time
+        # and the recent-window counters
+        start_day = day_key(datetime.utcnow() - timedelta(days=days))
+        all_time = {}
+        recent = {}
+        for bucket in MetricsRollup.daily(user_id, fields=['bookings', 'messages', 'status', 'unread']):
+            bucket.pop('business_id', None)
+            day = bucket.pop('day')
+            merge_counters(all_time, bucket)
+            if day >= start_day:
+                merge_counters(recent, bucket)
+        
+        def _stats(collection, statuses):
+            stats = {
+                'total': all_time.get('bookings', {}).get(collection, 0),
+                'recent': recent.get('bookings', {}).get(collection, 0),
+            }
+            for status in statuses:
+                stats[status] = all_time.get('status', {}).get(collection, {}).get(status, 0)
+            stats['unread'] = all_time.get('unread', {}).get(collection, 0)
+            return stats
         
-        # Get message stats
-        contact_count = mongo.db.contact_messages.count_documents(base_query)
-        client_count = mongo.db.client_messages.count_documents(base_query)
-        contact_recent = mongo.db.contact_messages.count_documents(query_with_date)
-        client_recent = mongo.db.client_messages.count_documents(query_with_date)
-        contact_unread = mongo.db.contact_messages.count_documents({**base_query, 'is_read': False})
-        client_unread = mongo.db.client_messages.count_documents({**base_query, 'is_read': False})
+        consultation_stats = _stats('consultation_bookings', ('pending', 'confirmed'))
+        measurement_stats = _stats('measurement_bookings', ('pending', 'confirmed'))
+        order_stats = _stats('order_inquiries', ('new', 'quoted'))
         
+        # Get message stats (contact + client inboxes)
+        message_collections = ('contact_messages', 'client_messages')
         message_stats = {
-            'total': contact_count + client_count,
-            'recent': contact_recent + client_recent,
-            'unread': contact_unread + client_unread
+            'total': sum(all_time.get('messages', {}).get(c, 0) for c in message_collections),
+            'recent': sum(recent.get('messages', {}).get(c, 0) for c in message_collections),
+            'unread': sum(all_time.get('unread', {}).get(c, 0) for c in message_collections)
         }
         
         return jsonify({
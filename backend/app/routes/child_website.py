@@ -1,6 +1,10 @@
-from flask import Blueprint, request, jsonify, render_template_string
+from flask import Blueprint, Response, request, jsonify, render_template_string
 from app import mongo
 from app.services.website_service import WebsiteService
+from app.services.metrics_rollup import MetricsRollup
+from app.services.event_collector import event_collector
+from app.services.site_render_cache import site_render_cache
+from app.services.sentiment_pipeline import sentiment_pipeline
 from bson import ObjectId
 from datetime import datetime
 
@@ -10,70 +14,36 @@ child_website_bp = Blueprint('child_website', __name__)
 def serve_child_website(website_id):
     """Serve the generated child website"""
     try:
-        # Get website data
-        website = mongo.db.child_websites.find_one({'_id': ObjectId(website_id)})
-        if not website:
-            return "Website not found", 404
-        
-        if not website.get('is_active', True):
-            return "Website is not active", 404
-        
-        owner_id = ObjectId(website['owner_id']) if isinstance(website['owner_id'], str) else website['owner_id']
-        
-        # Get business owner's products
-        products = list(mongo.db.products.find({
-            'user_id': owner_id,
-            'is_active': True
-        }))
-        
-        # Generate HTML dynamically from the website schema
-        from app.services.patch_engine import PatchEngine
-        from app.services.schema_renderer import SchemaRenderer
-        
-        schema = PatchEngine.get_active_schema(owner_id)
-        
-        # Merge live products from MongoDB into services section
-        if products:
-            for section in schema.get("sections", []):
-                if section.get("type") == "services":
-                    section["content"]["items"] = [
-                        {
-                            "id": str(p.get("_id")),
-                            "name": p.get("name"),
-                            "price": f"${p.get('price')}" if p.get('price') is not None else "",
-                            "description": p.get("description", ""),
-                            "icon": p.get("icon", "fas fa-tag"),
-                            "image": p.get("image", "")
-                        }
-                        for p in products
-                    ]
-                    break
-        
-        html_content = SchemaRenderer.render(schema)
-        
-        # Inject tracking snippet for child→parent analytics reporting
-        from app.services.tracking_snippet import TrackingSnippet
-        html_content = TrackingSnippet.inject(
-            html_content,
-            business_id=str(owner_id),
-            backend_url=None,
-            website_id=str(website['_id'])
-        )
-        
-        # Track visit
-        visit_data = {
-            'website_id': str(website['_id']),
-            'business_owner_id': owner_id,
+        # Rendered HTML + compressed variants, served from memory between revalidations
+        try:
+            page = site_render_cache.get(website_id)
+        except LookupError as e:
+            return str(e), 404
+        
+        # Track visit (buffered, flushed by the EventCollector)
+        event_collector.record_visit({
+            'website_id': website_id,
+            'business_owner_id': page.owner_id,
             'visitor_ip': request.remote_addr,
             'user_agent': request.headers.get('User-Agent'),
             'visited_at': datetime.utcnow(),
             'page': '/',
             'referrer': request.referrer
+        })
+        
+        encoding, body, etag = page.choose(request.accept_encodings)
+        headers = {
+            'ETag': etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding'
         }
         
-        mongo.db.website_analytics.insert_one(visit_data)
+        if page.matches(request.if_none_match):
+            return Response(status=304, headers=headers)
         
-        return html_content
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(body, status=200, headers=headers, content_type='text/html; charset=utf-8')
         
     except Exception as e:
         return f"Error loading website: {str(e)}", 500
@@ -106,6 +76,8 @@ def handle_contact_form(website_id):
         }
         
         result = mongo.db.messages.insert_one(message_data)
+        MetricsRollup.record_created(owner_id, 'messages', message_data)
+        sentiment_pipeline.enqueue('messages', result.inserted_id, message_data['content'])
         
         # Register customer if not exists
         if data.get('email'):
@@ -128,6 +100,7 @@ def handle_contact_form(website_id):
                 }
                 
                 mongo.db.child_customers.insert_one(customer_data)
+                MetricsRollup.record_created(owner_id, 'child_customers', customer_data)
         
         return jsonify({'success': True, 'message': 'Message sent successfully'}), 200
         
@@ -182,6 +155,7 @@ def handle_newsletter_signup(website_id):
             }
             
             mongo.db.child_customers.insert_one(customer_data)
+            MetricsRollup.record_created(owner_id, 'child_customers', customer_data)
         
         return jsonify({'success': True, 'message': 'Successfully subscribed to newsletter'}), 200
         
@@ -212,7 +186,8 @@ def handle_feedback_submission(website_id):
             'created_at': datetime.utcnow()
         }
         
-        mongo.db.customer_feedback.insert_one(feedback_data)
+        result = mongo.db.customer_feedback.insert_one(feedback_data)
+        sentiment_pipeline.enqueue('customer_feedback', result.inserted_id, feedback_data['feedback_text'])
         
         return jsonify({'success': True, 'message': 'Feedback submitted successfully'}), 200
         
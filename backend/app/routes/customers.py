@@ -3,6 +3,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import mongo
 from app.models.customer import ChildCustomer
 from app.services.email_service import EmailService
+from app.services.metrics_rollup import MetricsRollup
+from app.services.sentiment_pipeline import sentiment_pipeline
 from bson import ObjectId
 from datetime import datetime
 
@@ -52,7 +54,9 @@ def register_customer():
         )
         
         # Insert into database
-        result = mongo.db.child_customers.insert_one(customer.to_dict())
+        customer_doc = customer.to_dict()
+        result = mongo.db.child_customers.insert_one(customer_doc)
+        MetricsRollup.record_created(data['business_owner_id'], 'child_customers', customer_doc)
         
         # Get business owner info for welcome email
         business_owner = mongo.db.users.find_one({
@@ -178,14 +182,19 @@ def delete_customer(customer_id):
         current_user_id = get_jwt_identity()
         
         # Check if customer belongs to current user
-        result = mongo.db.child_customers.delete_one({
-            '_id': ObjectId(customer_id),
-            'business_owner_id': ObjectId(current_user_id)
-        })
+        deleted = mongo.db.child_customers.find_one_and_delete(
+            {
+                '_id': ObjectId(customer_id),
+                'business_owner_id': ObjectId(current_user_id)
+            },
+            projection={'created_at': 1}
+        )
         
-        if result.deleted_count == 0:
+        if not deleted:
             return jsonify({'error': 'Customer not found'}), 404
         
+        MetricsRollup.record_deleted(current_user_id, 'child_customers', deleted)
+        
         return jsonify({'message': 'Customer deleted successfully'}), 200
         
     except Exception as e:
@@ -214,6 +223,7 @@ def submit_feedback():
         }
         
         result = mongo.db.customer_feedback.insert_one(feedback_data)
+        sentiment_pipeline.enqueue('customer_feedback', result.inserted_id, feedback_data['feedback_text'])
         
         # Update customer's last interaction
         mongo.db.child_customers.update_one(
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import mongo
+from app.services.metrics_rollup import MetricsRollup, day_key
+from app.services.revenue_series import RevenueSeries
 from bson import ObjectId
 from datetime import datetime, timedelta
 from collections import defaultdict
@@ -19,18 +21,11 @@ def get_dashboard_data():
             'is_active': True
         })
         
-        # Get total customers from child websites
-        total_customers = mongo.db.child_customers.count_documents({
-            'business_owner_id': ObjectId(current_user_id)
-        })
-        
-        # Get messages count from all collections
+        # Customer and message totals (all three inboxes) from the daily rollups
         biz_oid = ObjectId(current_user_id)
-        total_messages = (
-            mongo.db.messages.count_documents({'recipient_id': biz_oid}) +
-            mongo.db.contact_messages.count_documents({'business_id': biz_oid}) +
-            mongo.db.client_messages.count_documents({'business_id': biz_oid})
-        )
+        totals = MetricsRollup.totals(current_user_id, fields=['customers', 'messages'])
+        total_customers = totals.get('customers', 0)
+        total_messages = sum(totals.get('messages', {}).values())
         
         # Get QR scans
         qr_analytics = mongo.db.qr_analytics.find_one({
@@ -38,15 +33,16 @@ def get_dashboard_data():
         })
         total_scans = qr_analytics.get('total_scans', 0) if qr_analytics else 0
         
-        # Get sales data (mock for now - you can implement actual sales tracking)
-        monthly_revenue = 0
-        orders = list(mongo.db.orders.find({
-            'business_owner_id': ObjectId(current_user_id),
-            'created_at': {'$gte': datetime.utcnow() - timedelta(days=30)}
-        }))
-        
-        for order in orders:
-            monthly_revenue += order.get('total_amount', 0)
+        # Six 30-day order buckets ending now, in one aggregation
+        now = datetime.utcnow()
+        revenue_buckets = RevenueSeries.series(
+            RevenueSeries.owner_match(current_user_id),
+            start=RevenueSeries.lookback('day', periods=6, bin_size=30, end=now),
+            end=now,
+            unit='day',
+            bin_size=30
+        )
+        monthly_revenue = revenue_buckets[-1]['revenue']
         
         # Get recent activity from all message collections
         recent_messages = list(mongo.db.messages.find({
@@ -106,26 +102,13 @@ def get_dashboard_data():
         }).sort('created_at', -1).limit(5))
         
         # Analytics data for charts
-        analytics_data = []
-        for i in range(6):
-            month_start = datetime.utcnow() - timedelta(days=30*(i+1))
-            month_end = datetime.utcnow() - timedelta(days=30*i)
-            
-            month_orders = list(mongo.db.orders.find({
-                'business_owner_id': ObjectId(current_user_id),
-                'created_at': {'$gte': month_start, '$lt': month_end}
-            }))
-            
-            sales_count = len(month_orders)
-            revenue = sum(order.get('total_amount', 0) for order in month_orders)
-            
-            analytics_data.append({
-                'month': month_start.strftime('%b'),
-                'sales': sales_count,
-                'revenue': revenue
-            })
-        
-        analytics_data.reverse()
+        analytics_data = [
+            {
+                'month': bucket['start'].strftime('%b'),
+                'sales': bucket['count'],
+                'revenue': bucket['revenue']
+            } for bucket in revenue_buckets
+        ]
         
         return jsonify({
             'stats': {
@@ -158,31 +141,12 @@ def get_dashboard_stats():
     try:
         current_user_id = get_jwt_identity()
         
-        # Get today's stats
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + timedelta(days=1)
-        
-        biz_oid = ObjectId(current_user_id)
-        
-        today_messages = (
-            mongo.db.messages.count_documents({
-                'recipient_id': biz_oid,
-                'created_at': {'$gte': today_start, '$lt': today_end}
-            }) +
-            mongo.db.contact_messages.count_documents({
-                'business_id': biz_oid,
-                'created_at': {'$gte': today_start, '$lt': today_end}
-            }) +
-            mongo.db.client_messages.count_documents({
-                'business_id': biz_oid,
-                'created_at': {'$gte': today_start, '$lt': today_end}
-            })
-        )
+        # Get today's stats from today's rollup bucket
+        today_start = day_key()
+        today = MetricsRollup.totals(current_user_id, since=today_start, fields=['messages', 'customers'])
         
-        today_customers = mongo.db.child_customers.count_documents({
-            'business_owner_id': ObjectId(current_user_id),
-            'created_at': {'$gte': today_start, '$lt': today_end}
-        })
+        today_messages = sum(today.get('messages', {}).values())
+        today_customers = today.get('customers', 0)
         
         today_scans = 0
         qr_analytics = mongo.db.qr_analytics.find_one({
@@ -3,20 +3,90 @@ Event Routes — Analytics Event Ingestion & Summary Endpoints.
 
 Endpoints:
     POST /api/events/ingest          — Public (API key auth), accepts child website events
+    POST /api/events/batch           — Public (API key auth), many events in one request
     GET  /api/events/summary/<id>    — JWT-protected, returns aggregated metrics for copilot
+    GET  /api/events/collector/stats — JWT-protected, ingestion queue / spill / shed counters
 """
 
+import json
 import logging
-import secrets
-from flask import Blueprint, request, jsonify
+import zlib
+from bson import ObjectId
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import mongo
-from app.services.event_collector import event_collector
+from app.services.api_keys import ApiKeys
+from app.services.event_collector import event_collector, QUEUE_FULL_ERROR
 
 logger = logging.getLogger(__name__)
 
 event_bp = Blueprint("events", __name__)
 
+MAX_BATCH_EVENTS = 100
+MAX_BATCH_BYTES = 256 * 1024  # decompressed
+
+
+def _owner_ids(b_id_str):
+    """owner_id may be stored as a string or an ObjectId — match either."""
+    ids = [b_id_str]
+    if ObjectId.is_valid(b_id_str):
+        ids.append(ObjectId(b_id_str))
+    return {"$in": ids}
+
+
+def _authorize(b_id_str, api_key):
+    """
+    Auth check shared by /events/ingest and /events/batch.
+
+    PRODUCTION:  the API key must belong to this business (verified via
+                 the ApiKeys cache — usually no query at all).
+    DEVELOPMENT: keyless is allowed ONLY if FLASK_ENV=development AND the
+                 business exists in child_websites, preventing open
+                 ingestion from arbitrary external callers.
+
+    Returns None if allowed, else a (response, status) tuple.
+    """
+    if api_key:
+        if not ApiKeys.verify(b_id_str, api_key):
+            return jsonify({"success": False, "error": "Invalid API key"}), 403
+        return None
+
+    is_dev = current_app.config.get("ENV") == "development" or current_app.debug
+    if not is_dev:
+        return jsonify({
+            "success": False,
+            "error": "X-BE-Key header required. Generate one via POST /api/events/generate-key/<business_id>",
+        }), 403
+
+    # Even in dev, verify the business actually exists to prevent phantom data
+    site = mongo.db.child_websites.find_one({"owner_id": _owner_ids(b_id_str)}, {"_id": 1})
+    if not site:
+        return jsonify({
+            "success": False,
+            "error": f"No child website found for business '{b_id_str}'. Cannot ingest events.",
+        }), 404
+    return None
+
+
+def _read_batch_body():
+    """
+    Raw request body, gunzipped if Content-Encoding: gzip, capped at
+    MAX_BATCH_BYTES.  Raises ValueError on oversized or malformed input.
+    """
+    raw = request.get_data(cache=False)
+    if request.headers.get("Content-Encoding", "").lower() == "gzip":
+        try:
+            inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            raw = inflater.decompress(raw, MAX_BATCH_BYTES + 1)
+        except zlib.error:
+            raise ValueError("Malformed gzip body")
+    if len(raw) > MAX_BATCH_BYTES:
+        raise ValueError(f"Batch exceeds {MAX_BATCH_BYTES} bytes")
+    try:
+        return json.loads(raw or b"{}")
+    except ValueError:
+        raise ValueError("Body must be JSON")
+
 
 # ================================================================
 # POST /api/events/ingest — Public endpoint for child websites
@@ -49,53 +119,9 @@ def ingest_event():
         if not business_id:
             return jsonify({"success": False, "error": "business_id is required"}), 400
 
-        b_id_str = str(business_id)
-
-        if api_key:
-            # Verify the key belongs to this business
-            site = mongo.db.child_websites.find_one(
-                {"owner_id": b_id_str, "api_key": api_key},
-                {"_id": 1},
-            )
-            if not site:
-                from bson import ObjectId
-                try:
-                    site = mongo.db.child_websites.find_one(
-                        {"owner_id": ObjectId(b_id_str), "api_key": api_key},
-                        {"_id": 1},
-                    )
-                except Exception:
-                    pass
-            if not site:
-                return jsonify({"success": False, "error": "Invalid API key"}), 403
-        else:
-            # No API key — only allow in development mode AND only if the business exists
-            from flask import current_app
-            is_dev = current_app.config.get("ENV") == "development" or current_app.debug
-            if not is_dev:
-                return jsonify({
-                    "success": False,
-                    "error": "X-BE-Key header required. Generate one via POST /api/events/generate-key/<business_id>",
-                }), 403
-
-            # Even in dev, verify the business actually exists to prevent phantom data
-            site = mongo.db.child_websites.find_one(
-                {"owner_id": b_id_str}, {"_id": 1}
-            )
-            if not site:
-                from bson import ObjectId
-                try:
-                    site = mongo.db.child_websites.find_one(
-                        {"owner_id": ObjectId(b_id_str)}, {"_id": 1}
-                    )
-                except Exception:
-                    pass
-            if not site:
-                return jsonify({
-                    "success": False,
-                    "error": f"No child website found for business '{b_id_str}'. Cannot ingest events.",
-                }), 404
-
+        denied = _authorize(str(business_id), api_key)
+        if denied:
+            return denied
 
         success, error = event_collector.ingest_event(
             business_id=business_id,
@@ -106,6 +132,8 @@ def ingest_event():
             timestamp=data.get("timestamp"),
         )
 
+        if error == QUEUE_FULL_ERROR:
+            return jsonify({"success": False, "error": error}), 503, {"Retry-After": "30"}
         if not success:
             return jsonify({"success": False, "error": error}), 400
 
@@ -116,6 +144,77 @@ def ingest_event():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+# ================================================================
+# POST /api/events/batch — Batched events from the tracking snippet
+# ================================================================
+
+@event_bp.route("/events/batch", methods=["POST"])
+def ingest_batch():
+    """
+    Accepts up to MAX_BATCH_EVENTS events for one business in a single
+    request (one auth check).  The body may be gzip-encoded.  Because
+    navigator.sendBeacon cannot set headers, the API key may also be sent
+    in the body as "key".
+
+    Body:
+    {
+        "business_id": "...",
+        "key": "be_...",
+        "source_url": "https://example.netlify.app",
+        "events": [
+            {"event_type": "page_view", "event_data": { ... }, "timestamp": "..."},
+            ...
+        ]
+    }
+    """
+    try:
+        try:
+            data = _read_batch_body()
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        if not isinstance(data, dict):
+            return jsonify({"success": False, "error": "Body must be a JSON object"}), 400
+
+        business_id = data.get("business_id")
+        if not business_id:
+            return jsonify({"success": False, "error": "business_id is required"}), 400
+
+        events = data.get("events")
+        if not isinstance(events, list) or not events:
+            return jsonify({"success": False, "error": "events must be a non-empty list"}), 400
+        if len(events) > MAX_BATCH_EVENTS:
+            return jsonify({
+                "success": False,
+                "error": f"At most {MAX_BATCH_EVENTS} events per batch",
+            }), 400
+
+        api_key = request.headers.get("X-BE-Key") or data.get("key")
+        denied = _authorize(str(business_id), api_key)
+        if denied:
+            return denied
+
+        accepted, errors = event_collector.ingest_batch(
+            business_id,
+            events,
+            source_url=data.get("source_url"),
+            visitor_ip=request.remote_addr,
+        )
+
+        if not accepted and any(err["error"] == QUEUE_FULL_ERROR for err in errors):
+            return jsonify({"success": False, "error": QUEUE_FULL_ERROR}), 503, {"Retry-After": "30"}
+
+        return jsonify({
+            "success": accepted > 0,
+            "accepted": accepted,
+            "errors": errors,
+        }), 202 if accepted else 400
+
+    except Exception as e:
+        logger.error(f"Error in /events/batch: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 # ================================================================
 # GET /api/events/summary/<business_id> — JWT-protected for copilot
 # ================================================================
@@ -147,24 +246,26 @@ def get_event_summary(business_id):
 def generate_api_key(business_id):
     """
     Generates a new API key for a business's child website event ingestion.
-    Stored in child_websites.api_key.
+    Stored hashed in child_websites.api_key_hash; rotating revokes the old key.
     """
     try:
         user_id = get_jwt_identity()
         b_id_str = str(business_id)
 
         # Verify the caller owns this business
-        site = mongo.db.child_websites.find_one({"owner_id": b_id_str})
+        site = mongo.db.child_websites.find_one({"owner_id": _owner_ids(b_id_str)}, {"_id": 1})
         if not site:
             return jsonify({"success": False, "error": "No website found for this business"}), 404
 
-        # Generate a secure API key
-        api_key = f"be_{secrets.token_urlsafe(32)}"
+        # Generate a secure API key — only its hash is stored, the key
+        # itself is shown once in this response
+        api_key, api_key_hash = ApiKeys.generate()
 
         mongo.db.child_websites.update_one(
-            {"owner_id": b_id_str},
-            {"$set": {"api_key": api_key}},
+            {"_id": site["_id"]},
+            {"$set": {"api_key_hash": api_key_hash}, "$unset": {"api_key": ""}},
         )
+        ApiKeys.invalidate(b_id_str)
 
         return jsonify({
             "success": True,
@@ -175,3 +276,21 @@ def generate_api_key(business_id):
     except Exception as e:
         logger.error(f"Error in /events/generate-key: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
+
+
+# ================================================================
+# GET /api/events/collector/stats — JWT-protected ingestion health
+# ================================================================
+
+@event_bp.route("/events/collector/stats", methods=["GET"])
+@jwt_required()
+def get_collector_stats():
+    """
+    Queue depth plus write, retry, spill and drop counters of the
+    EventCollector, and hit/miss counters of the API-key cache.
+    """
+    return jsonify({
+        "success": True,
+        "stats": event_collector.stats(),
+        "api_key_cache": ApiKeys.stats(),
+    }), 200
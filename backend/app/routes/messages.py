@@ -3,119 +3,176 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import mongo, socketio
 from app.models.message import Message
 from app.services.email_service import EmailService
+from app.services.metrics_rollup import MetricsRollup
+from app.services.sentiment_pipeline import sentiment_pipeline
+from app.utils.helpers import encode_cursor, decode_cursor
 from bson import ObjectId
 from datetime import datetime
+from itertools import islice
 from flask_socketio import emit
+import heapq
 
 messages_bp = Blueprint('messages', __name__)
 
+# Unified inbox sources: (collection, owner field)
+INBOX_SOURCES = (
+    ('messages', 'recipient_id'),
+    ('contact_messages', 'business_id'),
+    ('client_messages', 'business_id'),
+)
+
+INBOX_SORT = [('created_at', -1), ('_id', -1)]
+
+# Documents whose created_at is missing or not a BSON date (legacy string
+# timestamps) cannot be range-compared against a date, so they form a second
+# tier after every dated document, ordered by _id alone.
+DATED = {'created_at': {'$type': 'date'}}
+UNDATED = {'created_at': {'$not': {'$type': 'date'}}}
+
+def _inbox_sort_key(msg):
+    """(dated, created_at, _id) — the keyset order shared by all inbox sources"""
+    dt = msg.get('created_at')
+    if isinstance(dt, datetime):
+        return True, dt, msg['_id']
+    return False, datetime.min, msg['_id']
+
+def _inbox_stream(collection, query, after, limit):
+    """
+    One source newest-first in _inbox_sort_key order: dated documents, then
+    undated ones.  `after` is a decoded cursor; created_at None means it sits
+    in the undated tier.  The undated query only runs once the dated one is
+    exhausted.
+    """
+    created_at, doc_id = after if after else (None, None)
+    tiers = []
+    if not after or created_at is not None:
+        dated = dict(query, **DATED)
+        if after:
+            dated['$or'] = [
+                {'created_at': {'$lt': created_at}},
+                {'created_at': created_at, '_id': {'$lt': doc_id}}
+            ]
+        tiers.append((dated, INBOX_SORT))
+    undated = dict(query, **UNDATED)
+    if after and created_at is None:
+        undated['_id'] = {'$lt': doc_id}
+    tiers.append((undated, [('_id', -1)]))
+    
+    for tier_query, sort in tiers:
+        for doc in mongo.db[collection].find(tier_query).sort(sort).limit(limit):
+            yield _inbox_sort_key(doc), collection, doc
+
+def _normalize_inbox_message(collection, msg):
+    """Maps a document from any inbox source onto the common message shape"""
+    if collection == 'messages':
+        return {
+            '_id': str(msg['_id']),
+            'recipient_id': str(msg['recipient_id']),
+            'customer_name': msg.get('customer_name', 'Anonymous'),
+            'customer_email': msg.get('customer_email', ''),
+            'customer_phone': msg.get('customer_phone', ''),
+            'content': msg.get('content', ''),
+            'created_at': msg.get('created_at'),
+            'message_type': msg.get('message_type', 'inquiry'),
+            'is_read': msg.get('is_read', False),
+            'reply': msg.get('reply', ''),
+            'reply_sent': bool(msg.get('reply', '')),
+            'replied_at': msg.get('replied_at'),
+            'status': msg.get('status', 'new')
+        }
+    
+    cust_info = msg.get('customer_info', {}) or {}
+    return {
+        '_id': str(msg['_id']),
+        'recipient_id': str(msg['business_id']),
+        'customer_name': f"{cust_info.get('first_name', '')} {cust_info.get('last_name', '')}".strip() or "Anonymous",
+        'customer_email': cust_info.get('email', ''),
+        'customer_phone': cust_info.get('phone', ''),
+        'content': msg.get('message', ''),
+        'created_at': msg.get('created_at'),
+        'message_type': 'contact_form',
+        'is_read': msg.get('is_read', False),
+        'reply': msg.get('reply', ''),
+        'reply_sent': bool(msg.get('reply', '')),
+        'replied_at': msg.get('replied_at'),
+        'status': msg.get('status', 'new')
+    }
+
+def _inbox_total(current_user_id, biz_oid, msg_filter):
+    """Total for the active filter; unfiltered and unread come from the rollups"""
+    if msg_filter == 'replied':
+        return sum(
+            mongo.db[collection].count_documents({owner_field: biz_oid, 'reply': {'$nin': [None, '']}})
+            for collection, owner_field in INBOX_SOURCES
+        )
+    
+    totals = MetricsRollup.totals(current_user_id, fields=['messages', 'unread'])
+    counters = totals.get('unread' if msg_filter == 'unread' else 'messages', {})
+    return sum(counters.get(collection, 0) for collection, _ in INBOX_SOURCES)
+
 @messages_bp.route('/messages', methods=['GET'])
 @jwt_required()
 def get_messages():
+    """
+    Unified inbox across messages, contact_messages and client_messages.
+    
+    Pass the returned `next_cursor` as ?cursor= to page forward; each source
+    is streamed newest-first with a limit and the streams are k-way merged,
+    so a page reads at most 3 * (per_page + 1) documents.  ?page= is still
+    accepted for offset paging.
+    """
     try:
         current_user_id = get_jwt_identity()
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         msg_filter = request.args.get('filter', 'all')
+        cursor = request.args.get('cursor')
         
-        skip = (page - 1) * per_page
         biz_oid = ObjectId(current_user_id)
         
-        # 1. Fetch from 'messages'
-        db_messages = list(mongo.db.messages.find({'recipient_id': biz_oid}))
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            skip = 0
+        else:
+            skip = (page - 1) * per_page
         
-        # 2. Fetch from 'contact_messages'
-        contact_messages = list(mongo.db.contact_messages.find({'business_id': biz_oid}))
+        # No source can contribute more than skip + per_page (+1 to detect more)
+        limit = skip + per_page + 1
         
-        # 3. Fetch from 'client_messages'
-        client_messages = list(mongo.db.client_messages.find({'business_id': biz_oid}))
+        streams = []
+        for collection, owner_field in INBOX_SOURCES:
+            query = {owner_field: biz_oid}
+            if msg_filter == 'unread':
+                query['is_read'] = {'$ne': True}
+            elif msg_filter == 'replied':
+                query['reply'] = {'$nin': [None, '']}
+            streams.append(_inbox_stream(collection, query, after, limit))
         
-        # Normalize and merge
-        normalized = []
+        merged = heapq.merge(*streams, key=lambda item: item[0], reverse=True)
+        window = list(islice(merged, skip, skip + per_page + 1))
         
-        for msg in db_messages:
-            normalized.append({
-                '_id': str(msg['_id']),
-                'recipient_id': str(msg['recipient_id']),
-                'customer_name': msg.get('customer_name', 'Anonymous'),
-                'customer_email': msg.get('customer_email', ''),
-                'customer_phone': msg.get('customer_phone', ''),
-                'content': msg.get('content', ''),
-                'created_at': msg.get('created_at'),
-                'message_type': msg.get('message_type', 'inquiry'),
-                'is_read': msg.get('is_read', False),
-                'reply': msg.get('reply', ''),
-                'reply_sent': bool(msg.get('reply', '')),
-                'replied_at': msg.get('replied_at'),
-                'status': msg.get('status', 'new')
-            })
-            
-        for msg in contact_messages:
-            cust_info = msg.get('customer_info', {}) or {}
-            normalized.append({
-                '_id': str(msg['_id']),
-                'recipient_id': str(msg['business_id']),
-                'customer_name': f"{cust_info.get('first_name', '')} {cust_info.get('last_name', '')}".strip() or "Anonymous",
-                'customer_email': cust_info.get('email', ''),
-                'customer_phone': cust_info.get('phone', ''),
-                'content': msg.get('message', ''),
-                'created_at': msg.get('created_at'),
-                'message_type': 'contact_form',
-                'is_read': msg.get('is_read', False),
-                'reply': msg.get('reply', ''),
-                'reply_sent': bool(msg.get('reply', '')),
-                'replied_at': msg.get('replied_at'),
-                'status': msg.get('status', 'new')
-            })
-            
-        for msg in client_messages:
-            cust_info = msg.get('customer_info', {}) or {}
-            normalized.append({
-                '_id': str(msg['_id']),
-                'recipient_id': str(msg['business_id']),
-                'customer_name': f"{cust_info.get('first_name', '')} {cust_info.get('last_name', '')}".strip() or "Anonymous",
-                'customer_email': cust_info.get('email', ''),
-                'customer_phone': cust_info.get('phone', ''),
-                'content': msg.get('message', ''),
-                'created_at': msg.get('created_at'),
-                'message_type': 'contact_form',
-                'is_read': msg.get('is_read', False),
-                'reply': msg.get('reply', ''),
-                'reply_sent': bool(msg.get('reply', '')),
-                'replied_at': msg.get('replied_at'),
-                'status': msg.get('status', 'new')
-            })
-            
-        # Apply filter
-        if msg_filter == 'unread':
-            normalized = [m for m in normalized if not m['is_read']]
-        elif msg_filter == 'replied':
-            normalized = [m for m in normalized if m['reply_sent']]
-            
-        # Helper to parse and sort by date
-        def get_date(item):
-            dt = item.get('created_at')
-            if isinstance(dt, datetime):
-                return dt
-            if isinstance(dt, str):
-                try:
-                    return datetime.fromisoformat(dt.replace('Z', '+00:00'))
-                except Exception:
-                    pass
-            return datetime.min
-            
-        normalized.sort(key=get_date, reverse=True)
+        has_more = len(window) > per_page
+        window = window[:per_page]
         
-        # Paginate
-        total = len(normalized)
-        paginated = normalized[skip : skip + per_page]
+        next_cursor = None
+        if has_more and window:
+            dated, last_created_at, last_id = window[-1][0]
+            next_cursor = encode_cursor(last_created_at if dated else None, last_id)
+        
+        total = _inbox_total(current_user_id, biz_oid, msg_filter)
         
         return jsonify({
-            'messages': paginated,
+            'messages': [_normalize_inbox_message(collection, doc) for _, collection, doc in window],
             'total': total,
             'page': page,
             'per_page': per_page,
-            'pages': (total + per_page - 1) // per_page
+            'pages': (total + per_page - 1) // per_page,
+            'has_more': has_more,
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
@@ -144,7 +201,10 @@ def create_message():
         )
         
         # Insert into database
-        result = mongo.db.messages.insert_one(message.to_dict())
+        message_doc = message.to_dict()
+        result = mongo.db.messages.insert_one(message_doc)
+        MetricsRollup.record_created(message_doc['recipient_id'], 'messages', message_doc)
+        sentiment_pipeline.enqueue('messages', result.inserted_id, message_doc.get('content'))
         
         # Get the created message
         created_message = mongo.db.messages.find_one({'_id': result.inserted_id})
@@ -255,27 +315,22 @@ def mark_message_read(message_id):
         biz_oid = ObjectId(current_user_id)
         msg_oid = ObjectId(message_id)
         
-        # Try messages first
-        result = mongo.db.messages.update_one(
-            {'_id': msg_oid, 'recipient_id': biz_oid},
-            {'$set': {'is_read': True, 'read_at': datetime.utcnow()}}
-        )
+        read_update = {'is_read': True, 'read_at': datetime.utcnow()}
         
-        if result.matched_count == 0:
-            # Try contact_messages
-            result = mongo.db.contact_messages.update_one(
-                {'_id': msg_oid, 'business_id': biz_oid},
-                {'$set': {'is_read': True, 'read_at': datetime.utcnow()}}
-            )
-            
-        if result.matched_count == 0:
-            # Try client_messages
-            result = mongo.db.client_messages.update_one(
-                {'_id': msg_oid, 'business_id': biz_oid},
-                {'$set': {'is_read': True, 'read_at': datetime.utcnow()}}
+        # Try messages first, then contact_messages, then client_messages.
+        # The pre-update document drives the rollup's unread counter.
+        before = None
+        for collection, owner_field in INBOX_SOURCES:
+            before = mongo.db[collection].find_one_and_update(
+                {'_id': msg_oid, owner_field: biz_oid},
+                {'$set': read_update},
+                projection={'created_at': 1, 'is_read': 1}
             )
+            if before:
+                MetricsRollup.record_transition(biz_oid, collection, before, read_update)
+                break
             
-        if result.matched_count == 0:
+        if not before:
             return jsonify({'error': 'Message not found'}), 404
             
         return jsonify({'message': 'Message marked as read'}), 200
@@ -3,6 +3,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import mongo
 from app.models.order import Order
 from app.services.email_service import EmailService
+from app.services.metrics_rollup import MetricsRollup
+from app.services.revenue_series import RevenueSeries, SUPPORTED_UNITS
 from bson import ObjectId
 from datetime import datetime
 
@@ -39,12 +41,17 @@ def create_order():
             order.add_measurements(data['measurements'])
         
         # Insert into database
-        result = mongo.db.orders.insert_one(order.to_dict())
+        order_doc = order.to_dict()
+        result = mongo.db.orders.insert_one(order_doc)
         order_id = str(result.inserted_id)
         
         # Get business info for email
         business = mongo.db.child_websites.find_one({'_id': ObjectId(data['business_id'])})
         
+        # Orders are keyed by child website; roll them up under the site owner
+        if business:
+            MetricsRollup.record_created(business.get('owner_id'), 'orders', order_doc)
+        
         # Send confirmation email to customer
         try:
             email_service.send_order_confirmation(order, business)
@@ -261,17 +268,24 @@ def get_order_stats(business_id):
         if not business:
             return jsonify({'error': 'Business not found or unauthorized'}), 404
         
-        # Get stats
-        pipeline = [
-            {'$match': {'business_id': ObjectId(business_id)}},
-            {'$group': {
-                '_id': '$status',
-                'count': {'$sum': 1},
-                'total_amount': {'$sum': '$total_amount'}
-            }}
-        ]
-        
-        stats = list(mongo.db.orders.aggregate(pipeline))
+        # Optional time series, e.g. ?unit=week&periods=12
+        unit = request.args.get('unit')
+        if unit and unit not in SUPPORTED_UNITS:
+            return jsonify({'error': f"unit must be one of {', '.join(SUPPORTED_UNITS)}"}), 400
+        match = {'business_id': ObjectId(business_id)}
+        
+        if unit:
+            periods = int(request.args.get('periods', 12))
+            now = datetime.utcnow()
+            buckets = RevenueSeries.series(
+                match,
+                start=RevenueSeries.lookback(unit, periods=periods, end=now),
+                end=now,
+                unit=unit,
+                split_by='status'
+            )
+        else:
+            buckets = RevenueSeries.series(match, split_by='status')
         
         # Format stats
         result = {
@@ -283,14 +297,20 @@ def get_order_stats(business_id):
             'cancelled': 0
         }
         
-        for stat in stats:
-            status = stat['_id']
-            count = stat['count']
-            amount = stat['total_amount']
-            
-            result['total_orders'] += count
-            result['total_revenue'] += amount
-            result[status] = count
+        for bucket in buckets:
+            result['total_orders'] += bucket['count']
+            result['total_revenue'] += bucket['revenue']
+            for status, stat in bucket['by'].items():
+                result[status] = result.get(status, 0) + stat['count']
+        
+        if unit:
+            result['series'] = [
+                {
+                    'start': bucket['start'].isoformat(),
+                    'orders': bucket['count'],
+                    'revenue': bucket['revenue']
+                } for bucket in buckets
+            ]
         
         return jsonify(result), 200
         
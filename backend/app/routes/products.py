@@ -10,26 +10,19 @@ products_bp = Blueprint('products', __name__)
 logger = logging.getLogger(__name__)
 
 def trigger_site_redeploy(business_id):
-    """Automatically rebuild and deploy child website when products are modified"""
+    """Queue a rebuild and deploy of the child website when products are modified"""
     try:
         b_id_str = str(business_id)
-        # Find active schema
-        active_schema = mongo.db.website_schemas.find_one({
-            'business_id': b_id_str,
-            'is_active': True
-        })
-        if active_schema:
-            from app.services.schema_renderer import SchemaRenderer
-            from app.services.patch_engine import PatchEngine
-            
-            rendered_html = SchemaRenderer.render(active_schema)
-            # Write to disk
-            PatchEngine.write_website_to_disk(b_id_str, rendered_html)
-            # Push to Netlify (best-effort)
-            PatchEngine._deploy_to_netlify(b_id_str, rendered_html)
-            logger.info(f"🔄 Website auto-redeployed on product change for business {b_id_str}")
+        # Live /site/<website_id> pages embed the product list
+        from app.services.site_render_cache import site_render_cache
+        site_render_cache.invalidate(b_id_str)
+
+        # Render + Netlify push happen off the request path; bulk edits
+        # coalesce into one deploy of the latest state (see DeployQueue)
+        from app.services.deploy_queue import deploy_queue
+        deploy_queue.request(b_id_str, reason="products")
     except Exception as e:
-        logger.warning(f"Could not auto-redeploy site for business {business_id} on product change: {e}")
+        logger.warning(f"Could not queue site redeploy for business {business_id} on product change: {e}")
 
 @products_bp.route('/products', methods=['GET'])
 @jwt_required()
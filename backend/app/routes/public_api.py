@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from app import mongo
+from app.services.metrics_rollup import MetricsRollup
 from bson import ObjectId
 from datetime import datetime
 import random
@@ -502,6 +503,7 @@ def submit_consultation_booking():
         
         # Insert booking
         result = mongo.db.consultation_bookings.insert_one(booking_data)
+        MetricsRollup.record_created(booking_data['business_id'], 'consultation_bookings', booking_data)
         
         # Register customer if not exists
         register_customer_from_booking(data['businessId'], {
@@ -614,6 +616,7 @@ def submit_legal_contact():
         
         # Insert message
         result = mongo.db.client_messages.insert_one(message_data)
+        MetricsRollup.record_created(message_data['business_id'], 'client_messages', message_data)
         
         # Register customer
         register_customer_from_booking(data['businessId'], {
@@ -702,6 +705,7 @@ def submit_measurement_booking():
         
         # Insert booking
         result = mongo.db.measurement_bookings.insert_one(booking_data)
+        MetricsRollup.record_created(booking_data['business_id'], 'measurement_bookings', booking_data)
         
         # Register customer
         register_customer_from_booking(data['businessId'], {
@@ -816,6 +820,7 @@ def submit_order_inquiry():
         
         # Insert inquiry
         result = mongo.db.order_inquiries.insert_one(inquiry_data)
+        MetricsRollup.record_created(inquiry_data['business_id'], 'order_inquiries', inquiry_data)
         
         # Register customer
         register_customer_from_booking(data['businessId'], {
@@ -926,6 +931,7 @@ def submit_general_contact():
         
         # Insert message
         result = mongo.db.contact_messages.insert_one(message_data)
+        MetricsRollup.record_created(message_data['business_id'], 'contact_messages', message_data)
         
         # Register customer
         register_customer_from_booking(data['businessId'], {
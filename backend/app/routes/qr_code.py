@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, send_file, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import mongo
 from app.services.qr_service import QRService
+from app.services.metrics_rollup import MetricsRollup
 from bson import ObjectId
 from datetime import datetime, date
 import io
@@ -472,6 +473,7 @@ def track_qr_scan():
             scan_record['location'] = scan_location
         
         mongo.db.qr_scans.insert_one(scan_record)
+        MetricsRollup.record_created(user_object_id, 'qr_scans', scan_record)
         
         # Get updated analytics for response
         updated_analytics = mongo.db.qr_analytics.find_one({'user_id': user_object_id})
@@ -242,15 +242,9 @@ def translate_law_firm():
                 "error": "Law firm data is required"
             }), 400
         
-        # Translate law firm specific content
+        # Translate law firm content (practice_areas included) in one batch
         translated_data = translation_service.translate_website_content(law_firm_data, target_lang)
         
-        # Add law firm specific translations
-        if 'practice_areas' in translated_data:
-            translated_data['practice_areas'] = translation_service.translate_object(
-                translated_data['practice_areas'], target_lang
-            )
-        
         return jsonify({
             "success": True,
             "translated_law_firm": translated_data,
@@ -285,20 +279,9 @@ def translate_beauty_salon():
                 "error": "Beauty salon data is required"
             }), 400
         
-        # Translate beauty salon specific content
+        # Translate beauty salon content (services and staff_members included) in one batch
         translated_data = translation_service.translate_website_content(salon_data, target_lang)
         
-        # Add beauty salon specific translations
-        if 'services' in translated_data:
-            translated_data['services'] = translation_service.translate_object(
-                translated_data['services'], target_lang
-            )
-        
-        if 'staff_members' in translated_data:
-            translated_data['staff_members'] = translation_service.translate_object(
-                translated_data['staff_members'], target_lang
-            )
-        
         return jsonify({
             "success": True,
             "translated_salon": translated_data,
@@ -334,17 +317,11 @@ def batch_translate():
                 "error": "Items array is required"
             }), 400
         
-        # Translate all items
-        translated_items = []
-        for item in items:
-            if isinstance(item, str):
-                translated_text = translation_service.translate_text(item, target_lang, source_lang)
-                translated_items.append(translated_text)
-            elif isinstance(item, dict):
-                translated_obj = translation_service.translate_object(item, target_lang, source_lang)
-                translated_items.append(translated_obj)
-            else:
-                translated_items.append(item)
+        # Translate all items (strings and dicts) in one batch
+        translated_items = [
+            translated if isinstance(item, (str, dict)) else item
+            for item, translated in zip(items, translation_service.translate_object(items, target_lang, source_lang))
+        ]
         
         return jsonify({
             "success": True,
@@ -3,6 +3,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import mongo
 from app.services.website_service import WebsiteService, GeminiWebsiteService, WebsiteTrainingService
 from app.models.child_website import ChildWebsite
+from app.services.metrics_rollup import MetricsRollup
+from app.services.history_store import HistoryStore
 from bson import ObjectId
 from datetime import datetime
 import logging
@@ -151,7 +153,7 @@ def create_website():
             "git_ref": None,
             "deploy_ref": None,
         }
-        mongo.db.website_history.insert_one(history_record)
+        HistoryStore.record(history_record)
 
         
         # Generate website URL
@@ -288,7 +290,7 @@ def update_website():
                 "git_ref": None,
                 "deploy_ref": existing_schema.get("deployment_id"),
             }
-            mongo.db.website_history.insert_one(history_record)
+            HistoryStore.record(history_record)
         else:
             schema["schema_version"] = 1
             schema["version"] = 1.0
@@ -313,7 +315,7 @@ def update_website():
                 "git_ref": None,
                 "deploy_ref": None,
             }
-            mongo.db.website_history.insert_one(history_record)
+            HistoryStore.record(history_record)
         
         # Get updated website (support both string and ObjectId owner_id)
         updated_website = mongo.db.child_websites.find_one({
@@ -483,6 +485,7 @@ def track_website_visit(website_id):
         }
         
         mongo.db.website_analytics.insert_one(visit_data)
+        MetricsRollup.record_created(website['owner_id'], 'website_analytics', visit_data)
         
         return jsonify({'message': 'Visit tracked successfully'}), 200
         
@@ -3,12 +3,12 @@ AI Business Chatbot Service using Gemini API
 Acts as a business co-partner providing insights, advice, and assistance
 """
 
-import requests
 import logging
 import os
 import json
 from datetime import datetime
 from app.services.business_memory import BusinessMemory
+from app.services.llm_transport import llm_transport
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +17,9 @@ class AIBusinessChatbotService:
     
     def __init__(self):
         self.gemini_api_key = os.getenv('GEMINI_API_KEY')
-        self.gemini_api_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent"
+        self.gemini_model = "gemini-1.5-flash-latest"
+        self.gemini_api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.gemini_model}:generateContent"
+        self.gemini_stream_url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.gemini_model}:streamGenerateContent"
         
         # Business co-partner personality and knowledge base
         self.system_prompt = """You are an AI business co-partner and advisor for Break-even platform users. You have extensive knowledge about:
@@ -54,77 +56,7 @@ Respond in the user's language if they write in a different language.
         Get AI business partner response using Gemini API
         """
         try:
-            # Build context from user information
-            context_info = ""
-            if user_context:
-                context_info = f"""
-User Context:
-- Business Owner: {user_context.get('name', 'Business Owner')}
-- Business Type: {user_context.get('business_type', 'General Business')}
-- Business Name: {user_context.get('business_name', 'Their Business')}
-"""
-
-            # Build conversation context
-            conversation_context = ""
-            if conversation_history:
-                recent_messages = conversation_history[-3:]  # Last 3 messages
-                conversation_context = "\nRecent conversation:\n"
-                for msg in recent_messages:
-                    role = "User" if msg.get('type') == 'user' else "Assistant"
-                    conversation_context += f"{role}: {msg.get('content', '')}\n"
-
-            # Query RAG Vector DB memory
-            rag_context = ""
-            business_id = user_context.get('business_id') if user_context else None
-            if business_id:
-                try:
-                    memories = BusinessMemory.retrieve_relevant_memory(business_id, message, limit=3)
-                    if memories:
-                        rag_context = "\nRelevant Business Memory / Industry Benchmarks:\n"
-                        for idx, mem in enumerate(memories):
-                            source = mem.get("source", "own_history")
-                            if source == "industry_benchmark":
-                                desc = mem.get("description", "")
-                                gain = mem.get("expected_conversion_gain", 0)
-                                pattern = mem.get("pattern_name", "")
-                                rag_context += f"[{idx+1}] Industry Benchmark ({pattern}): {desc} (Expected Impact: +{gain}%)\n"
-                            else:
-                                patch = mem.get("patch_name", "optimization_patch")
-                                reason = mem.get("reason", "")
-                                gain = mem.get("conversion_gain", 0)
-                                outcome = mem.get("patch_outcome", "success")
-                                rag_context += f"[{idx+1}] Past Layout Patch ({patch}): {reason}. Outcome: {outcome} (Gain: {gain}%)\n"
-                        rag_context += "\n"
-                except Exception as rag_err:
-                    logger.warning(f"Failed to retrieve RAG memory for chatbot: {rag_err}")
-
-            # Create the prompt
-            prompt = f"""{self.system_prompt}
-
-{context_info}
-{rag_context}
-{conversation_context}
-
-Language: Respond in {self._get_language_name(language)}
-
-User Message: {message}
-
-Provide a helpful, business-focused response as their AI co-partner:"""
-
-            # Prepare Gemini API request
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": prompt
-                    }]
-                }],
-                "generationConfig": {
-                    "temperature": 0.7,
-                    "topK": 40,
-                    "topP": 0.95,
-                    "maxOutputTokens": 1024
-                }
-            }
+            prompt = self._build_prompt(message, language, user_context, conversation_history)
             
             headers = {
                 'Content-Type': 'application/json'
@@ -133,7 +65,9 @@ Provide a helpful, business-focused response as their AI co-partner:"""
             url = f"{self.gemini_api_url}?key={self.gemini_api_key}"
             
             logger.info(f"Making Gemini API request for business chat")
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = llm_transport.post(
+                "gemini", url, model=self.gemini_model, json=self._build_payload(prompt), headers=headers, timeout=30
+            )
             
             if response.status_code == 200:
                 result = response.json()
@@ -156,6 +90,113 @@ Provide a helpful, business-focused response as their AI co-partner:"""
             logger.error(f"Error calling Gemini API for business chat: {e}")
             return self._get_fallback_response(message, language)
 
+    def stream_business_response(self, message, on_chunk, language='en', user_context=None, conversation_history=None):
+        """
+        Same answer as get_business_response, streamed: on_chunk(delta) is
+        called for every text chunk as Gemini generates it.  Returns the
+        full response once the stream ends.  If Gemini fails before the
+        first chunk the fallback response is sent as a single chunk.
+        """
+        from app.services.gemini_service import iter_stream_text
+
+        chunks = []
+        try:
+            prompt = self._build_prompt(message, language, user_context, conversation_history)
+            url = f"{self.gemini_stream_url}?alt=sse&key={self.gemini_api_key}"
+            lines = llm_transport.stream(
+                "gemini", url, model=self.gemini_model, json=self._build_payload(prompt),
+                headers={'Content-Type': 'application/json'}
+            )
+            for delta in iter_stream_text(lines):
+                chunks.append(delta)
+                on_chunk(delta)
+        except Exception as e:
+            if not chunks:
+                logger.error(f"Error streaming Gemini business chat: {e}")
+            else:
+                logger.warning(f"Gemini business chat stream interrupted after {len(chunks)} chunk(s): {e}")
+
+        if not chunks:
+            fallback = self._get_fallback_response(message, language)
+            on_chunk(fallback)
+            return fallback
+        return "".join(chunks).strip()
+
+    def _build_prompt(self, message, language='en', user_context=None, conversation_history=None):
+        """Business co-partner prompt: user context, RAG memory and recent turns"""
+        # Build context from user information
+        context_info = ""
+        if user_context:
+            context_info = f"""
+User Context:
+- Business Owner: {user_context.get('name', 'Business Owner')}
+- Business Type: {user_context.get('business_type', 'General Business')}
+- Business Name: {user_context.get('business_name', 'Their Business')}
+"""
+
+        # Build conversation context
+        conversation_context = ""
+        if conversation_history:
+            recent_messages = conversation_history[-3:]  # Last 3 messages
+            conversation_context = "\nRecent conversation:\n"
+            for msg in recent_messages:
+                role = "User" if msg.get('type') == 'user' else "Assistant"
+                conversation_context += f"{role}: {msg.get('content', '')}\n"
+
+        # Query RAG Vector DB memory
+        rag_context = ""
+        business_id = user_context.get('business_id') if user_context else None
+        if business_id:
+            try:
+                memories = BusinessMemory.retrieve_relevant_memory(business_id, message, limit=3)
+                if memories:
+                    rag_context = "\nRelevant Business Memory / Industry Benchmarks:\n"
+                    for idx, mem in enumerate(memories):
+                        source = mem.get("source", "own_history")
+                        if source == "industry_benchmark":
+                            desc = mem.get("description", "")
+                            gain = mem.get("expected_conversion_gain", 0)
+                            pattern = mem.get("pattern_name", "")
+                            rag_context += f"[{idx+1}] Industry Benchmark ({pattern}): {desc} (Expected Impact: +{gain}%)\n"
+                        else:
+                            patch = mem.get("patch_name", "optimization_patch")
+                            reason = mem.get("reason", "")
+                            gain = mem.get("conversion_gain", 0)
+                            outcome = mem.get("patch_outcome", "success")
+                            rag_context += f"[{idx+1}] Past Layout Patch ({patch}): {reason}. Outcome: {outcome} (Gain: {gain}%)\n"
+                    rag_context += "\n"
+            except Exception as rag_err:
+                logger.warning(f"Failed to retrieve RAG memory for chatbot: {rag_err}")
+
+        # Create the prompt
+        prompt = f"""{self.system_prompt}
+
+{context_info}
+{rag_context}
+{conversation_context}
+
+Language: Respond in {self._get_language_name(language)}
+
+User Message: {message}
+
+Provide a helpful, business-focused response as their AI co-partner:"""
+        return prompt
+
+    def _build_payload(self, prompt):
+        return {
+            "contents": [{
+                "parts": [{
+                    "text": prompt
+                }]
+            }],
+            "generationConfig": {
+                "temperature": 0.7,
+                "topK": 40,
+                "topP": 0.95,
+                "maxOutputTokens": 1024
+            }
+        }
+
     def _get_language_name(self, language_code):
         """Convert language code to full name"""
         languages = {
@@ -0,0 +1,87 @@
+"""
+ApiKeys — Child-website ingestion keys (X-BE-Key) and their verification cache.
+
+PROBLEM THIS SOLVES:
+    /api/events/ingest and /api/events/batch are the hottest public
+    endpoints, and every call ran one or two child_websites.find_one
+    queries (owner_id as string, then as ObjectId) to check the key —
+    for a mapping that changes only when a key is rotated.
+
+HOW IT WORKS:
+    Keys are stored only as SHA-256 hashes (child_websites.api_key_hash,
+    unique index), so verification is a single indexed point read and a
+    database leak does not leak usable keys.  Verified (business_id,
+    key hash) pairs are cached in-process for VALID_TTL_SECONDS; invalid
+    pairs are cached for INVALID_TTL_SECONDS so repeated bad keys don't
+    reach MongoDB.  Rotating a key drops every cached pair of that
+    business (gunicorn runs a single worker, so the in-process drop is
+    authoritative).
+"""
+
+import hashlib
+import logging
+import secrets
+
+from app import mongo
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+KEY_PREFIX = "be_"
+VALID_TTL_SECONDS = 300
+INVALID_TTL_SECONDS = 60
+CACHE_MAXSIZE = 10000
+
+_cache = TTLCache(ttl=VALID_TTL_SECONDS, maxsize=CACHE_MAXSIZE)
+
+
+class ApiKeys:
+
+    # ================================================================
+    # Public API
+    # ================================================================
+
+    @staticmethod
+    def hash_key(api_key):
+        """SHA-256 hex digest stored in child_websites.api_key_hash."""
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def generate(cls):
+        """New random key.  Returns (api_key, api_key_hash); store only the hash."""
+        api_key = f"{KEY_PREFIX}{secrets.token_urlsafe(32)}"
+        return api_key, cls.hash_key(api_key)
+
+    @classmethod
+    def verify(cls, business_id, api_key):
+        """True if api_key belongs to business_id (cached, including misses)."""
+        if not api_key:
+            return False
+        b_id_str = str(business_id)
+        key = (b_id_str, cls.hash_key(api_key))
+
+        cached = _cache.get(key)
+        if cached is not None:
+            return cached
+
+        site = mongo.db.child_websites.find_one({"api_key_hash": key[1]}, {"owner_id": 1})
+        valid = bool(site) and str(site.get("owner_id")) == b_id_str
+        _cache.set(key, valid, ttl=None if valid else INVALID_TTL_SECONDS)
+        if not valid:
+            logger.warning(f"🔑 Rejected ingestion key for business {b_id_str}")
+        return valid
+
+    @staticmethod
+    def invalidate(business_id):
+        """Drops every cached verification (positive or negative) of a business."""
+        b_id_str = str(business_id)
+        _cache.invalidate_where(lambda key: key[0] == b_id_str)
+
+    @staticmethod
+    def stats():
+        """Hit/miss counters of the verification cache."""
+        return _cache.stats()
@@ -16,22 +16,26 @@ Tenant Isolation:
     collection — never by leaking raw business memories.
 
 Uses Gemini embeddings when online, with a fast local numpy cosine-similarity
-fallback for offline development environments.
+fallback for offline development environments.  The NumPy path is served by
+the in-process per-tenant MemoryIndex (see memory_index.py).
+
+Vectors are stored as compact float32 BSON binaries (see utils/vector_codec.py).
 """
 
-import os
-import json
 import logging
 from datetime import datetime, timezone
 import numpy as np
 from app import mongo
-from google import genai
-from flask import current_app
+from app.services.embedding_service import embedding_service
+from app.utils.vector_codec import encode_vector
+from app.services.memory_index import (
+    memory_index,
+    OUTCOME_SUCCESS,
+    OUTCOME_FAILED,
+)
 
 logger = logging.getLogger(__name__)
 
-VECTOR_DIM = 768
-
 
 class BusinessMemory:
 
@@ -43,41 +47,15 @@ class BusinessMemory:
     def _get_embedding(cls, text):
         """
         Generates a 768-dim vector embedding using Gemini's embedding model.
-        Falls back to a local numpy token-frequency pseudo-vector when offline.
+        Served through the shared EmbeddingService (LRU + Mongo cache);
+        falls back to a local numpy pseudo-vector when offline.
         """
-        api_key = current_app.config.get("GEMINI_API_KEY")
-        if api_key:
-            try:
-                client = genai.Client(api_key=api_key)
-                # gemini-embedding-001 is the current v1beta embedding model.
-                # If this key does not have billing enabled, the call returns 403
-                # and the local numpy fallback below is used automatically.
-                response = client.models.embed_content(
-                    model="models/gemini-embedding-001",
-                    contents=text,
-                )
-                # New SDK returns EmbedContentResponse with .embeddings list
-                embeddings = getattr(response, "embeddings", None)
-                if embeddings and len(embeddings) > 0:
-                    return embeddings[0].values
-            except Exception as e:
-                logger.warning(f"Gemini embedding failed: {e}. Using local cosine fallback.")
-
-        # Local fallback: simple token-frequency vector
-        vec = np.zeros(VECTOR_DIM)
-        words = str(text).lower().split()
-        if not words:
-            return vec.tolist()
+        return embedding_service.embed(text)
 
-        for word in words:
-            idx = hash(word) % VECTOR_DIM
-            vec[idx] += 1.0
-
-        norm = np.linalg.norm(vec)
-        if norm > 0:
-            vec = vec / norm
-
-        return vec.tolist()
+    @classmethod
+    def _get_embeddings(cls, texts):
+        """Batch variant of _get_embedding — one Gemini call for all misses."""
+        return embedding_service.embed_many(texts)
 
     # ================================================================
     # Store optimization memory
@@ -141,12 +119,13 @@ class BusinessMemory:
                 "patch_json": patch_json,
                 "git_ref": git_ref,
                 "deploy_ref": deploy_ref,
-                "vector": vector,
+                "vector": encode_vector(vector),
                 "memory_context": memory_context,
                 "created_at": datetime.now(timezone.utc),
             }
 
-            mongo.db.business_memory.insert_one(memory_doc)
+            result = mongo.db.business_memory.insert_one(memory_doc)
+            memory_index.add(b_id_str, result.inserted_id, vector, patch_outcome)
             logger.info(f"✅ Stored optimization memory for '{b_id_str}': {patch_name} ({patch_outcome})")
             return True
         except Exception as e:
@@ -158,18 +137,22 @@ class BusinessMemory:
     # ================================================================
 
     @classmethod
-    def retrieve_relevant_memory(cls, business_id, query_phrase, limit=3):
+    def retrieve_relevant_memory(cls, business_id, query_phrase, limit=3, query_vector=None):
         """
         Uses MongoDB Atlas Vector Search if available, falling back to local
         NumPy-based cosine similarity computation if unsupported/index missing.
 
+        Pass query_vector to reuse an embedding the caller already computed.
+
         TENANT ISOLATION: Always filtered by business_id.
         If no business-specific memories exist, returns industry benchmarks
         instead of leaking other businesses' memories.
         """
         try:
             b_id_str = str(business_id)
-            query_vector = np.array(cls._get_embedding(query_phrase))
+            if query_vector is None:
+                query_vector = cls._get_embedding(query_phrase)
+            query_vector = np.asarray(query_vector)
 
             # Try MongoDB Atlas Vector Search — ALWAYS filtered by business_id
             try:
@@ -212,42 +195,14 @@ class BusinessMemory:
                     "Falling back to local NumPy-based similarity computation."
                 )
 
-            # --- Fallback: Local NumPy Cosine Similarity Search ---
-            # TENANT ISOLATED: only fetch memories for THIS business
-            cursor = mongo.db.business_memory.find({"business_id": b_id_str})
-            memories = list(cursor)
+            # --- Fallback: In-process NumPy vector index ---
+            # TENANT ISOLATED: the index only holds memories for THIS business
+            results = cls._search_index(b_id_str, query_vector, limit)
 
-            if not memories:
+            if not results:
                 # No business-specific memories → return industry benchmarks (NOT other businesses' data)
                 return cls._get_industry_fallback(b_id_str, query_phrase, limit)
 
-            scored_memories = []
-            qv_norm = np.linalg.norm(query_vector)
-
-            for mem in memories:
-                v = mem.get("vector")
-                if not v or len(v) != VECTOR_DIM:
-                    continue
-
-                mv = np.array(v)
-                mv_norm = np.linalg.norm(mv)
-
-                if qv_norm > 0 and mv_norm > 0:
-                    similarity = float(np.dot(query_vector, mv) / (qv_norm * mv_norm))
-                else:
-                    similarity = 0.0
-
-                scored_memories.append((similarity, mem))
-
-            scored_memories.sort(key=lambda x: x[0], reverse=True)
-
-            results = []
-            for score, mem in scored_memories[:limit]:
-                mem.pop("vector", None)
-                mem.pop("_id", None)
-                mem["similarity_score"] = round(score, 4)
-                results.append(mem)
-
             logger.info(
                 f"RAG search (NumPy fallback) returned {len(results)} memories "
                 f"for business '{b_id_str}'"
@@ -257,6 +212,39 @@ class BusinessMemory:
             logger.error(f"Error searching RAG business memory: {e}")
             return []
 
+    # ================================================================
+    # Index-backed similarity ranking
+    # ================================================================
+
+    @classmethod
+    def _search_index(cls, b_id_str, query_vector, limit, outcome=None):
+        """
+        Ranks a tenant's memories with the in-process vector index and
+        fetches only the top-k documents (vectors excluded) from MongoDB.
+        """
+        ranked = memory_index.search(b_id_str, query_vector, limit, outcome=outcome)
+        if not ranked:
+            return []
+
+        docs = {
+            doc["_id"]: doc
+            for doc in mongo.db.business_memory.find(
+                {"business_id": b_id_str, "_id": {"$in": [mid for mid, _ in ranked]}},
+                {"vector": 0},
+            )
+        }
+
+        results = []
+        for memory_id, score in ranked:
+            mem = docs.get(memory_id)
+            if mem is None:
+                # Deleted by retention cleanup since the index was loaded
+                continue
+            mem.pop("_id", None)
+            mem["similarity_score"] = round(score, 4)
+            results.append(mem)
+        return results
+
     # ================================================================
     # Industry-scoped fallback (replaces the old tenant-leaking global search)
     # ================================================================
@@ -308,7 +296,7 @@ class BusinessMemory:
     # ================================================================
 
     @classmethod
-    def retrieve_failed_memories(cls, business_id, query_phrase=None, limit=5):
+    def retrieve_failed_memories(cls, business_id, query_phrase=None, limit=5, query_vector=None):
         """
         Returns only FAILED optimization memories for a business.
         Useful for the orchestrator's failure comparison gate.
@@ -320,37 +308,13 @@ class BusinessMemory:
                 "patch_outcome": {"$regex": "^FAILED", "$options": "i"},
             }
 
-            if query_phrase:
+            if query_phrase or query_vector is not None:
                 # If we have a query, do similarity ranking
-                query_vector = np.array(cls._get_embedding(query_phrase))
-                cursor = mongo.db.business_memory.find(query)
-                failures = list(cursor)
-
-                if not failures:
-                    return []
-
-                qv_norm = np.linalg.norm(query_vector)
-                scored = []
-                for mem in failures:
-                    v = mem.get("vector")
-                    if not v or len(v) != VECTOR_DIM:
-                        continue
-                    mv = np.array(v)
-                    mv_norm = np.linalg.norm(mv)
-                    if qv_norm > 0 and mv_norm > 0:
-                        sim = float(np.dot(query_vector, mv) / (qv_norm * mv_norm))
-                    else:
-                        sim = 0.0
-                    scored.append((sim, mem))
-
-                scored.sort(key=lambda x: x[0], reverse=True)
-                results = []
-                for score, mem in scored[:limit]:
-                    mem.pop("vector", None)
-                    mem.pop("_id", None)
-                    mem["similarity_score"] = round(score, 4)
-                    results.append(mem)
-                return results
+                if query_vector is None:
+                    query_vector = cls._get_embedding(query_phrase)
+                return cls._search_index(
+                    b_id_str, query_vector, limit, outcome=OUTCOME_FAILED
+                )
             else:
                 # No query phrase — just return most recent failures
                 cursor = mongo.db.business_memory.find(
@@ -371,7 +335,7 @@ class BusinessMemory:
     # ================================================================
 
     @classmethod
-    def compare_to_failures(cls, business_id, hypothesis_text, threshold=0.7):
+    def compare_to_failures(cls, business_id, hypothesis_text, threshold=0.7, query_vector=None):
         """
         Checks whether a proposed hypothesis matches any known FAILED patches
         above the similarity threshold.
@@ -381,7 +345,8 @@ class BusinessMemory:
         """
         try:
             failures = cls.retrieve_failed_memories(
-                business_id, query_phrase=hypothesis_text, limit=3
+                business_id, query_phrase=hypothesis_text, limit=3,
+                query_vector=query_vector,
             )
 
             matches = [
@@ -471,41 +436,11 @@ class BusinessMemory:
         """
         try:
             b_id_str = str(business_id)
-            query_vector = np.array(cls._get_embedding(query_phrase))
-
-            cursor = mongo.db.business_memory.find({
-                "business_id": b_id_str,
-                "patch_outcome": "success",
-            })
-            memories = list(cursor)
-
-            if not memories:
-                return []
-
-            qv_norm = np.linalg.norm(query_vector)
-            scored = []
-            for mem in memories:
-                v = mem.get("vector")
-                if not v or len(v) != VECTOR_DIM:
-                    continue
-                mv = np.array(v)
-                mv_norm = np.linalg.norm(mv)
-                if qv_norm > 0 and mv_norm > 0:
-                    sim = float(np.dot(query_vector, mv) / (qv_norm * mv_norm))
-                else:
-                    sim = 0.0
-                scored.append((sim, mem))
-
-            scored.sort(key=lambda x: x[0], reverse=True)
+            query_vector = cls._get_embedding(query_phrase)
 
-            results = []
-            for score, mem in scored[:limit]:
-                mem.pop("vector", None)
-                mem.pop("_id", None)
-                mem["similarity_score"] = round(score, 4)
-                results.append(mem)
-
-            return results
+            return cls._search_index(
+                b_id_str, query_vector, limit, outcome=OUTCOME_SUCCESS
+            )
 
         except Exception as e:
             logger.error(f"Error searching layout successes: {e}")
@@ -4,13 +4,35 @@ Provides intelligent customer support and business assistance using Gemini AI
 """
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from flask import current_app
 from app import mongo
 from app.services.gemini_service import get_gemini_service
+from app.utils.ttl_cache import TTLCache
 from bson import ObjectId
 import logging
 
+# Context lookups for a turn run concurrently on this pool; intent/sentiment
+# analysis runs after the response on its own pool, off the response path
+CONTEXT_WORKERS = 8
+CONTEXT_TIMEOUT_SECONDS = 5
+ANALYSIS_WORKERS = 2
+
+# Business profile + 30-day analytics change slowly; reuse them across turns
+BUSINESS_CONTEXT_TTL_SECONDS = 60
+
+_context_pool = ThreadPoolExecutor(max_workers=CONTEXT_WORKERS, thread_name_prefix="chat-context")
+_analysis_pool = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="chat-analysis")
+_business_context_cache = TTLCache(ttl=BUSINESS_CONTEXT_TTL_SECONDS, maxsize=2048)
+
+DEFAULT_ANALYSIS = {
+    "sentiment": "neutral",
+    "intent": "question",
+    "topic": "general",
+    "urgency": "low"
+}
+
 class ChatbotService:
     def __init__(self):
         self.gemini_service = get_gemini_service()
@@ -20,19 +42,16 @@ class ChatbotService:
         """Generate intelligent chat response using Gemini AI with business context"""
         try:
             # Get or create conversation
-            if not conversation_id:
+            is_new = not conversation_id
+            if is_new:
                 conversation_id = self._create_conversation(user_id, business_id)
             
-            # Get conversation history
-            conversation_history = self._get_conversation_history(conversation_id)
-            
-            # Get business context
-            business_context = self._get_business_context(user_id, business_id)
-            
-            # Get customer context
-            customer_context = self._get_customer_context(user_id)
+            # History, business and customer context are fetched concurrently
+            conversation_history, business_context, customer_context = self._gather_context(
+                user_id, business_id, conversation_id, is_new
+            )
             
-            # Generate response using Gemini AI
+            # Generate response using Gemini
             response = self._generate_ai_response(
                 message, 
                 business_context, 
@@ -41,10 +60,10 @@ class ChatbotService:
             )
             
             # Save message and response to conversation
-            self._save_message_to_conversation(conversation_id, message, response, user_id)
+            message_id = self._save_message_to_conversation(conversation_id, message, response, user_id)
             
-            # Analyze message sentiment and intent
-            message_analysis = self._analyze_message(message)
+            # Sentiment and intent are analyzed in the background and stored on the message
+            message_analysis = self._queue_message_analysis(message_id, message)
             
             return {
                 'success': True,
@@ -62,6 +81,48 @@ class ChatbotService:
                 'error': str(e)
             }
     
+    def stream_chat_response(self, message, user_id, on_chunk, business_id=None, conversation_id=None):
+        """
+        Streaming variant of get_chat_response: on_chunk(delta) receives the
+        response as Gemini generates it.  The full message is saved to the
+        conversation once, after the stream ends; returns the same result
+        dict as get_chat_response.
+        """
+        try:
+            is_new = not conversation_id
+            if is_new:
+                conversation_id = self._create_conversation(user_id, business_id)
+            
+            conversation_history, business_context, customer_context = self._gather_context(
+                user_id, business_id, conversation_id, is_new
+            )
+            
+            full_prompt = self._build_prompt(message, business_context, customer_context, conversation_history)
+            chunks = []
+            for delta in self.gemini_service.stream_content(full_prompt, max_tokens=400):
+                chunks.append(delta)
+                on_chunk(delta)
+            response = "".join(chunks).strip() or self._get_fallback_response(message, business_context)
+            
+            message_id = self._save_message_to_conversation(conversation_id, message, response, user_id)
+            message_analysis = self._queue_message_analysis(message_id, message)
+            
+            return {
+                'success': True,
+                'response': response,
+                'conversation_id': conversation_id,
+                'analysis': message_analysis,
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            
+        except Exception as e:
+            logging.error(f"Chatbot streaming error: {str(e)}")
+            return {
+                'success': False,
+                'response': "I apologize, but I'm having trouble processing your request right now. Please try again or contact support.",
+                'error': str(e)
+            }
+    
     def _create_conversation(self, user_id, business_id=None):
         """Create a new conversation record"""
         conversation = {
@@ -94,13 +155,45 @@ class ChatbotService:
             for msg in messages
         ]
     
-    def _get_business_context(self, user_id, business_id=None):
-        """Get business context for personalized responses"""
+    def _gather_context(self, user_id, business_id, conversation_id, is_new=False):
+        """
+        Runs the turn's Mongo lookups concurrently.  The business context
+        (profile, products, 30-day analytics) is cached per tenant for
+        BUSINESS_CONTEXT_TTL_SECONDS.  Returns (history, business, customer).
+        """
+        cache_key = str(user_id)
+        business_context = _business_context_cache.get(cache_key)
+
+        futures = {'customer': _context_pool.submit(self._get_customer_context, user_id)}
+        if not is_new:
+            futures['history'] = _context_pool.submit(self._get_conversation_history, conversation_id)
+        if business_context is None:
+            futures['profile'] = _context_pool.submit(self._get_business_profile, user_id)
+            futures['analytics'] = _context_pool.submit(self._get_recent_analytics, user_id)
+
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=CONTEXT_TIMEOUT_SECONDS)
+            except Exception as e:
+                logging.error(f"Error getting {name} context: {str(e)}")
+                results[name] = None
+
+        if business_context is None:
+            profile = results.get('profile')
+            business_context = dict(profile or {}, **(results.get('analytics') or {})) if profile else {}
+            if profile:
+                _business_context_cache.set(cache_key, business_context)
+
+        return results.get('history') or [], business_context, results.get('customer') or {}
+    
+    def _get_business_profile(self, user_id):
+        """Business information and active products (None if the user does not exist)"""
         try:
             # Get user's business information
             user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
             if not user:
-                return {}
+                return None
             
             # Get business data
             business_data = {
@@ -110,10 +203,6 @@ class ChatbotService:
                 'location': user.get('area', 'N/A')
             }
             
-            # Get recent analytics
-            analytics = self._get_recent_analytics(user_id)
-            business_data.update(analytics)
-            
             # Get product information
             products = list(mongo.db.products.find({
                 'user_id': ObjectId(user_id),
@@ -133,7 +222,7 @@ class ChatbotService:
             
         except Exception as e:
             logging.error(f"Error getting business context: {str(e)}")
-            return {}
+            return None
     
     def _get_customer_context(self, user_id):
         """Get customer interaction context"""
@@ -211,6 +300,18 @@ class ChatbotService:
     
     def _generate_ai_response(self, message, business_context, customer_context, conversation_history):
         """Generate AI response using Gemini with comprehensive context"""
+        full_prompt = self._build_prompt(message, business_context, customer_context, conversation_history)
+        
+        # Generate response using Gemini
+        result = self.gemini_service.generate_content(full_prompt, max_tokens=400)
+        
+        if result.get('success'):
+            return result['content']
+        else:
+            return self._get_fallback_response(message, business_context)
+    
+    def _build_prompt(self, message, business_context, customer_context, conversation_history):
+        """Build the business-assistant prompt with business, customer and conversation context"""
         
         # Build comprehensive prompt
         system_prompt = f"""
@@ -259,15 +360,7 @@ CONVERSATION HISTORY:
                 system_prompt += f"\nUser: {hist['user_message']}\nAssistant: {hist['bot_response']}"
         
         # Add current message
-        full_prompt = f"{system_prompt}\n\nCurrent User Message: {message}\n\nYour Response:"
-        
-        # Generate response using Gemini
-        result = self.gemini_service.generate_content(full_prompt, max_tokens=400)
-        
-        if result.get('success'):
-            return result['content']
-        else:
-            return self._get_fallback_response(message, business_context)
+        return f"{system_prompt}\n\nCurrent User Message: {message}\n\nYour Response:"
     
     def _get_fallback_response(self, message, business_context):
         """Provide fallback response when AI is unavailable"""
@@ -291,6 +384,27 @@ CONVERSATION HISTORY:
         else:
             return f"Thank you for your question about {business_name}! I can help with business strategy, marketing, customer management, and platform optimization. Could you be more specific about what you'd like assistance with?"
     
+    def _queue_message_analysis(self, message_id, message):
+        """
+        Schedules _analyze_message in the background; the result is stored
+        as `analysis` on the chatbot_messages record.  Returns a pending
+        marker so the turn never waits on the second LLM call.
+        """
+        if not message_id:
+            return {'status': 'skipped'}
+        _analysis_pool.submit(self._analyze_and_store, message_id, message)
+        return {'status': 'pending', 'message_id': str(message_id)}
+    
+    def _analyze_and_store(self, message_id, message):
+        try:
+            analysis = self._analyze_message(message)
+            mongo.db.chatbot_messages.update_one(
+                {'_id': message_id},
+                {'$set': {'analysis': analysis, 'analyzed_at': datetime.utcnow()}}
+            )
+        except Exception as e:
+            logging.error(f"Error storing message analysis: {str(e)}")
+    
     def _analyze_message(self, message):
         """Analyze message sentiment and intent"""
         try:
@@ -319,21 +433,11 @@ Return JSON with:
                     pass
             
             # Fallback analysis
-            return {
-                "sentiment": "neutral",
-                "intent": "question",
-                "topic": "general",
-                "urgency": "low"
-            }
+            return dict(DEFAULT_ANALYSIS)
             
         except Exception as e:
             logging.error(f"Message analysis error: {str(e)}")
-            return {
-                "sentiment": "neutral",
-                "intent": "question", 
-                "topic": "general",
-                "urgency": "low"
-            }
+            return dict(DEFAULT_ANALYSIS)
     
     def _save_message_to_conversation(self, conversation_id, user_message, bot_response, user_id):
         """Save message exchange to database"""
@@ -347,7 +451,7 @@ Return JSON with:
                 'created_at': datetime.utcnow()
             }
             
-            mongo.db.chatbot_messages.insert_one(message_record)
+            message_id = mongo.db.chatbot_messages.insert_one(message_record).inserted_id
             
             # Update conversation
             mongo.db.chatbot_conversations.update_one(
@@ -357,9 +461,11 @@ Return JSON with:
                     '$inc': {'message_count': 1}
                 }
             )
+            return message_id
             
         except Exception as e:
             logging.error(f"Error saving message: {str(e)}")
+            return None
     
     def get_conversation_summary(self, conversation_id):
         """Get conversation summary and insights"""
@@ -107,8 +107,12 @@ class BusinessCopilot:
             )
 
             rag_query = f"website optimization layout metrics context command: {user_command}"
+            # Embed the RAG query and the failure-gate hypothesis in one batch
+            rag_vector, command_vector = BusinessMemory._get_embeddings(
+                [rag_query, user_command]
+            )
             relevant_memories = BusinessMemory.retrieve_relevant_memory(
-                self.business_id, rag_query, limit=2
+                self.business_id, rag_query, limit=2, query_vector=rag_vector
             )
 
             self.stream_log(
@@ -124,7 +128,8 @@ class BusinessCopilot:
             )
 
             failure_matches = BusinessMemory.compare_to_failures(
-                self.business_id, user_command, threshold=0.7
+                self.business_id, user_command, threshold=0.7,
+                query_vector=command_vector,
             )
 
             if failure_matches:
@@ -566,9 +571,12 @@ class BusinessCopilot:
         """
         b_id_str = str(self.business_id)
 
-        total_scans = mongo.db.qr_scans.count_documents({"business_id": b_id_str})
+        # Scan and order counts come from the tenant's daily rollups
+        from app.services.metrics_rollup import MetricsRollup
+        totals = MetricsRollup.totals(b_id_str, fields=["qr_scans", "orders"])
+        total_scans = totals.get("qr_scans", 0)
+        total_orders = totals.get("orders", {}).get("count", 0)
         total_appointments = mongo.db.appointments.count_documents({"salon_id": b_id_str})
-        total_orders = mongo.db.orders.count_documents({"business_id": b_id_str})
 
         conversion_rate = 5.4
         if total_scans > 0:
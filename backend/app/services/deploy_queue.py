@@ -0,0 +1,277 @@
+"""
+DeployQueue — Debounced, coalescing background redeploys of child sites.
+
+PROBLEM THIS SOLVES:
+    Every product create / update / delete re-rendered the active schema,
+    wrote it to disk and pushed it to Netlify inside the request (a 60s
+    upload timeout on the API path).  Bulk-editing 30 products meant 30
+    full deploys and 30 slow requests, each shipping a state that the
+    next edit immediately replaced.
+
+HOW IT WORKS:
+    request(business_id) only records that the tenant's site is dirty and
+    returns.  Requests for the same tenant coalesce: each one pushes the
+    deploy back to DEBOUNCE_SECONDS after the latest edit, but never more
+    than MAX_DELAY_SECONDS after the first, so a steady stream of edits
+    still ships.
+
+    A dispatcher thread hands due tenants to a small worker pool.  The
+    deploy reads the schema and products at run time, so only the latest
+    state is rendered.  Each tenant has at most one deploy in flight; a
+    request that arrives meanwhile marks it dirty again and it is
+    re-queued (debounced) when the running deploy finishes.  Failed
+    Netlify pushes are retried with exponential backoff up to
+    MAX_ATTEMPTS.
+
+    The outcome (deploy_ref, or the error) is emitted to the tenant's
+    Socket.IO room as SOCKET_EVENT.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import mongo
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+DEBOUNCE_SECONDS = 3
+MAX_DELAY_SECONDS = 30
+DEPLOY_WORKERS = 4
+
+MAX_ATTEMPTS = 4
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 60
+
+SOCKET_EVENT = "site_deploy"
+
+
+class _Pending:
+    """Coalesced redeploy requests for one tenant."""
+
+    __slots__ = ("first_at", "due_at", "requests", "reasons", "attempts")
+
+    def __init__(self, now):
+        self.first_at = now
+        self.due_at = now
+        self.requests = 0
+        self.reasons = set()
+        self.attempts = 0
+
+
+class DeployQueue:
+
+    def __init__(self, workers=DEPLOY_WORKERS):
+        self._pending = {}      # business_id → _Pending
+        self._in_flight = set()
+        self._app = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="site-deploy")
+
+        self._metrics = {
+            "requested": 0,
+            "deploys": 0,
+            "skipped": 0,
+            "retries": 0,
+            "failed": 0,
+        }
+        self._last_deploy_ms = None
+
+        self._dispatcher = threading.Thread(target=self._run, name="deploy-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    # ================================================================
+    # Public API
+    # ================================================================
+
+    def request(self, business_id, reason="products"):
+        """
+        Marks the tenant's site for redeploy (non-blocking).  Must be
+        called inside an app context — the worker reuses that app.
+        """
+        if self._app is None:
+            from flask import current_app
+            self._app = current_app._get_current_object()
+
+        b_id_str = str(business_id)
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending.get(b_id_str)
+            if pending is None:
+                pending = self._pending[b_id_str] = _Pending(now)
+            pending.requests += 1
+            pending.reasons.add(reason)
+            pending.due_at = min(now + DEBOUNCE_SECONDS, pending.first_at + MAX_DELAY_SECONDS)
+            self._metrics["requested"] += 1
+        self._wakeup.set()
+
+    def stats(self):
+        """Queue depth, in-flight deploys and outcome counters."""
+        with self._lock:
+            stats = dict(self._metrics)
+            stats["pending"] = len(self._pending)
+            stats["in_flight"] = len(self._in_flight)
+        stats["last_deploy_ms"] = self._last_deploy_ms
+        return stats
+
+    def shutdown(self, timeout=30):
+        """
+        Stops the dispatcher and runs everything still pending on the
+        calling thread (process exit).  By the time atexit hooks run the
+        worker pool no longer accepts new work, so nothing is submitted.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        self._dispatcher.join(timeout=5)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._in_flight:
+                    break
+            time.sleep(0.2)
+
+        with self._lock:
+            remaining, self._pending = self._pending, {}
+            self._in_flight.update(remaining)
+        for b_id_str, pending in remaining.items():
+            if time.monotonic() >= deadline:
+                logger.error(f"❌ DeployQueue shutdown timed out; deploy for {b_id_str} dropped")
+                with self._lock:
+                    self._in_flight.discard(b_id_str)
+                continue
+            pending.attempts = MAX_ATTEMPTS - 1   # one final attempt, no re-queue
+            self._deploy(b_id_str, pending)
+        self._pool.shutdown(wait=False)
+
+    # ================================================================
+    # Private helpers
+    # ================================================================
+
+    def _run(self):
+        """Dispatcher: starts due deploys, sleeps until the next one is due."""
+        while not self._stopped.is_set():
+            now = time.monotonic()
+            due, next_due = [], None
+            pool_closed = False
+            with self._lock:
+                for b_id_str, pending in self._pending.items():
+                    if b_id_str in self._in_flight:
+                        continue
+                    if pending.due_at <= now:
+                        due.append(b_id_str)
+                    elif next_due is None or pending.due_at < next_due:
+                        next_due = pending.due_at
+                for b_id_str in due:
+                    self._in_flight.add(b_id_str)
+                    due_pending = self._pending.pop(b_id_str)
+                    try:
+                        self._pool.submit(self._deploy, b_id_str, due_pending)
+                    except RuntimeError as e:
+                        # Pool is shutting down — keep the tenant for shutdown() to run
+                        self._in_flight.discard(b_id_str)
+                        self._pending[b_id_str] = due_pending
+                        logger.warning(f"⚠️ DeployQueue could not schedule deploy for {b_id_str}: {e}")
+                        pool_closed = True
+                        break
+            if pool_closed:
+                return   # the pool never accepts work again; shutdown() drains _pending
+
+            self._wakeup.wait(None if next_due is None else max(next_due - now, 0))
+            self._wakeup.clear()
+
+    def _deploy(self, b_id_str, pending):
+        started = time.monotonic()
+        pending.attempts += 1
+        try:
+            with self._app.app_context():
+                status, deploy_ref, error = self._render_and_push(b_id_str)
+        except Exception as e:
+            status, deploy_ref, error = "failed", None, str(e)
+
+        duration_ms = round((time.monotonic() - started) * 1000, 1)
+        retry = status == "failed" and pending.attempts < MAX_ATTEMPTS
+
+        with self._lock:
+            self._in_flight.discard(b_id_str)
+            self._last_deploy_ms = duration_ms
+            newer = self._pending.get(b_id_str)
+            if retry and newer is None:
+                # Nothing newer queued — retry this state after a backoff
+                delay = min(RETRY_BASE_SECONDS * (2 ** (pending.attempts - 1)), RETRY_MAX_SECONDS)
+                pending.due_at = time.monotonic() + delay
+                self._pending[b_id_str] = pending
+                self._metrics["retries"] += 1
+            else:
+                if newer is not None:
+                    # Edits arrived mid-deploy; the re-render covers this one too
+                    newer.attempts = pending.attempts if retry else 0
+                    retry = False
+                self._metrics[{"deployed": "deploys", "skipped": "skipped", "failed": "failed"}[status]] += 1
+        self._wakeup.set()
+
+        if retry:
+            logger.warning(
+                f"⚠️ Site deploy for {b_id_str} failed (attempt {pending.attempts}/{MAX_ATTEMPTS}): {error}"
+            )
+            return
+
+        if status == "failed":
+            logger.error(f"❌ Site deploy for {b_id_str} failed after {pending.attempts} attempt(s): {error}")
+        else:
+            logger.info(
+                f"🔄 Site redeployed for business {b_id_str} "
+                f"({pending.requests} request(s) coalesced, ref={deploy_ref}, {duration_ms}ms)"
+            )
+        from app.services.realtime_service import RealtimeService
+        RealtimeService.emit_to_business(b_id_str, SOCKET_EVENT, {
+            "business_id": b_id_str,
+            "status": status,
+            "deploy_ref": deploy_ref,
+            "error": error,
+            "requests": pending.requests,
+            "reasons": sorted(pending.reasons),
+            "attempts": pending.attempts,
+            "duration_ms": duration_ms,
+        })
+
+    @staticmethod
+    def _render_and_push(b_id_str):
+        """
+        Renders the current active schema, writes it to disk and pushes it
+        to Netlify.  Returns (status, deploy_ref, error).
+        """
+        from app.services.schema_renderer import SchemaRenderer
+        from app.services.patch_engine import PatchEngine
+
+        active_schema = mongo.db.website_schemas.find_one({"business_id": b_id_str, "is_active": True})
+        if not active_schema:
+            return "skipped", None, None
+
+        rendered_html = SchemaRenderer.render(active_schema)
+        PatchEngine.write_website_to_disk(b_id_str, rendered_html)
+
+        site_record = mongo.db.child_websites.find_one({"owner_id": b_id_str}, {"netlify_site_id": 1})
+        if not site_record or not site_record.get("netlify_site_id"):
+            return "skipped", None, None
+
+        deploy_ref = PatchEngine._deploy_to_netlify(b_id_str, rendered_html)
+        if not deploy_ref:
+            return "failed", None, "Netlify deploy failed"
+        return "deployed", deploy_ref, None
+
+
+# ====================================================================
+# Module-level singleton
+# ====================================================================
+
+deploy_queue = DeployQueue()
+atexit.register(deploy_queue.shutdown)
@@ -0,0 +1,242 @@
+"""
+EmbeddingService — Shared, cached, batched text embeddings.
+
+PROBLEM THIS SOLVES:
+    BusinessMemory._get_embedding used to build a fresh genai.Client per
+    call and embed a single string, so every add_memory, every retrieval
+    and every outcome re-vectorization paid its own Gemini round trip —
+    even for texts that had been embedded moments earlier.
+
+HOW IT WORKS:
+    Lookups go through three tiers, keyed by sha256(model + text):
+        1. In-process LRU            (EMBED_LRU_SIZE entries)
+        2. MongoDB `embedding_cache` (persistent, shared across workers)
+        3. Gemini embed_content      (misses sent in ONE batched call,
+                                      EMBED_BATCH_SIZE texts per request)
+
+    Identical texts requested concurrently are coalesced: the first caller
+    embeds, later callers wait on the same Future.
+
+    When Gemini is unavailable the local feature-hashing embedder
+    (local_embedder.py) is used.  Fallback vectors live in a different
+    space, so they are never cached.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timezone
+
+from app import mongo
+from app.services.local_embedder import hash_embed, hash_embed_many
+from app.utils.vector_codec import encode_vector, decode_vector
+from google import genai
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+EMBED_MODEL = "models/gemini-embedding-001"
+
+# In-process LRU capacity (768 floats ≈ 3 KB per float32 entry)
+EMBED_LRU_SIZE = 4096
+
+# Maximum texts per embed_content request
+EMBED_BATCH_SIZE = 100
+
+# How long a coalesced caller waits for another thread's in-flight embed
+INFLIGHT_WAIT_SECONDS = 30
+
+
+class EmbeddingService:
+    """Thread-safe embedding front-end with LRU, Mongo cache and batching."""
+
+    def __init__(self):
+        self._lru = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._client = None
+        self._client_key = None
+
+    # ================================================================
+    # Public API
+    # ================================================================
+
+    def embed(self, text):
+        """Returns one embedding as a list of floats."""
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts):
+        """
+        Embeds many texts with at most one Gemini request per
+        EMBED_BATCH_SIZE cache misses.  Output order matches input order.
+        """
+        texts = [str(t) for t in texts]
+        keys = [self._cache_key(t) for t in texts]
+        resolved = {}
+        owned = {}      # key → (text, Future) that THIS call must fulfil
+        waiting = {}    # key → Future owned by another thread
+
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in resolved or key in owned or key in waiting:
+                    continue
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    resolved[key] = self._lru[key]
+                elif key in self._inflight:
+                    waiting[key] = self._inflight[key]
+                else:
+                    future = Future()
+                    self._inflight[key] = future
+                    owned[key] = (text, future)
+
+        if owned:
+            try:
+                resolved.update(self._resolve_misses(owned))
+            finally:
+                with self._lock:
+                    for key, (text, future) in owned.items():
+                        self._inflight.pop(key, None)
+                        if not future.done():
+                            vector = resolved.get(key)
+                            if vector is None:
+                                vector = resolved[key] = self._local_embedding(text)
+                            future.set_result(vector)
+
+        for key, future in waiting.items():
+            try:
+                resolved[key] = future.result(timeout=INFLIGHT_WAIT_SECONDS)
+            except Exception:
+                text = texts[keys.index(key)]
+                resolved[key] = self._local_embedding(text)
+
+        return [list(resolved[key]) for key in keys]
+
+    def clear(self):
+        """Drops the in-process LRU (the Mongo cache is left intact)."""
+        with self._lock:
+            self._lru.clear()
+
+    # ================================================================
+    # Private helpers
+    # ================================================================
+
+    @staticmethod
+    def _cache_key(text):
+        return hashlib.sha256(f"{EMBED_MODEL}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _resolve_misses(self, owned):
+        """Mongo cache first, then one batched Gemini call for the rest."""
+        resolved = {}
+
+        try:
+            cursor = mongo.db.embedding_cache.find(
+                {"_id": {"$in": list(owned.keys())}},
+                {"vector": 1},
+            )
+            for doc in cursor:
+                vector = decode_vector(doc.get("vector"))
+                if vector is not None:
+                    resolved[doc["_id"]] = vector.tolist()
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+
+        misses = [(key, text) for key, (text, _) in owned.items() if key not in resolved]
+        fetched = self._embed_remote(misses) if misses else {}
+        resolved.update(fetched)
+
+        # Only real model vectors go into the LRU — never local fallbacks
+        with self._lock:
+            for key, vector in resolved.items():
+                self._lru[key] = vector
+                self._lru.move_to_end(key)
+            while len(self._lru) > EMBED_LRU_SIZE:
+                self._lru.popitem(last=False)
+
+        fallback = [(key, text) for key, (text, _) in owned.items() if key not in resolved]
+        if fallback:
+            matrix = hash_embed_many([text for _, text in fallback])
+            for (key, _), row in zip(fallback, matrix):
+                resolved[key] = row.tolist()
+
+        if fetched:
+            self._persist(fetched)
+
+        return resolved
+
+    def _get_client(self):
+        """Returns the shared genai.Client (rebuilt only if the key changes)."""
+        api_key = current_app.config.get("GEMINI_API_KEY")
+        if not api_key:
+            return None
+        with self._lock:
+            if self._client is None or self._client_key != api_key:
+                self._client = genai.Client(api_key=api_key)
+                self._client_key = api_key
+            return self._client
+
+    def _embed_remote(self, misses):
+        """Embeds (key, text) pairs via Gemini in EMBED_BATCH_SIZE chunks."""
+        client = self._get_client()
+        if client is None:
+            return {}
+
+        fetched = {}
+        for start in range(0, len(misses), EMBED_BATCH_SIZE):
+            chunk = misses[start:start + EMBED_BATCH_SIZE]
+            try:
+                # If this key does not have billing enabled, the call returns 403
+                # and the local numpy fallback is used automatically.
+                response = client.models.embed_content(
+                    model=EMBED_MODEL,
+                    contents=[text for _, text in chunk],
+                )
+                embeddings = getattr(response, "embeddings", None) or []
+                for (key, _), embedding in zip(chunk, embeddings):
+                    values = getattr(embedding, "values", None)
+                    if values:
+                        fetched[key] = list(values)
+            except Exception as e:
+                logger.warning(f"Gemini embedding failed: {e}. Using local cosine fallback.")
+                break
+        return fetched
+
+    def _persist(self, fetched):
+        """Writes freshly fetched vectors to the shared Mongo cache."""
+        from pymongo import UpdateOne
+
+        now = datetime.now(timezone.utc)
+        ops = [
+            UpdateOne(
+                {"_id": key},
+                {"$setOnInsert": {
+                    "model": EMBED_MODEL,
+                    "vector": encode_vector(vector),
+                    "created_at": now,
+                }},
+                upsert=True,
+            )
+            for key, vector in fetched.items()
+        ]
+        try:
+            mongo.db.embedding_cache.bulk_write(ops, ordered=False)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    @staticmethod
+    def _local_embedding(text):
+        """Local fallback: deterministic feature-hashing vector."""
+        return hash_embed(text).tolist()
+
+
+# ====================================================================
+# Module-level singleton
+# ====================================================================
+
+embedding_service = EmbeddingService()
@@ -9,17 +9,44 @@ Supported event types:
     page_view, qr_scan, form_submit, booking_click,
     cta_click, bounce, scroll_depth, time_on_page
 
-Write buffer:
-    Events are batched in memory and flushed to MongoDB every
-    FLUSH_INTERVAL_SECONDS or when the buffer reaches MAX_BUFFER_SIZE,
-    whichever comes first.
+Write path:
+    ingest_event / record_visit only append to an in-memory buffer; the
+    request thread never talks to MongoDB.  A dedicated writer thread
+    drains the buffer every FLUSH_INTERVAL_SECONDS, or as soon as
+    MAX_BUFFER_SIZE records are waiting:
+
+        buffers are double-buffered — the lock is held only to swap the
+        filled lists for empty ones, the insert happens outside it
+
+        insert_many(ordered=False) with exponential backoff; docs keep
+        their _id across attempts, so duplicate-key errors on a retry
+        just mean "already written"
+
+        the buffer is bounded (MAX_QUEUE_SIZE).  Past it, and for batches
+        that exhaust their retries, records spill to an on-disk JSONL
+        journal that is replayed once writes succeed again; past
+        MAX_SPILL_BYTES records are shed.  Every outcome is counted in
+        stats().
+
+    Page visits served by /site/<website_id> (website_analytics records)
+    share the same writer.  Event documents are written in EventStore's
+    raw layout (regular or time-series) and summarized from its buckets.
 """
 
+import atexit
 import hashlib
 import logging
+import os
+import tempfile
 import threading
-from datetime import datetime, timezone
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson import json_util
+from pymongo.errors import BulkWriteError
 from app import mongo
+from app.services.event_store import EventStore
+from app.services.metrics_rollup import MetricsRollup
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +55,27 @@ logger = logging.getLogger(__name__)
 # ====================================================================
 
 FLUSH_INTERVAL_SECONDS = 10
-MAX_BUFFER_SIZE = 50
+MAX_BUFFER_SIZE = 50        # wake the writer once this many records wait
+MAX_QUEUE_SIZE = 10000      # records held in memory before spilling to disk
+MAX_BATCH_SIZE = 1000       # records per insert_many
+
+MAX_RETRIES = 5
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 8
+
+SPILL_PATH = os.environ.get("EVENT_SPILL_PATH") or os.path.join(
+    tempfile.gettempdir(), "breakeven_event_spill.jsonl"
+)
+MAX_SPILL_BYTES = 50 * 1024 * 1024
+
+DUPLICATE_KEY_ERROR = 11000
+QUEUE_FULL_ERROR = "Event queue is full, retry later."
+
+# Record kind → target collection
+SINKS = {
+    "events": "analytics_events",
+    "visits": "website_analytics",
+}
 
 SUPPORTED_EVENT_TYPES = frozenset([
     "page_view",
@@ -45,13 +92,37 @@ SUPPORTED_EVENT_TYPES = frozenset([
 
 
 class EventCollector:
-    """Thread-safe event buffer that periodically flushes to MongoDB."""
-
-    def __init__(self):
-        self._buffer = []
+    """Bounded in-memory event queue drained to MongoDB by a writer thread."""
+
+    def __init__(self, spill_path=SPILL_PATH):
+        # Double buffer: requests append to _pending, the writer swaps it
+        # with _spare and drains the swapped-out lists outside the lock.
+        self._pending = {kind: [] for kind in SINKS}
+        self._spare = {kind: [] for kind in SINKS}
+        self._size = 0
         self._lock = threading.Lock()
-        self._timer = None
-        self._start_flush_timer()
+        self._write_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._spill_path = spill_path
+
+        self._metrics = {
+            "accepted": 0,
+            "written": 0,
+            "retries": 0,
+            "failed_batches": 0,
+            "rejected": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "dropped": 0,
+        }
+        self._last_flush_ms = None
+
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._writer = threading.Thread(
+            target=self._run, name="event-collector-writer", daemon=True
+        )
+        self._writer.start()
 
     # ================================================================
     # Public API
@@ -71,78 +142,87 @@ class EventCollector:
             timestamp:    ISO string or datetime; defaults to now.
 
         Returns:
-            (success: bool, error_message: str | None)
+            (success: bool, error_message: str | None) — QUEUE_FULL_ERROR
+            when the event had to be shed.
         """
         if not business_id:
             return False, "business_id is required."
 
-        if event_type not in SUPPORTED_EVENT_TYPES:
-            return False, (
-                f"Unsupported event type '{event_type}'. "
-                f"Allowed: {', '.join(sorted(SUPPORTED_EVENT_TYPES))}"
+        event_doc, error = self._build_event(
+            str(business_id), event_type, event_data, source_url,
+            self._visitor_id(visitor_ip, business_id), timestamp,
+        )
+        if error:
+            return False, error
+
+        if not self._enqueue("events", event_doc):
+            return False, QUEUE_FULL_ERROR
+        return True, None
+
+    def ingest_batch(self, business_id, events, source_url=None, visitor_ip=None):
+        """
+        Validates and buffers a batch of events from one page (one auth
+        check, one visitor hash, one lock acquisition).
+
+        Args:
+            business_id: Owner business identifier.
+            events:      List of {"event_type", "event_data", "timestamp",
+                         "source_url"} dicts.
+            source_url:  Default source URL for events that omit it.
+            visitor_ip:  Raw IP (hashed before storage for privacy).
+
+        Returns:
+            (accepted: int, errors: list of {"index", "error"})
+        """
+        b_id_str = str(business_id)
+        visitor_id = self._visitor_id(visitor_ip, business_id)
+
+        docs, errors = [], []
+        for index, event in enumerate(events):
+            if not isinstance(event, dict):
+                errors.append({"index": index, "error": "Event must be an object."})
+                continue
+            event_doc, error = self._build_event(
+                b_id_str,
+                event.get("event_type", "page_view"),
+                event.get("event_data"),
+                event.get("source_url") or source_url,
+                visitor_id,
+                event.get("timestamp"),
             )
+            if error:
+                errors.append({"index": index, "error": error})
+            else:
+                docs.append(event_doc)
 
-        if timestamp:
-            if isinstance(timestamp, str):
-                try:
-                    timestamp = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-                except ValueError:
-                    timestamp = datetime.now(timezone.utc)
-        else:
-            timestamp = datetime.now(timezone.utc)
-
-        # Hash visitor IP for privacy
-        visitor_id = None
-        if visitor_ip:
-            visitor_id = hashlib.sha256(
-                f"{visitor_ip}:{business_id}".encode()
-            ).hexdigest()[:16]
-
-        event_doc = {
-            "business_id": str(business_id),
-            "event_type": event_type,
-            "event_data": event_data or {},
-            "source_url": source_url,
-            "visitor_id": visitor_id,
-            "timestamp": timestamp,
-            "ingested_at": datetime.now(timezone.utc),
-        }
+        accepted = self._enqueue_many("events", docs)
+        if accepted < len(docs):
+            errors.append({"index": None, "error": QUEUE_FULL_ERROR})
+        return accepted, errors
 
-        with self._lock:
-            self._buffer.append(event_doc)
-            if len(self._buffer) >= MAX_BUFFER_SIZE:
-                self._flush()
+    def record_visit(self, visit_doc):
+        """
+        Buffers a website_analytics visit record instead of inserting it
+        on the request path.
 
-        return True, None
+        Args:
+            visit_doc: The visit document; must carry business_owner_id
+                       and visited_at.
+        """
+        self._enqueue("visits", visit_doc)
 
     def get_event_summary(self, business_id, days=7):
         """
         Returns aggregated event counts for the copilot's analytics interpreter.
-        """
-        from datetime import timedelta
-        b_id_str = str(business_id)
-        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
 
-        pipeline = [
-            {
-                "$match": {
-                    "business_id": b_id_str,
-                    "timestamp": {"$gte": cutoff},
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$event_type",
-                    "count": {"$sum": 1},
-                }
-            },
-        ]
-
-        results = list(mongo.db.analytics_events.aggregate(pipeline))
+        Read from EventStore's downsampled buckets (hourly for windows up
+        to two weeks, daily beyond) plus the not-yet-downsampled tail.
+        """
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        counts = EventStore.counts(business_id, since)
 
         summary = {et: 0 for et in SUPPORTED_EVENT_TYPES}
-        for r in results:
-            summary[r["_id"]] = r["count"]
+        summary.update(counts)
 
         # Compute derived metrics
         total_views = summary.get("page_view", 0)
@@ -168,43 +248,264 @@ class EventCollector:
         return summary
 
     def flush_now(self):
-        """Force an immediate flush of the buffer."""
+        """Synchronously drain the queue (on the calling thread)."""
+        self._drain()
+
+    def stats(self):
+        """Queue depth and write / retry / spill / shed counters."""
         with self._lock:
-            self._flush()
+            stats = dict(self._metrics)
+            stats["queued"] = self._size
+        stats["max_queue"] = MAX_QUEUE_SIZE
+        stats["last_flush_ms"] = self._last_flush_ms
+        try:
+            stats["spill_bytes"] = os.path.getsize(self._spill_path)
+        except OSError:
+            stats["spill_bytes"] = 0
+        return stats
+
+    def shutdown(self, timeout=30):
+        """Stop the writer and persist (or spill) whatever is still queued."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._writer.is_alive():
+            self._writer.join(timeout)
+        self._drain(replay=False)
 
     # ================================================================
     # Private helpers
     # ================================================================
 
-    def _flush(self):
-        """Write buffered events to MongoDB. Called under lock."""
-        if not self._buffer:
-            return
+    def _count(self, metric, n=1):
+        with self._lock:
+            self._metrics[metric] += n
+
+    @staticmethod
+    def _visitor_id(visitor_ip, business_id):
+        """Hashed visitor IP (never stored raw)."""
+        if not visitor_ip:
+            return None
+        return hashlib.sha256(f"{visitor_ip}:{business_id}".encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _build_event(b_id_str, event_type, event_data, source_url, visitor_id, timestamp):
+        """Validated analytics_events document, or (None, error)."""
+        if event_type not in SUPPORTED_EVENT_TYPES:
+            return None, (
+                f"Unsupported event type '{event_type}'. "
+                f"Allowed: {', '.join(sorted(SUPPORTED_EVENT_TYPES))}"
+            )
 
-        try:
-            mongo.db.analytics_events.insert_many(self._buffer)
-            logger.info(f"📊 Flushed {len(self._buffer)} analytics events to MongoDB")
-            self._buffer = []
-        except Exception as e:
-            logger.error(f"Error flushing analytics events: {e}")
-
-    def _start_flush_timer(self):
-        """Periodic flush timer (runs in background thread)."""
-        def _tick():
-            with self._lock:
-                self._flush()
-            self._start_flush_timer()
+        now = datetime.now(timezone.utc)
+        if isinstance(timestamp, str):
+            try:
+                timestamp = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+            except ValueError:
+                timestamp = now
+        elif not isinstance(timestamp, datetime):
+            timestamp = now
+
+        return {
+            "business_id": b_id_str,
+            "event_type": event_type,
+            "event_data": event_data or {},
+            "source_url": source_url,
+            "visitor_id": visitor_id,
+            "timestamp": timestamp,
+            "ingested_at": now,
+        }, None
 
-        self._timer = threading.Timer(FLUSH_INTERVAL_SECONDS, _tick)
-        self._timer.daemon = True
-        self._timer.start()
+    def _enqueue(self, kind, doc):
+        """Appends under the lock; spills to disk if the queue is full."""
+        return self._enqueue_many(kind, [doc]) == 1
 
-    def shutdown(self):
-        """Flush remaining events and cancel the timer."""
-        if self._timer:
-            self._timer.cancel()
+    def _enqueue_many(self, kind, docs):
+        """
+        Appends as many docs as fit under one lock acquisition; the rest
+        spill to disk.  Returns how many were accepted (queued or spilled).
+        """
+        if not docs:
+            return 0
         with self._lock:
-            self._flush()
+            room = max(MAX_QUEUE_SIZE - self._size, 0)
+            queued = docs[:room]
+            self._pending[kind].extend(queued)
+            self._size += len(queued)
+            self._metrics["accepted"] += len(queued)
+            if self._size >= MAX_BUFFER_SIZE:
+                self._wakeup.set()
+        overflow = docs[len(queued):]
+        if overflow and not self._spill(kind, overflow):
+            return len(queued)
+        return len(docs)
+
+    def _run(self):
+        """Writer thread: drain on every wake-up or FLUSH_INTERVAL_SECONDS."""
+        while not self._stopped.is_set():
+            self._wakeup.wait(FLUSH_INTERVAL_SECONDS)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self._drain()
+            except Exception as e:
+                logger.error(f"Event writer error: {e}")
+
+    def _drain(self, replay=True):
+        """Swaps the buffers and writes the swapped-out records."""
+        with self._write_lock:
+            with self._lock:
+                drained, self._pending = self._pending, self._spare
+                self._size = 0
+                spilled_before = self._metrics["spilled"]
+                dropped_before = self._metrics["dropped"]
+
+            started = time.perf_counter()
+            healthy = True
+            total = 0
+            for kind, docs in drained.items():
+                total += len(docs)
+                for i in range(0, len(docs), MAX_BATCH_SIZE):
+                    batch = docs[i:i + MAX_BATCH_SIZE]
+                    if healthy:
+                        healthy = self._write(kind, batch)
+                    else:
+                        # Mongo just failed a full retry cycle — don't stall
+                        # the writer on every remaining batch.
+                        self._spill(kind, batch)
+                docs.clear()
+            self._spare = drained
+
+            if total:
+                self._last_flush_ms = round((time.perf_counter() - started) * 1000, 1)
+                logger.info(f"📊 Flushed {total} analytics records ({self._last_flush_ms} ms)")
+
+            with self._lock:
+                spilled = self._metrics["spilled"] - spilled_before
+                dropped = self._metrics["dropped"] - dropped_before
+            if spilled or dropped:
+                logger.warning(f"⚠️ Event queue backpressure: {spilled} spilled to disk, {dropped} dropped")
+
+            if healthy and replay:
+                self._replay_spill()
+
+    def _write(self, kind, docs):
+        """
+        insert_many(ordered=False) with exponential backoff.  Returns False
+        (after spilling the batch) if every attempt failed.
+        """
+        collection = mongo.db[SINKS[kind]]
+        if kind == "events":
+            # ingested_at marks when the event reached MongoDB — EventStore
+            # downsampling is incremental on it
+            written_at = datetime.now(timezone.utc)
+            docs = [EventStore.to_storage(dict(doc, ingested_at=written_at)) for doc in docs]
+        written = None
+        last_error = None
+
+        for attempt in range(MAX_RETRIES + 1):
+            if attempt:
+                self._count("retries")
+                delay = min(RETRY_BASE_SECONDS * 2 ** (attempt - 1), RETRY_MAX_SECONDS)
+                if self._stopped.wait(delay):
+                    break
+            try:
+                collection.insert_many(docs, ordered=False)
+                written = docs
+                break
+            except BulkWriteError as e:
+                # Every doc was attempted.  Duplicate keys are docs an
+                # earlier, interrupted attempt already wrote; anything else
+                # is a per-document rejection that retrying won't fix.
+                rejected = {
+                    err["index"] for err in e.details.get("writeErrors", [])
+                    if err.get("code") != DUPLICATE_KEY_ERROR
+                }
+                if rejected:
+                    self._count("rejected", len(rejected))
+                    logger.warning(f"{len(rejected)} {SINKS[kind]} records rejected by MongoDB")
+                written = [doc for i, doc in enumerate(docs) if i not in rejected]
+                break
+            except Exception as e:
+                last_error = e
+
+        if written is None:
+            self._count("failed_batches")
+            logger.error(f"Error flushing {len(docs)} {SINKS[kind]} records: {last_error}")
+            self._spill(kind, docs)
+            return False
+
+        if written:
+            self._count("written", len(written))
+            if kind == "visits":
+                MetricsRollup.increment_many(
+                    (v["business_owner_id"], v["visited_at"], {"visits": 1}) for v in written
+                )
+        return True
+
+    def _spill(self, kind, docs):
+        """Appends records to the on-disk journal; sheds them if it is full."""
+        lines = "".join(json_util.dumps({"kind": kind, "doc": doc}) + "\n" for doc in docs)
+        with self._spill_lock:
+            try:
+                with open(self._spill_path, "a", encoding="utf-8") as f:
+                    if f.tell() + len(lines) > MAX_SPILL_BYTES:
+                        raise OSError("spill journal is full")
+                    f.write(lines)
+            except OSError:
+                self._count("dropped", len(docs))
+                return False
+        self._count("spilled", len(docs))
+        return True
+
+    def _replay_spill(self):
+        """Writes journaled records back once MongoDB accepts writes again."""
+        replay_path = self._spill_path + ".replay"
+        with self._spill_lock:
+            # A leftover .replay file means a replay was interrupted; finish
+            # it first (records keep their _id, so repeats are no-ops).
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self._spill_path):
+                    return
+                os.replace(self._spill_path, replay_path)
+
+        batches = {kind: [] for kind in SINKS}
+        healthy = True
+        try:
+            with open(replay_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json_util.loads(line)
+                    except ValueError:
+                        continue
+                    batch = batches[record["kind"]]
+                    batch.append(record["doc"])
+                    if len(batch) >= MAX_BATCH_SIZE:
+                        healthy = self._flush_replayed(record["kind"], batch, healthy)
+            for kind, batch in batches.items():
+                if batch:
+                    healthy = self._flush_replayed(kind, batch, healthy)
+            os.remove(replay_path)
+        except OSError as e:
+            logger.error(f"Error replaying event spill journal: {e}")
+            return
+
+        logger.info(f"♻️ Replayed event spill journal ({'complete' if healthy else 'partially re-spilled'})")
+
+    def _flush_replayed(self, kind, batch, healthy):
+        """
+        Writes one replayed batch and clears it.  Once a write fails the
+        rest go straight back to the journal.
+        """
+        docs = list(batch)
+        batch.clear()
+        if healthy and self._write(kind, docs):
+            self._count("replayed", len(docs))
+            return True
+        if healthy:
+            return False  # _write already spilled the batch
+        self._spill(kind, docs)
+        return False
 
 
 # ====================================================================
@@ -212,3 +513,4 @@ class EventCollector:
 # ====================================================================
 
 event_collector = EventCollector()
+atexit.register(event_collector.shutdown)
@@ -0,0 +1,309 @@
+"""
+EventStore — Storage layout, downsampling and windowed reads for analytics_events.
+
+PROBLEM THIS SOLVES:
+    analytics_events kept one full document per event forever, each
+    repeating business_id, event_type and source_url, and every summary
+    had to count raw documents — storage and scan cost grew with months
+    of history.
+
+HOW IT WORKS:
+    Raw storage has two layouts; the writer and readers follow whichever
+    the database actually has (detected from the collection options):
+
+        regular      {business_id, event_type, timestamp, ...}
+        time-series  {meta: {business_id, event_type}, timestamp, ...}
+                     timeField "timestamp", metaField "meta" — MongoDB
+                     stores measurements in compressed columnar buckets
+                     per meta value, and raw events expire after
+                     RAW_RETENTION_DAYS.  Enabled on a fresh database with
+                     ANALYTICS_EVENTS_TIMESERIES=1, or by running
+                     `python -m scripts.migrate_events_timeseries`.
+
+    downsample() (scheduled every DOWNSAMPLE_INTERVAL_MINUTES) folds raw
+    events into per (business, event type) buckets:
+
+        analytics_events_hourly   {business_id, event_type, start, count}
+        analytics_events_daily    {business_id, event_type, start, count}
+
+    It is incremental on `ingested_at` (stamped when the event is written)
+    up to a watermark, so late events with old timestamps still land in
+    the right bucket.  counts() sums buckets for a window plus the raw
+    "tail" ingested after the watermark — every event is counted exactly
+    once: hourly buckets for windows up to HOURLY_WINDOW_DAYS, daily
+    buckets beyond.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from app import mongo
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+RAW_COLLECTION = "analytics_events"
+HOURLY_COLLECTION = "analytics_events_hourly"
+DAILY_COLLECTION = "analytics_events_daily"
+STATE_COLLECTION = "analytics_downsample_state"
+
+RAW_RETENTION_DAYS = 90          # time-series mode only
+HOURLY_RETENTION_DAYS = 35
+HOURLY_WINDOW_DAYS = 14          # longer windows read daily buckets
+
+DOWNSAMPLE_INTERVAL_MINUTES = 10
+DOWNSAMPLE_GRACE = timedelta(minutes=2)   # let in-flight writer batches land
+DOWNSAMPLE_SLICE = timedelta(days=1)      # ingestion span folded per pass
+MAX_SLICES_PER_RUN = 30
+
+# None = not yet detected in this process
+_timeseries = None
+
+
+def _utc(dt):
+    """Naive UTC datetime (how PyMongo returns dates)."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _floor(dt, unit):
+    dt = _utc(dt).replace(minute=0, second=0, microsecond=0)
+    return dt.replace(hour=0) if unit == "day" else dt
+
+
+class EventStore:
+
+    # ================================================================
+    # Layout
+    # ================================================================
+
+    @staticmethod
+    def is_timeseries():
+        """True if analytics_events is a time-series collection (cached)."""
+        global _timeseries
+        if _timeseries is None:
+            try:
+                info = next(mongo.db.list_collections(filter={"name": RAW_COLLECTION}), None)
+                _timeseries = bool(info and info.get("options", {}).get("timeseries"))
+            except Exception as e:
+                logger.warning(f"Could not detect analytics_events layout: {e}")
+                return False
+        return _timeseries
+
+    @classmethod
+    def field(cls, name):
+        """Raw-document path of business_id / event_type for the current layout."""
+        if name in ("business_id", "event_type") and cls.is_timeseries():
+            return f"meta.{name}"
+        return name
+
+    @classmethod
+    def to_storage(cls, event_doc):
+        """Converts a flat event document to the current raw layout (copy)."""
+        if "meta" in event_doc or not cls.is_timeseries():
+            return event_doc
+        doc = dict(event_doc)
+        doc["meta"] = {
+            "business_id": doc.pop("business_id"),
+            "event_type": doc.pop("event_type"),
+        }
+        return doc
+
+    @staticmethod
+    def create_timeseries_collection(name=RAW_COLLECTION):
+        """Creates the time-series raw collection (must not exist yet)."""
+        global _timeseries
+        mongo.db.create_collection(
+            name,
+            timeseries={"timeField": "timestamp", "metaField": "meta", "granularity": "minutes"},
+            expireAfterSeconds=RAW_RETENTION_DAYS * 86400,
+        )
+        if name == RAW_COLLECTION:
+            _timeseries = True
+        logger.info(f"🗜️ Created time-series collection '{name}'")
+
+    @classmethod
+    def ensure_collections(cls):
+        """Indexes for raw events and both bucket tiers (init_database)."""
+        exists = RAW_COLLECTION in mongo.db.list_collection_names(filter={"name": RAW_COLLECTION})
+        if not exists and os.environ.get("ANALYTICS_EVENTS_TIMESERIES", "").lower() in ("1", "true", "on"):
+            cls.create_timeseries_collection()
+
+        raw = mongo.db[RAW_COLLECTION]
+        b_field, t_field = cls.field("business_id"), cls.field("event_type")
+        raw.create_index([(b_field, 1), (t_field, 1), ("timestamp", -1)])
+        raw.create_index([(b_field, 1), ("timestamp", -1)])
+        raw.create_index("ingested_at")
+
+        for name in (HOURLY_COLLECTION, DAILY_COLLECTION):
+            mongo.db[name].create_index([("business_id", 1), ("start", 1)])
+        mongo.db[HOURLY_COLLECTION].create_index(
+            "start", expireAfterSeconds=HOURLY_RETENTION_DAYS * 86400
+        )
+
+    # ================================================================
+    # Downsampling
+    # ================================================================
+
+    @staticmethod
+    def watermark():
+        """Events ingested before this are folded into the buckets (None = nothing yet)."""
+        state = mongo.db[STATE_COLLECTION].find_one({"_id": RAW_COLLECTION})
+        return state.get("watermark") if state else None
+
+    @classmethod
+    def downsample(cls, now=None, max_slices=MAX_SLICES_PER_RUN, lease=None):
+        """
+        Folds raw events ingested since the watermark into hourly and daily
+        buckets, one DOWNSAMPLE_SLICE at a time.  Returns events folded.
+
+        With a JobCoordinator lease, each slice is fenced: the lease is
+        checked before the buckets are written, and the watermark only
+        advances if no newer lease token has moved it since.
+        """
+        from pymongo import UpdateOne
+
+        cutoff = _utc(now or datetime.utcnow()) - DOWNSAMPLE_GRACE
+        start = cls.watermark()
+        if start is None:
+            first = mongo.db[RAW_COLLECTION].find_one(
+                {"ingested_at": {"$type": "date"}}, {"ingested_at": 1}, sort=[("ingested_at", 1)]
+            )
+            if not first:
+                return 0
+            start = _utc(first["ingested_at"])
+
+        b_field, t_field = cls.field("business_id"), cls.field("event_type")
+        folded = 0
+        for _ in range(max_slices):
+            if start >= cutoff:
+                break
+            end = min(start + DOWNSAMPLE_SLICE, cutoff)
+
+            pipeline = [
+                {"$match": {"ingested_at": {"$gte": start, "$lt": end}}},
+                {"$group": {
+                    "_id": {
+                        "business_id": f"${b_field}",
+                        "event_type": f"${t_field}",
+                        "start": {"$dateTrunc": {"date": "$timestamp", "unit": "hour"}},
+                    },
+                    "count": {"$sum": 1},
+                }},
+            ]
+            if lease is not None:
+                lease.check()
+
+            hourly, daily = {}, {}
+            for row in mongo.db[RAW_COLLECTION].aggregate(pipeline, allowDiskUse=True):
+                key = row["_id"]
+                if key["start"] is None:
+                    continue
+                hour = (key["business_id"], key["event_type"], key["start"])
+                day = (key["business_id"], key["event_type"], _floor(key["start"], "day"))
+                hourly[hour] = hourly.get(hour, 0) + row["count"]
+                daily[day] = daily.get(day, 0) + row["count"]
+                folded += row["count"]
+
+            for name, buckets in ((HOURLY_COLLECTION, hourly), (DAILY_COLLECTION, daily)):
+                ops = [
+                    UpdateOne(
+                        {"_id": f"{b_id}|{event_type}|{bucket_start.isoformat()}"},
+                        {"$inc": {"count": count},
+                         "$setOnInsert": {"business_id": b_id, "event_type": event_type,
+                                          "start": bucket_start}},
+                        upsert=True,
+                    )
+                    for (b_id, event_type, bucket_start), count in buckets.items()
+                ]
+                if ops:
+                    mongo.db[name].bulk_write(ops, ordered=False)
+
+            # Advance only after the buckets are written
+            cls._advance_watermark(end, lease)
+            start = end
+
+        if folded:
+            logger.info(f"🗜️ Downsampled {folded} analytics events (watermark {start.isoformat()})")
+        return folded
+
+    @staticmethod
+    def _advance_watermark(watermark, lease=None):
+        """Moves the watermark; fenced by the lease token when given."""
+        if lease is None:
+            mongo.db[STATE_COLLECTION].update_one(
+                {"_id": RAW_COLLECTION}, {"$set": {"watermark": watermark}}, upsert=True
+            )
+            return
+
+        from pymongo.errors import DuplicateKeyError
+        from app.services.job_coordinator import LeaseLost
+
+        try:
+            mongo.db[STATE_COLLECTION].update_one(
+                {"_id": RAW_COLLECTION,
+                 "$or": [{"fence": {"$lte": lease.token}}, {"fence": {"$exists": False}}]},
+                {"$set": {"watermark": watermark, "fence": lease.token}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # A newer lease holder already advanced it
+            raise LeaseLost(f"Downsampling watermark fenced off (token {lease.token})")
+
+    # ================================================================
+    # Reads
+    # ================================================================
+
+    @classmethod
+    def counts(cls, business_id, since, now=None):
+        """
+        Event counts per type from `since` (floored to the bucket unit) to
+        now: buckets for everything ingested before the watermark, raw
+        events for the rest.
+        """
+        b_id_str = str(business_id)
+        now = _utc(now or datetime.utcnow())
+        if now - _utc(since) <= timedelta(days=HOURLY_WINDOW_DAYS):
+            collection, start = HOURLY_COLLECTION, _floor(since, "hour")
+        else:
+            collection, start = DAILY_COLLECTION, _floor(since, "day")
+
+        counts = {}
+
+        def _add(rows):
+            for row in rows:
+                counts[row["_id"]] = counts.get(row["_id"], 0) + row["count"]
+
+        watermark = cls.watermark()
+        if watermark is not None:
+            _add(mongo.db[collection].aggregate([
+                {"$match": {"business_id": b_id_str, "start": {"$gte": start}}},
+                {"$group": {"_id": "$event_type", "count": {"$sum": "$count"}}},
+            ]))
+
+        tail = {cls.field("business_id"): b_id_str, "timestamp": {"$gte": start}}
+        if watermark is not None:
+            tail["ingested_at"] = {"$gte": watermark}
+        _add(mongo.db[RAW_COLLECTION].aggregate([
+            {"$match": tail},
+            {"$group": {"_id": f"${cls.field('event_type')}", "count": {"$sum": 1}}},
+        ]))
+        return counts
+
+
+def run_downsampling(app, lease=None):
+    """Scheduler entry point (runs inside an app context, under a JobCoordinator lease)."""
+    from app.services.job_coordinator import LeaseLost
+
+    with app.app_context():
+        try:
+            EventStore.downsample(lease=lease)
+        except LeaseLost:
+            raise
+        except Exception as e:
+            logger.error(f"Analytics downsampling failed: {e}")
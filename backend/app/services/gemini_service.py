@@ -3,21 +3,40 @@ Gemini AI Service for Break-even App
 Provides AI-powered content generation, business insights, and text analysis
 """
 
-import requests
 from flask import current_app
 import json
-# google.genai SDK not used here — this service uses the REST API directly via requests
+# google.genai SDK not used here — this service uses the REST API via the shared LLM transport
 import re
 from datetime import datetime
 from app import mongo
+from app.services.llm_transport import llm_transport
 from bson import ObjectId
 
+GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta/models"
+
+
+def iter_stream_text(lines):
+    """Text deltas from a streamGenerateContent?alt=sse response (one JSON event per `data:` line)."""
+    for line in lines:
+        if not line.startswith("data:"):
+            continue
+        try:
+            event = json.loads(line[5:].strip())
+        except ValueError:
+            continue
+        for candidate in event.get("candidates", [])[:1]:
+            for part in candidate.get("content", {}).get("parts", []):
+                if part.get("text"):
+                    yield part["text"]
+
     
 class GeminiAIService:
     
     def __init__(self, api_key=None):
         self._api_key = api_key
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
+        self.base_url = f"{GEMINI_API_BASE}/{GEMINI_MODEL}:generateContent"
+        self.stream_url = f"{GEMINI_API_BASE}/{GEMINI_MODEL}:streamGenerateContent"
     
     @property
     def api_key(self):
@@ -53,7 +72,8 @@ class GeminiAIService:
             }
             
             url = f"{self.base_url}?key={self.api_key}"
-            response = requests.post(url, headers=headers, json=data)
+            # Pooled, timeout-bounded; raises at once while Gemini's circuit is open
+            response = llm_transport.post("gemini", url, model=GEMINI_MODEL, headers=headers, json=data)
             
             if response.status_code == 200:
                 result = response.json()
@@ -80,6 +100,38 @@ class GeminiAIService:
                 'fallback': True
             }
 
+    def stream_content(self, prompt, max_tokens=1000):
+        """
+        Yields the response as text chunks while Gemini generates it.
+        Falls back to the local copy (one chunk) if the stream fails before
+        producing anything; a stream cut off midway just ends early.
+        """
+        data = {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "maxOutputTokens": max_tokens,
+                "temperature": 0.7,
+                "topP": 0.8,
+                "topK": 40
+            }
+        }
+        url = f"{self.stream_url}?alt=sse&key={self.api_key}"
+        streamed = False
+        try:
+            lines = llm_transport.stream(
+                "gemini", url, model=GEMINI_MODEL, headers={'Content-Type': 'application/json'}, json=data
+            )
+            for chunk in iter_stream_text(lines):
+                streamed = True
+                yield chunk
+        except Exception as e:
+            if streamed:
+                print(f"⚠️ Gemini stream interrupted: {e}")
+                return
+            print(f"⚠️ Gemini stream failed: {e}. Deploying local self-healing fallback copy.")
+        if not streamed:
+            yield self._generate_local_fallback(prompt)
+
     def _generate_local_fallback(self, prompt):
         """Generates a high-quality local fallback copy depending on the prompt's intent."""
         import re
@@ -3,7 +3,6 @@ Groq AI Service for Break-even App
 Provides AI-powered image generation using Groq API
 """
 
-import requests
 import base64
 import io
 from PIL import Image, ImageDraw, ImageFont
@@ -11,6 +10,7 @@ from flask import current_app
 import os
 from datetime import datetime
 import json
+from app.services.llm_transport import llm_transport
 
 class GroqService:
     
@@ -62,8 +62,10 @@ class GroqService:
                 "max_tokens": 500
             }
             
-            response = requests.post(
+            response = llm_transport.post(
+                "groq",
                 f"{self.base_url}/chat/completions",
+                model=payload["model"],
                 headers=headers,
                 json=payload
             )
@@ -361,8 +363,10 @@ class GroqService:
                 "max_tokens": 50
             }
             
-            response = requests.post(
+            response = llm_transport.post(
+                "groq",
                 f"{self.base_url}/chat/completions",
+                model=payload["model"],
                 headers=headers,
                 json=payload
             )
@@ -0,0 +1,354 @@
+"""
+HistoryStore — Delta-encoded website_history snapshots.
+
+PROBLEM THIS SOLVES:
+    Every patch stored a full copy of the schema in website_history, so a
+    heavily optimized site accumulated hundreds of near-identical
+    snapshots that differ by one section's content.
+
+HOW IT WORKS:
+    History entries form chains.  The first entry of a chain is a
+    keyframe holding the full `schema_snapshot`; every later entry holds
+    only `schema_delta`, a JSON-patch (RFC 6902 add / remove / replace)
+    against the entry before it:
+
+        { ..., "encoding": "keyframe", "schema_snapshot": {...},
+          "chain_id": id, "chain_index": 0 }
+        { ..., "encoding": "delta", "schema_delta": [ops],
+          "chain_id": id, "chain_index": n }
+
+    record() starts a new keyframe every KEYFRAME_INTERVAL entries, or when
+    a delta would not be much smaller than the snapshot itself.
+    snapshot() rebuilds any entry by applying its chain's deltas forward
+    from the keyframe (one query, at most KEYFRAME_INTERVAL - 1 deltas).
+
+    Deleting or trimming entries that later deltas depend on first turns
+    the next surviving entry into a keyframe (_split_chain_at).  Entries
+    written before delta encoding (full snapshot, no `encoding`) read as
+    standalone keyframes; compact() re-encodes only those into chains and
+    runs as a scheduled job.
+"""
+
+import logging
+
+import bson
+from pymongo.errors import DuplicateKeyError
+from app import mongo
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+COLLECTION = "website_history"
+
+KEYFRAME_INTERVAL = 20          # entries per chain (keyframe + deltas)
+MAX_DELTA_RATIO = 0.5           # larger deltas are stored as keyframes
+
+COMPACTION_INTERVAL_HOURS = 6
+COMPACTION_BUSINESSES_PER_RUN = 200
+
+
+class HistoryStore:
+
+    # ================================================================
+    # Public API
+    # ================================================================
+
+    @classmethod
+    def record(cls, history_record):
+        """
+        Inserts a history record, storing its `schema_snapshot` as a delta
+        against the business's latest entry where that pays off.
+        Returns the inserted _id.
+        """
+        record = dict(history_record)
+        snapshot = {k: v for k, v in record.pop("schema_snapshot").items() if k != "_id"}
+
+        latest = mongo.db[COLLECTION].find_one(
+            {"business_id": record["business_id"]}, sort=[("timestamp", -1), ("_id", -1)]
+        )
+        if latest and latest.get("encoding") and latest.get("chain_index", 0) + 1 < KEYFRAME_INTERVAL:
+            try:
+                delta = diff(cls.snapshot(latest), snapshot)
+                if _bson_size(delta) <= _bson_size(snapshot) * MAX_DELTA_RATIO:
+                    record.update({
+                        "encoding": "delta",
+                        "schema_delta": delta,
+                        "chain_id": latest["chain_id"],
+                        "chain_index": latest["chain_index"] + 1,
+                    })
+                    return mongo.db[COLLECTION].insert_one(record).inserted_id
+            except DuplicateKeyError:
+                # A concurrent write took this chain slot — start a new chain
+                record = dict(history_record)
+                record.pop("schema_snapshot")
+            except Exception as e:
+                logger.warning(f"HistoryStore: delta encoding failed, storing a keyframe: {e}")
+
+        return cls._insert_keyframe(record, snapshot)
+
+    @classmethod
+    def snapshot(cls, entry):
+        """Full schema snapshot of a history entry (rebuilt from its keyframe)."""
+        if entry.get("encoding") != "delta":
+            return entry["schema_snapshot"]
+
+        chain = list(mongo.db[COLLECTION].find(
+            {"chain_id": entry["chain_id"], "chain_index": {"$lte": entry["chain_index"]}},
+            {"encoding": 1, "schema_snapshot": 1, "schema_delta": 1, "chain_index": 1},
+        ).sort("chain_index", 1))
+        if not chain or [doc["chain_index"] for doc in chain] != list(range(entry["chain_index"] + 1)):
+            raise ValueError(f"History chain {entry['chain_id']} is incomplete")
+
+        schema = chain[0]["schema_snapshot"]
+        for doc in chain[1:]:
+            schema = apply_patch(schema, doc["schema_delta"])
+        return schema
+
+    @classmethod
+    def delete(cls, entry):
+        """Deletes one entry, re-keyframing the entry that depended on it."""
+        if entry.get("encoding"):
+            successor = mongo.db[COLLECTION].find_one(
+                {"chain_id": entry["chain_id"], "chain_index": entry["chain_index"] + 1}
+            )
+            if successor:
+                cls._split_chain_at(successor)
+        mongo.db[COLLECTION].delete_one({"_id": entry["_id"]})
+
+    @classmethod
+    def trim(cls, business_id, keep):
+        """Keeps the business's `keep` most recent entries."""
+        kept = list(mongo.db[COLLECTION].find(
+            {"business_id": business_id},
+            {"encoding": 1, "chain_id": 1, "chain_index": 1, "schema_snapshot": 1, "schema_delta": 1},
+        ).sort([("timestamp", -1), ("_id", -1)]).limit(keep))
+        if not kept:
+            return 0
+        oldest = kept[-1]
+        if oldest.get("encoding") == "delta":
+            cls._split_chain_at(oldest)
+        result = mongo.db[COLLECTION].delete_many(
+            {"business_id": business_id, "_id": {"$nin": [doc["_id"] for doc in kept]}}
+        )
+        return result.deleted_count
+
+    @classmethod
+    def compact(cls, business_id):
+        """
+        Re-encodes a business's legacy entries (full snapshot, no
+        `encoding`) as keyframe + delta chains, oldest first.  Existing
+        chains are left alone.  Returns (entries, bytes_before, bytes_after).
+
+        Each write is conditional on the entry still being legacy; an entry
+        that changed or vanished meanwhile ends the chain.  After a delta
+        is written its predecessor is checked again — if a concurrent
+        delete() / trim() removed it first, the delta is turned into a
+        keyframe (a later delete() sees the delta and splits it itself).
+        """
+        from bson import ObjectId
+
+        entries = list(mongo.db[COLLECTION].find({"business_id": business_id, "encoding": {"$exists": False}})
+                       .sort([("timestamp", 1), ("_id", 1)]))
+        if not entries:
+            return 0, 0, 0
+
+        written, before, after = 0, 0, 0
+        previous, chain_id, index = None, None, 0
+        for entry in entries:
+            snapshot = entry["schema_snapshot"]
+            doc = {k: v for k, v in entry.items() if k not in ("schema_snapshot", "_id")}
+            delta = diff(previous, snapshot) if previous is not None and index + 1 < KEYFRAME_INTERVAL else None
+            if delta is not None and _bson_size(delta) <= _bson_size(snapshot) * MAX_DELTA_RATIO:
+                doc.update({"encoding": "delta", "schema_delta": delta,
+                            "chain_id": chain_id, "chain_index": index + 1})
+            else:
+                # Fresh chain ids never collide with a position an existing chain holds
+                doc.update({"encoding": "keyframe", "schema_snapshot": snapshot,
+                            "chain_id": ObjectId(), "chain_index": 0})
+
+            try:
+                result = mongo.db[COLLECTION].replace_one(
+                    {"_id": entry["_id"], "encoding": {"$exists": False}}, doc
+                )
+            except DuplicateKeyError:
+                result = None
+            if not result or not result.matched_count:
+                # Entry changed or vanished (or its slot was taken) — break the chain here
+                previous = None
+                continue
+
+            if doc["encoding"] == "delta" and not mongo.db[COLLECTION].count_documents(
+                    {"chain_id": chain_id, "chain_index": index}, limit=1):
+                # The predecessor was deleted / re-chained before this delta
+                # landed, so nothing split it off — make it a keyframe
+                doc.update({"encoding": "keyframe", "schema_snapshot": snapshot,
+                            "chain_id": ObjectId(), "chain_index": 0})
+                doc.pop("schema_delta")
+                mongo.db[COLLECTION].update_one(
+                    {"_id": entry["_id"]},
+                    {"$set": {k: doc[k] for k in ("encoding", "schema_snapshot", "chain_id", "chain_index")},
+                     "$unset": {"schema_delta": ""}},
+                )
+
+            previous, chain_id, index = snapshot, doc["chain_id"], doc["chain_index"]
+            written += 1
+            before += _bson_size(entry)
+            after += _bson_size(dict(doc, _id=entry["_id"]))
+
+        return written, before, after
+
+    @staticmethod
+    def ensure_indexes():
+        mongo.db[COLLECTION].create_index(
+            [("chain_id", 1), ("chain_index", 1)],
+            unique=True, partialFilterExpression={"chain_id": {"$exists": True}},
+        )
+
+    # ================================================================
+    # Private helpers
+    # ================================================================
+
+    @staticmethod
+    def _insert_keyframe(record, snapshot):
+        from bson import ObjectId
+
+        record["_id"] = record.get("_id") or ObjectId()
+        record.update({
+            "encoding": "keyframe",
+            "schema_snapshot": snapshot,
+            "chain_id": record["_id"],
+            "chain_index": 0,
+        })
+        return mongo.db[COLLECTION].insert_one(record).inserted_id
+
+    @classmethod
+    def _split_chain_at(cls, entry):
+        """Makes `entry` the keyframe of a new chain holding it and its successors."""
+        from bson import ObjectId
+
+        snapshot = cls.snapshot(entry)
+        chain_id = ObjectId()
+        offset = entry["chain_index"]
+        followers = list(mongo.db[COLLECTION].find(
+            {"chain_id": entry["chain_id"], "chain_index": {"$gt": offset}}, {"chain_index": 1}
+        ).sort("chain_index", 1))
+
+        mongo.db[COLLECTION].update_one(
+            {"_id": entry["_id"]},
+            {"$set": {"encoding": "keyframe", "schema_snapshot": snapshot,
+                      "chain_id": chain_id, "chain_index": 0},
+             "$unset": {"schema_delta": ""}},
+        )
+        for doc in followers:
+            mongo.db[COLLECTION].update_one(
+                {"_id": doc["_id"]},
+                {"$set": {"chain_id": chain_id, "chain_index": doc["chain_index"] - offset}},
+            )
+
+
+# ====================================================================
+# JSON patch (RFC 6902 subset: add / remove / replace)
+# ====================================================================
+
+def diff(source, target, path=""):
+    """Operations that turn `source` into `target`."""
+    if type(source) is not type(target):
+        return [{"op": "replace", "path": path, "value": target}]
+
+    if isinstance(source, dict):
+        ops = []
+        for key, value in source.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in target:
+                ops.append({"op": "remove", "path": child})
+            else:
+                ops.extend(diff(value, target[key], child))
+        for key, value in target.items():
+            if key not in source:
+                ops.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+        return ops
+
+    if isinstance(source, list):
+        ops = []
+        common = min(len(source), len(target))
+        for i in range(common):
+            ops.extend(diff(source[i], target[i], f"{path}/{i}"))
+        for i in range(len(source) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+        for i in range(common, len(target)):
+            ops.append({"op": "add", "path": f"{path}/{i}", "value": target[i]})
+        return ops
+
+    if source != target:
+        return [{"op": "replace", "path": path, "value": target}]
+    return []
+
+
+def apply_patch(document, ops):
+    """Applies diff() output to a copy of `document`."""
+    import copy
+
+    document = copy.deepcopy(document)
+    for op in ops:
+        if op["path"] == "":
+            document = copy.deepcopy(op["value"])
+            continue
+        *parents, last = [_unescape(part) for part in op["path"].split("/")[1:]]
+        container = document
+        for part in parents:
+            container = container[int(part)] if isinstance(container, list) else container[part]
+
+        if isinstance(container, list):
+            index = int(last)
+            if op["op"] == "remove":
+                container.pop(index)
+            elif op["op"] == "add":
+                container.insert(index, copy.deepcopy(op["value"]))
+            else:
+                container[index] = copy.deepcopy(op["value"])
+        elif op["op"] == "remove":
+            container.pop(last, None)
+        else:
+            container[last] = copy.deepcopy(op["value"])
+    return document
+
+
+def _escape(key):
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(part):
+    return part.replace("~1", "/").replace("~0", "~")
+
+
+def _bson_size(value):
+    return len(bson.encode({"v": value}))
+
+
+def run_compaction(app, lease=None):
+    """Scheduler entry point: re-encodes histories still holding full snapshots."""
+    from app.services.job_coordinator import LeaseLost
+
+    with app.app_context():
+        try:
+            pending = mongo.db[COLLECTION].distinct(
+                "business_id", {"encoding": {"$exists": False}}
+            )[:COMPACTION_BUSINESSES_PER_RUN]
+            saved = 0
+            for business_id in pending:
+                if lease is not None:
+                    lease.check()
+                _, before, after = HistoryStore.compact(business_id)
+                saved += before - after
+            if pending:
+                logger.info(
+                    f"🗜️ Compacted website_history for {len(pending)} business(es), "
+                    f"{saved / 1024:.0f} KB saved"
+                )
+        except LeaseLost:
+            raise
+        except Exception as e:
+            logger.error(f"website_history compaction failed: {e}")
@@ -0,0 +1,342 @@
+"""
+JobCoordinator — Cluster-wide leases for background jobs.
+
+PROBLEM THIS SOLVES:
+    create_app starts an APScheduler in every process that builds the app
+    (each gunicorn worker, the MCP server, maintenance scripts), so every
+    scheduled job ran N times concurrently — racing on the same
+    business_memory records and multiplying Mongo and embedding load.
+
+HOW IT WORKS:
+    Every process still schedules the jobs, but each tick first takes a
+    lease in `job_leases`:
+
+        { "_id": "<job>:<shard>", "holder": "<host>:<pid>:<rand>",
+          "token": n, "expires_at": dt, "last_run_at": dt, ... }
+
+    A lease is acquired with one conditional upsert (free, expired or
+    already ours); losing the race surfaces as a duplicate-key error, so
+    at most one process holds a shard at a time.  While the job runs a
+    heartbeat thread renews it every LEASE_SECONDS / 3.  The holder keeps
+    the lease between ticks (renewing it), so leadership is sticky and a
+    dead holder is replaced once its lease expires.
+
+    Fencing: every fresh acquisition draws a strictly increasing token
+    from `job_lease_tokens` (kept separately so the TTL clean-up of
+    expired leases never resets it).  Jobs pass the token to writes that
+    must not be applied by a stale holder (e.g. the downsampling
+    watermark) and can call lease.check() between units of work.
+
+    Sharding: a job registered with shards=N is split into N leases.
+    Tenants map to shards by a stable hash (shard_of), and a worker holds
+    at most ceil(N / live workers) shards, so work spreads out as workers
+    are added.  Live workers heartbeat into `job_workers`.
+
+    Metrics: per-job run / skip / failure / lease-lost counters and the
+    last duration are kept in-process (stats()); the last run of each
+    shard is also recorded on its lease document for a cluster-wide view.
+"""
+
+import atexit
+import hashlib
+import logging
+import math
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app import mongo
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+LEASE_COLLECTION = "job_leases"
+TOKEN_COLLECTION = "job_lease_tokens"
+WORKER_COLLECTION = "job_workers"
+
+LEASE_SECONDS = 60
+WORKER_TTL_SECONDS = 120
+
+
+class LeaseLost(Exception):
+    """The lease expired or was taken over while the job was running."""
+
+
+def shard_of(key, shard_count):
+    """Stable shard index of a tenant (same in every process)."""
+    if shard_count <= 1:
+        return 0
+    digest = hashlib.md5(str(key).encode("utf-8")).hexdigest()
+    return int(digest[:8], 16) % shard_count
+
+
+class Lease:
+    """A held shard lease, handed to the job function."""
+
+    def __init__(self, coordinator, job, shard, shard_count, token):
+        self.coordinator = coordinator
+        self.job = job
+        self.shard = shard
+        self.shard_count = shard_count
+        self.token = token
+        self.lost = False
+
+    @property
+    def key(self):
+        return f"{self.job}:{self.shard}"
+
+    def owns(self, tenant_id):
+        """True if this shard is responsible for the tenant."""
+        return shard_of(tenant_id, self.shard_count) == self.shard
+
+    def check(self):
+        """Raises LeaseLost if another worker has taken the lease over."""
+        if self.lost or not self.coordinator.renew(self):
+            self.lost = True
+            raise LeaseLost(f"Lease {self.key} (token {self.token}) lost")
+
+
+class JobCoordinator:
+
+    def __init__(self, worker_id=None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._held = {}      # lease key → Lease
+        self._metrics = {}   # job → counters
+        self._lock = threading.Lock()
+
+    # ================================================================
+    # Public API
+    # ================================================================
+
+    def wrap(self, job, func, shards=1, lease_seconds=LEASE_SECONDS):
+        """Scheduler-ready callable: func(lease) runs only on held shards."""
+        def _run(*args, **kwargs):
+            self.run(job, func, *args, shards=shards, lease_seconds=lease_seconds, **kwargs)
+        _run.__name__ = f"leased_{job}"
+        return _run
+
+    def run(self, job, func, *args, shards=1, lease_seconds=LEASE_SECONDS, **kwargs):
+        """
+        Acquires this worker's share of the job's shards and calls
+        func(*args, lease=lease, **kwargs) once per held shard.
+        """
+        try:
+            self._heartbeat_worker()
+            leases = self._acquire_shards(job, shards, lease_seconds)
+        except Exception as e:
+            logger.error(f"JobCoordinator: lease acquisition for '{job}' failed: {e}")
+            self._record(job, "failures", error=str(e))
+            return
+
+        if not leases:
+            self._record(job, "skipped")
+            return
+
+        for lease in leases:
+            started = time.monotonic()
+            stop = threading.Event()
+            heartbeat = threading.Thread(
+                target=self._renew_until, args=(lease, stop, lease_seconds),
+                name=f"lease-{lease.key}", daemon=True,
+            )
+            heartbeat.start()
+            status, error = "ok", None
+            try:
+                func(*args, lease=lease, **kwargs)
+            except LeaseLost as e:
+                status, error = "lease_lost", str(e)
+                logger.warning(f"JobCoordinator: {e}")
+            except Exception as e:
+                status, error = "failed", str(e)
+                logger.error(f"JobCoordinator: job '{lease.key}' failed: {e}")
+            finally:
+                stop.set()
+                heartbeat.join()
+
+            duration_ms = round((time.monotonic() - started) * 1000, 1)
+            self._record(job, {"ok": "runs", "lease_lost": "lease_lost", "failed": "failures"}[status],
+                         duration_ms=duration_ms, error=error)
+            self._record_run(lease, status, duration_ms, error)
+
+    def renew(self, lease, lease_seconds=LEASE_SECONDS):
+        """Extends a held lease; False if it is no longer ours."""
+        result = mongo.db[LEASE_COLLECTION].update_one(
+            {"_id": lease.key, "holder": self.worker_id, "token": lease.token},
+            {"$set": {"expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)}},
+        )
+        if result.matched_count:
+            return True
+        with self._lock:
+            self._held.pop(lease.key, None)
+        return False
+
+    def release(self, lease):
+        """Gives up one lease early (e.g. above the fair share)."""
+        with self._lock:
+            self._held.pop(lease.key, None)
+        mongo.db[LEASE_COLLECTION].update_one(
+            {"_id": lease.key, "holder": self.worker_id, "token": lease.token},
+            {"$set": {"expires_at": datetime.utcnow()}},
+        )
+
+    def release_all(self):
+        """Gives up every held lease (process shutdown)."""
+        with self._lock:
+            held, self._held = list(self._held.values()), {}
+        for lease in held:
+            try:
+                mongo.db[LEASE_COLLECTION].update_one(
+                    {"_id": lease.key, "holder": self.worker_id, "token": lease.token},
+                    {"$set": {"expires_at": datetime.utcnow()}},
+                )
+            except Exception:
+                pass
+        try:
+            mongo.db[WORKER_COLLECTION].delete_one({"_id": self.worker_id})
+        except Exception:
+            pass
+
+    def stats(self):
+        """In-process job metrics plus the cluster-wide lease table."""
+        with self._lock:
+            jobs = {job: dict(metrics) for job, metrics in self._metrics.items()}
+            held = sorted(self._held)
+        now = datetime.utcnow()
+        leases = [
+            dict(lease, active=lease.get("expires_at") is not None and lease["expires_at"] > now)
+            for lease in mongo.db[LEASE_COLLECTION].find({}, {"_id": 1, "holder": 1, "token": 1,
+                                                              "expires_at": 1, "last_run_at": 1,
+                                                              "last_status": 1, "last_duration_ms": 1})
+        ]
+        return {
+            "worker_id": self.worker_id,
+            "held": held,
+            "live_workers": self._live_workers(),
+            "jobs": jobs,
+            "leases": leases,
+        }
+
+    @staticmethod
+    def ensure_indexes():
+        # Expired leases / dead workers are cleaned up by TTL; fencing
+        # tokens live in TOKEN_COLLECTION and are never expired.
+        mongo.db[LEASE_COLLECTION].create_index("expires_at", expireAfterSeconds=3600)
+        mongo.db[WORKER_COLLECTION].create_index("expires_at", expireAfterSeconds=0)
+
+    # ================================================================
+    # Private helpers
+    # ================================================================
+
+    def _acquire_shards(self, job, shards, lease_seconds):
+        """Tries shards in a worker-specific order up to this worker's fair share."""
+        fair_share = math.ceil(shards / max(self._live_workers(), 1))
+        start = shard_of(self.worker_id, shards)
+        leases = []
+        for offset in range(shards):
+            if len(leases) >= fair_share:
+                break
+            lease = self._acquire(job, (start + offset) % shards, shards, lease_seconds)
+            if lease:
+                leases.append(lease)
+        # Shards beyond the fair share that we still hold are let go
+        for shard in range(shards):
+            key = f"{job}:{shard}"
+            if key in self._held and all(l.key != key for l in leases):
+                self.release(self._held[key])
+        return leases
+
+    def _acquire(self, job, shard, shard_count, lease_seconds):
+        key = f"{job}:{shard}"
+        now = datetime.utcnow()
+        try:
+            previous = mongo.db[LEASE_COLLECTION].find_one_and_update(
+                {"_id": key, "$or": [{"expires_at": {"$lte": now}}, {"holder": self.worker_id}]},
+                {"$set": {"holder": self.worker_id,
+                          "expires_at": now + timedelta(seconds=lease_seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE,
+            )
+        except DuplicateKeyError:
+            # Held by a live worker
+            with self._lock:
+                self._held.pop(key, None)
+            return None
+
+        with self._lock:
+            held = self._held.get(key)
+        if previous and previous.get("holder") == self.worker_id and held \
+                and previous.get("token") == held.token:
+            return held   # renewal — same token
+
+        # Fresh acquisition: draw a new fencing token
+        token = mongo.db[TOKEN_COLLECTION].find_one_and_update(
+            {"_id": key}, {"$inc": {"seq": 1}}, upsert=True, return_document=ReturnDocument.AFTER,
+        )["seq"]
+        mongo.db[LEASE_COLLECTION].update_one(
+            {"_id": key, "holder": self.worker_id},
+            {"$set": {"token": token, "acquired_at": now}},
+        )
+        lease = Lease(self, job, shard, shard_count, token)
+        with self._lock:
+            self._held[key] = lease
+        logger.info(f"🔒 JobCoordinator: {self.worker_id} acquired {key} (token {token})")
+        return lease
+
+    def _renew_until(self, lease, stop, lease_seconds):
+        """Heartbeat while the job runs; flags the lease if it is lost."""
+        while not stop.wait(lease_seconds / 3):
+            try:
+                if not self.renew(lease, lease_seconds):
+                    lease.lost = True
+                    return
+            except Exception as e:
+                logger.warning(f"JobCoordinator: renewing {lease.key} failed: {e}")
+
+    def _heartbeat_worker(self):
+        mongo.db[WORKER_COLLECTION].update_one(
+            {"_id": self.worker_id},
+            {"$set": {"expires_at": datetime.utcnow() + timedelta(seconds=WORKER_TTL_SECONDS)}},
+            upsert=True,
+        )
+
+    def _live_workers(self):
+        return mongo.db[WORKER_COLLECTION].count_documents({"expires_at": {"$gt": datetime.utcnow()}})
+
+    def _record(self, job, counter, duration_ms=None, error=None):
+        with self._lock:
+            metrics = self._metrics.setdefault(job, {
+                "runs": 0, "skipped": 0, "failures": 0, "lease_lost": 0,
+                "last_run_at": None, "last_duration_ms": None, "last_error": None,
+            })
+            metrics[counter] += 1
+            if duration_ms is not None:
+                metrics["last_run_at"] = datetime.utcnow()
+                metrics["last_duration_ms"] = duration_ms
+            if error:
+                metrics["last_error"] = error
+
+    def _record_run(self, lease, status, duration_ms, error):
+        try:
+            mongo.db[LEASE_COLLECTION].update_one(
+                {"_id": lease.key, "holder": self.worker_id, "token": lease.token},
+                {"$set": {"last_run_at": datetime.utcnow(), "last_status": status,
+                          "last_duration_ms": duration_ms, "last_error": error}},
+            )
+        except Exception:
+            pass
+
+
+# ====================================================================
+# Module-level singleton
+# ====================================================================
+
+job_coordinator = JobCoordinator()
+atexit.register(job_coordinator.release_all)
@@ -0,0 +1,302 @@
+"""
+LLMTransport — Shared, pooled HTTP transport for every AI provider call.
+
+PROBLEM THIS SOLVES:
+    GeminiAIService posted with a bare requests.post (no session, no
+    timeout), so every call paid a fresh TLS handshake and a hung
+    upstream could pin a worker forever.  TranslationService, Groq and
+    Stability each opened their own connections, SentimentService built a
+    new genai.Client per instance, and nothing noticed a provider that was
+    down — every request waited out its own timeout before falling back.
+
+HOW IT WORKS:
+    One Provider per upstream (PROVIDERS) owns:
+
+        a requests.Session with a keep-alive pool sized to the provider's
+        concurrency limit
+
+        a semaphore capping in-flight calls; callers wait at most
+        QUEUE_TIMEOUT_SECONDS for a slot
+
+        (connect, read) timeouts on every request
+
+        a circuit breaker — FAILURE_THRESHOLD consecutive failures
+        (timeouts, connection errors, 429 / 5xx) open it for
+        OPEN_SECONDS.  While open, calls raise ProviderUnavailable
+        immediately so services go straight to their local fallbacks
+        (_generate_local_fallback, TextBlob, ...).  After the cool-down
+        one trial call is let through (half-open); success closes it.
+
+    request() / post() / get() cover REST calls, stream() yields a
+    streamed response line by line, and call() wraps SDK calls (the
+    shared genai.Client from genai_client()) in the same limits.
+    Latency is recorded per provider/model into fixed-bucket histograms
+    (stats()).
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+PROVIDERS = {
+    # name: max concurrent calls, connect timeout, read timeout (seconds)
+    "gemini": {"max_concurrency": 16, "connect_timeout": 5, "read_timeout": 45},
+    "groq": {"max_concurrency": 8, "connect_timeout": 5, "read_timeout": 30},
+    "stability": {"max_concurrency": 4, "connect_timeout": 5, "read_timeout": 90},
+}
+
+QUEUE_TIMEOUT_SECONDS = 10
+FAILURE_THRESHOLD = 5
+OPEN_SECONDS = 30
+
+# Histogram bucket upper bounds (ms); the last bucket is unbounded
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class ProviderUnavailable(requests.exceptions.ConnectionError):
+    """The provider's circuit is open or its concurrency limit is saturated."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed → open → half-open → closed."""
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, open_seconds=OPEN_SECONDS):
+        self.threshold = threshold
+        self.open_seconds = open_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.open_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def cancel_trial(self):
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record(self, ok):
+        with self._lock:
+            self.trial_in_flight = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class Provider:
+
+    def __init__(self, name, max_concurrency, connect_timeout, read_timeout):
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrency, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+
+class LLMTransport:
+
+    def __init__(self, providers=PROVIDERS):
+        self._providers = {name: Provider(name, **config) for name, config in providers.items()}
+        self._histograms = {}   # "provider/model" → {"buckets", "count", "sum_ms", "errors"}
+        self._genai_clients = {}
+        self._lock = threading.Lock()
+
+    # ================================================================
+    # Public API
+    # ================================================================
+
+    def request(self, provider, method, url, model=None, timeout=None, **kwargs):
+        """
+        Sends one HTTP request through the provider's pooled session.
+        Returns the requests.Response; raises ProviderUnavailable while
+        the circuit is open, and requests exceptions on timeouts.
+        """
+        p = self._providers[provider]
+        kwargs.setdefault("timeout", timeout or p.timeout)
+
+        def _send():
+            response = p.session.request(method, url, **kwargs)
+            return response, response.status_code < 500 and response.status_code != 429
+
+        return self._guarded(p, model, _send)
+
+    def post(self, provider, url, model=None, **kwargs):
+        return self.request(provider, "POST", url, model=model, **kwargs)
+
+    def get(self, provider, url, model=None, **kwargs):
+        return self.request(provider, "GET", url, model=model, **kwargs)
+
+    def call(self, provider, model, func, /, *args, **kwargs):
+        """Runs an SDK call (e.g. genai) under the provider's limits and breaker."""
+        p = self._providers[provider]
+
+        def _send():
+            return func(*args, **kwargs), True
+
+        return self._guarded(p, model, _send)
+
+    def stream(self, provider, url, model=None, method="POST", timeout=None, **kwargs):
+        """
+        Streams a response line by line (e.g. server-sent events).  The
+        concurrency slot is held until the generator is exhausted or
+        closed; the latency recorded is the full stream duration.
+        Raises requests.HTTPError for non-200 responses.
+        """
+        p = self._providers[provider]
+        kwargs.setdefault("timeout", timeout or p.timeout)
+        self._acquire(p)
+        started = time.monotonic()
+        ok = False
+        response = None
+        try:
+            response = p.session.request(method, url, stream=True, **kwargs)
+            ok = response.status_code < 500 and response.status_code != 429
+            if response.status_code != 200:
+                raise requests.exceptions.HTTPError(
+                    f"{p.name} stream failed: HTTP {response.status_code}", response=response
+                )
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    yield line
+        except requests.exceptions.HTTPError:
+            raise
+        except requests.exceptions.RequestException:
+            ok = False
+            raise
+        finally:
+            if response is not None:
+                response.close()
+            self._release(p, model, started, ok)
+
+    def genai_client(self, api_key):
+        """Shared google-genai client per API key, with the Gemini timeouts."""
+        with self._lock:
+            client = self._genai_clients.get(api_key)
+            if client is None:
+                from google import genai
+                from google.genai import types as genai_types
+
+                read_timeout = self._providers["gemini"].timeout[1]
+                client = genai.Client(
+                    api_key=api_key,
+                    http_options=genai_types.HttpOptions(timeout=int(read_timeout * 1000)),
+                )
+                self._genai_clients[api_key] = client
+            return client
+
+    def is_available(self, provider):
+        """False while the provider's circuit is open (skip straight to fallbacks)."""
+        return self._providers[provider].breaker.state != "open"
+
+    def stats(self):
+        """Breaker state, rejections and latency histograms per provider/model."""
+        with self._lock:
+            histograms = {
+                key: dict(h, buckets=dict(zip([str(b) for b in LATENCY_BUCKETS_MS] + ["+Inf"], h["buckets"])),
+                          avg_ms=round(h["sum_ms"] / h["count"], 1) if h["count"] else None)
+                for key, h in self._histograms.items()
+            }
+        return {
+            "providers": {
+                name: {
+                    "circuit": p.breaker.state,
+                    "consecutive_failures": p.breaker.failures,
+                    "rejected": p.rejected,
+                }
+                for name, p in self._providers.items()
+            },
+            "latency": histograms,
+        }
+
+    # ================================================================
+    # Private helpers
+    # ================================================================
+
+    def _guarded(self, p, model, send):
+        self._acquire(p)
+        started = time.monotonic()
+        ok = False
+        try:
+            result, ok = send()
+            return result
+        finally:
+            self._release(p, model, started, ok)
+
+    def _acquire(self, p):
+        if not p.breaker.allow():
+            self._reject(p)
+            raise ProviderUnavailable(f"{p.name} circuit is open; using fallback")
+        if not p._slots.acquire(timeout=QUEUE_TIMEOUT_SECONDS):
+            p.breaker.cancel_trial()   # local saturation says nothing about the provider
+            self._reject(p)
+            raise ProviderUnavailable(f"{p.name} concurrency limit reached")
+
+    def _release(self, p, model, started, ok):
+        p._slots.release()
+        elapsed_ms = (time.monotonic() - started) * 1000
+        was_open = p.breaker.state != "closed"
+        p.breaker.record(ok)
+        self._observe(p.name, model, elapsed_ms, ok)
+        if not ok and p.breaker.state == "open" and not was_open:
+            logger.warning(f"⚡ LLMTransport: {p.name} circuit opened for {OPEN_SECONDS}s")
+
+    def _reject(self, p):
+        with p._lock:
+            p.rejected += 1
+
+    def _observe(self, provider, model, elapsed_ms, ok):
+        key = f"{provider}/{model or 'default'}"
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = {
+                    "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1), "count": 0, "sum_ms": 0.0, "errors": 0,
+                }
+            h["buckets"][bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            h["count"] += 1
+            h["sum_ms"] += elapsed_ms
+            if not ok:
+                h["errors"] += 1
+
+
+# ====================================================================
+# Module-level singleton
+# ====================================================================
+
+llm_transport = LLMTransport()
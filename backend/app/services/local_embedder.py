@@ -0,0 +1,119 @@
+"""
+Local fallback embedder — deterministic, vectorized feature hashing.
+
+Used by EmbeddingService whenever Gemini embeddings are unavailable.
+
+Why not the built-in hash()?
+    Python salts str hashes per process (PYTHONHASHSEED), so vectors stored
+    by one gunicorn worker never matched queries embedded by another worker
+    or after a restart.  Buckets here come from blake2b, which is stable
+    across processes, machines and Python versions.
+
+How it works:
+    Every word token (and, optionally, every character n-gram of each word)
+    is mapped to a (bucket, ±1 sign) pair.  Distinct words are hashed once
+    and cached; a whole batch of texts is then accumulated with ONE
+    np.bincount over flat (row * VECTOR_DIM + bucket) indices and
+    L2-normalized row-wise, producing a float32 matrix.
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+VECTOR_DIM = 768
+
+# Character n-grams make "booking"/"bookings" or "cta"/"ctas" overlap.
+CHAR_NGRAM_SIZE = 3
+CHAR_NGRAM_WEIGHT = 0.5
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _bucket(feature):
+    """Stable (bucket, sign) for a feature string."""
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    h = int.from_bytes(digest, "little")
+    return h % VECTOR_DIM, 1.0 if (h >> 63) & 1 else -1.0
+
+
+@lru_cache(maxsize=65536)
+def _word_features(word, char_ngrams):
+    """
+    Hashed (buckets, signed weights) contributed by ONE occurrence of a word.
+    Cached, so each distinct word is hashed once per process.
+    """
+    buckets = []
+    weights = []
+    bucket, sign = _bucket(word)
+    buckets.append(bucket)
+    weights.append(sign)
+    if char_ngrams and len(word) > CHAR_NGRAM_SIZE:
+        padded = f"#{word}#"
+        for i in range(len(padded) - CHAR_NGRAM_SIZE + 1):
+            bucket, sign = _bucket("#" + padded[i:i + CHAR_NGRAM_SIZE])
+            buckets.append(bucket)
+            weights.append(sign * CHAR_NGRAM_WEIGHT)
+    return buckets, weights
+
+
+def hash_embed_many(texts, char_ngrams=True):
+    """
+    Embeds a batch of texts into an (n, VECTOR_DIM) float32 matrix of
+    unit vectors.  Empty texts produce all-zero rows.
+    """
+    texts = list(texts)
+    n = len(texts)
+
+    # Tokenize, then map every token occurrence onto a batch-local word id
+    vocab = {}
+    token_ids = []
+    lengths = np.zeros(n, dtype=np.int64)
+    for row, text in enumerate(texts):
+        tokens = _TOKEN_RE.findall(str(text).lower())
+        lengths[row] = len(tokens)
+        token_ids.extend([vocab.setdefault(t, len(vocab)) for t in tokens])
+
+    if not token_ids:
+        return np.zeros((n, VECTOR_DIM), dtype=np.float32)
+
+    # CSR layout of the hashed features of each distinct word
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    buckets = []
+    weights = []
+    for word, word_id in vocab.items():
+        b, w = _word_features(word, char_ngrams)
+        buckets.extend(b)
+        weights.extend(w)
+        indptr[word_id + 1] = len(b)
+    np.cumsum(indptr, out=indptr)
+    buckets = np.asarray(buckets, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+
+    # Gather every occurrence's features without a Python loop
+    token_ids = np.asarray(token_ids, dtype=np.int64)
+    token_rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+    starts = indptr[token_ids]
+    counts = indptr[token_ids + 1] - starts
+    ends = np.cumsum(counts)
+    positions = np.arange(ends[-1], dtype=np.int64) + np.repeat(starts - (ends - counts), counts)
+
+    flat = np.repeat(token_rows, counts) * VECTOR_DIM + buckets[positions]
+    matrix = np.bincount(
+        flat, weights=weights[positions], minlength=n * VECTOR_DIM,
+    ).reshape(n, VECTOR_DIM).astype(np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def hash_embed(text, char_ngrams=True):
+    """Embeds a single text into a float32 unit vector."""
+    return hash_embed_many([text], char_ngrams=char_ngrams)[0]
@@ -0,0 +1,229 @@
+"""
+MemoryIndex — In-process per-tenant vector index for BusinessMemory.
+
+PROBLEM THIS SOLVES:
+    The NumPy fallback in BusinessMemory used to pull every business_memory
+    document for a tenant (768-float vectors included) on every retrieval
+    and score them one by one in a Python loop.
+
+HOW IT WORKS:
+    Each tenant gets a contiguous float32 matrix of L2-normalized vectors
+    plus parallel metadata arrays (memory _id, outcome code).  A query is
+    scored with ONE matrix-vector product and the top-k rows are picked
+    with np.argpartition.  Only the winning documents are then fetched
+    from MongoDB (vectors excluded).
+
+    The index is kept in sync incrementally:
+        - BusinessMemory.add_memory      → add()
+        - outcome_updater._write_outcome → update()
+
+    Because other worker processes also write memories, a tenant's rows
+    are reloaded from MongoDB once they are older than INDEX_TTL_SECONDS.
+
+Tenant Isolation:
+    Every tenant has its own matrix — there is no cross-tenant scoring.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from app import mongo
+from app.services.local_embedder import VECTOR_DIM
+from app.utils.vector_codec import decode_vector
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+# Rows loaded from MongoDB are trusted for this long before a reload.
+INDEX_TTL_SECONDS = 300
+
+# Upper bound on warm tenants kept in memory (least recently used evicted).
+MAX_TENANTS = 256
+
+# Outcome codes stored in the parallel metadata array
+OUTCOME_OTHER = 0
+OUTCOME_SUCCESS = 1
+OUTCOME_FAILED = 2
+
+
+def outcome_code(patch_outcome):
+    """Maps a patch_outcome string onto a compact int8 outcome code."""
+    outcome = str(patch_outcome or "")
+    if outcome == "success":
+        return OUTCOME_SUCCESS
+    if outcome.upper().startswith("FAILED"):
+        return OUTCOME_FAILED
+    return OUTCOME_OTHER
+
+
+def _normalize(vector):
+    """Returns a float32 unit vector, or None if the vector is unusable."""
+    v = decode_vector(vector)
+    if v is None or v.ndim != 1 or v.shape[0] != VECTOR_DIM:
+        return None
+    norm = float(np.linalg.norm(v))
+    if norm > 0:
+        v = v / norm
+    return v
+
+
+class _TenantIndex:
+    """Contiguous float32 matrix + parallel metadata for one tenant."""
+
+    def __init__(self, capacity=64):
+        self.matrix = np.zeros((capacity, VECTOR_DIM), dtype=np.float32)
+        self.outcomes = np.zeros(capacity, dtype=np.int8)
+        self.ids = []
+        self.positions = {}
+        self.size = 0
+        self.loaded_at = time.monotonic()
+
+    def _grow(self):
+        capacity = max(64, self.matrix.shape[0] * 2)
+        matrix = np.zeros((capacity, VECTOR_DIM), dtype=np.float32)
+        matrix[:self.size] = self.matrix[:self.size]
+        outcomes = np.zeros(capacity, dtype=np.int8)
+        outcomes[:self.size] = self.outcomes[:self.size]
+        self.matrix, self.outcomes = matrix, outcomes
+
+    def upsert(self, memory_id, unit_vector, code):
+        pos = self.positions.get(memory_id)
+        if pos is None:
+            if self.size == self.matrix.shape[0]:
+                self._grow()
+            pos = self.size
+            self.ids.append(memory_id)
+            self.positions[memory_id] = pos
+            self.size += 1
+        self.matrix[pos] = unit_vector
+        self.outcomes[pos] = code
+
+
+class MemoryIndex:
+    """Thread-safe registry of per-tenant vector indexes."""
+
+    def __init__(self):
+        self._tenants = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ================================================================
+    # Public API
+    # ================================================================
+
+    def search(self, business_id, query_vector, limit=3, outcome=None):
+        """
+        Scores every memory of a tenant against query_vector.
+
+        Args:
+            outcome: Optional OUTCOME_* code to restrict candidates.
+
+        Returns:
+            List of (memory_id, cosine_similarity) sorted best-first.
+        """
+        q = _normalize(query_vector)
+        if q is None or limit <= 0:
+            return []
+
+        tenant = self._get_tenant(str(business_id))
+        with self._lock:
+            n = tenant.size
+            matrix = tenant.matrix[:n]
+            outcomes = tenant.outcomes[:n].copy()
+            ids = tenant.ids[:n]
+
+        if n == 0:
+            return []
+
+        scores = matrix @ q
+        if outcome is not None:
+            candidates = np.flatnonzero(outcomes == outcome)
+            if candidates.size == 0:
+                return []
+            scores = scores[candidates]
+        else:
+            candidates = None
+
+        k = min(limit, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for i in top:
+            row = int(candidates[i]) if candidates is not None else int(i)
+            results.append((ids[row], float(scores[i])))
+        return results
+
+    def add(self, business_id, memory_id, vector, patch_outcome):
+        """Appends (or replaces) one memory row on a warm tenant index."""
+        self._upsert(business_id, memory_id, vector, patch_outcome)
+
+    def update(self, business_id, memory_id, vector, patch_outcome):
+        """Re-vectorizes an existing memory row (e.g. verified outcome)."""
+        self._upsert(business_id, memory_id, vector, patch_outcome)
+
+    def invalidate(self, business_id=None):
+        """Drops one tenant (or every tenant) so the next search reloads."""
+        with self._lock:
+            if business_id is None:
+                self._tenants.clear()
+            else:
+                self._tenants.pop(str(business_id), None)
+
+    # ================================================================
+    # Private helpers
+    # ================================================================
+
+    def _upsert(self, business_id, memory_id, vector, patch_outcome):
+        unit = _normalize(vector)
+        if unit is None:
+            return
+        with self._lock:
+            tenant = self._tenants.get(str(business_id))
+            # Cold tenants are loaded lazily on the next search — nothing to do.
+            if tenant is not None:
+                tenant.upsert(memory_id, unit, outcome_code(patch_outcome))
+
+    def _get_tenant(self, b_id_str):
+        with self._lock:
+            tenant = self._tenants.get(b_id_str)
+            if tenant is not None and time.monotonic() - tenant.loaded_at < INDEX_TTL_SECONDS:
+                self._tenants.move_to_end(b_id_str)
+                return tenant
+
+        tenant = self._load(b_id_str)
+
+        with self._lock:
+            self._tenants[b_id_str] = tenant
+            self._tenants.move_to_end(b_id_str)
+            while len(self._tenants) > MAX_TENANTS:
+                self._tenants.popitem(last=False)
+        return tenant
+
+    def _load(self, b_id_str):
+        """Builds a tenant index from MongoDB (vector + outcome only)."""
+        cursor = mongo.db.business_memory.find(
+            {"business_id": b_id_str},
+            {"vector": 1, "patch_outcome": 1},
+        )
+        tenant = _TenantIndex()
+        for doc in cursor:
+            unit = _normalize(doc.get("vector"))
+            if unit is None:
+                continue
+            tenant.upsert(doc["_id"], unit, outcome_code(doc.get("patch_outcome")))
+
+        logger.info(f"🧠 MemoryIndex loaded {tenant.size} vectors for business '{b_id_str}'")
+        return tenant
+
+
+# ====================================================================
+# Module-level singleton
+# ====================================================================
+
+memory_index = MemoryIndex()
@@ -0,0 +1,388 @@
+"""
+MetricsRollup — Pre-aggregated per-tenant daily counters.
+
+PROBLEM THIS SOLVES:
+    The dashboard, analytics routes, booking stats and the copilot's
+    analytics interpreter all recomputed counts from raw collections on
+    every request (booking stats alone issued ~20 count_documents calls).
+    Cost grew with a tenant's lifetime events.
+
+HOW IT WORKS:
+    One `tenant_daily_metrics` document per (tenant, UTC day):
+
+        {
+            "_id": "<business_id>:<YYYY-MM-DD>",
+            "business_id": "<owner user id as str>",
+            "day": <datetime, midnight UTC>,
+            "messages":  {"messages": n, "contact_messages": n, "client_messages": n},
+            "bookings":  {"consultation_bookings": n, "measurement_bookings": n,
+                          "order_inquiries": n},
+            "status":    {"<collection>": {"<status>": n}},
+            "unread":    {"<collection>": n},
+            "customers": n,
+            "visits":    n,
+            "qr_scans":  n,
+            "orders":    {"count": n, "revenue": x},
+        }
+
+    Creation counters (messages, bookings, customers, visits, qr_scans,
+    orders) are bumped with `$inc` upserts at write time.
+
+    State counters (status, unread) are bucketed by the record's CREATION
+    day, so a transition is a -1/+1 pair on that same bucket and the
+    tenant-wide total is simply the sum over all buckets.
+
+    Reads are O(days): a window is one indexed range scan over at most
+    `days` small documents.
+
+BACKFILL:
+    The first read for a tenant rebuilds its rollups from the raw
+    collections (ensure_backfilled), and `python -m scripts.rebuild_rollups`
+    rebuilds every tenant.  Increments racing a rebuild of the same tenant
+    may be lost; a later rebuild corrects them.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from app import mongo
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+ROLLUP_COLLECTION = "tenant_daily_metrics"
+STATE_COLLECTION = "tenant_metrics_state"
+
+MESSAGE_COLLECTIONS = ("messages", "contact_messages", "client_messages")
+BOOKING_COLLECTIONS = ("consultation_bookings", "measurement_bookings", "order_inquiries")
+
+# Tenants already verified as backfilled in this process
+_backfilled = set()
+
+
+def day_key(dt=None):
+    """Midnight (naive UTC) of the day containing dt (default: now)."""
+    if dt is None:
+        dt = datetime.utcnow()
+    elif dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _doc_id(business_id, day):
+    return f"{business_id}:{day.strftime('%Y-%m-%d')}"
+
+
+def merge_counters(into, counters):
+    """Recursively sums nested counter dicts."""
+    for key, value in counters.items():
+        if isinstance(value, dict):
+            merge_counters(into.setdefault(key, {}), value)
+        elif isinstance(value, (int, float)):
+            into[key] = into.get(key, 0) + value
+
+
+def _flatten(counters, prefix=""):
+    """{"a": {"b": 1}} → {"a.b": 1} for $inc."""
+    flat = {}
+    for key, value in counters.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{path}."))
+        else:
+            flat[path] = value
+    return flat
+
+
+class MetricsRollup:
+
+    # ================================================================
+    # Write path
+    # ================================================================
+
+    @staticmethod
+    def increment(business_id, counters, at=None):
+        """
+        $inc one tenant/day bucket.  Never raises — rollups must not break
+        the write they are attached to.
+
+        Args:
+            counters: Nested or dotted counter increments, e.g.
+                      {"messages.contact_messages": 1, "unread.contact_messages": 1}
+            at:       Datetime the counted record belongs to (default: now).
+        """
+        if not business_id or not counters:
+            return
+        b_id_str = str(business_id)
+        day = day_key(at)
+        try:
+            mongo.db[ROLLUP_COLLECTION].update_one(
+                {"_id": _doc_id(b_id_str, day)},
+                {
+                    "$inc": _flatten(counters),
+                    "$setOnInsert": {"business_id": b_id_str, "day": day},
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"Metrics rollup increment failed for '{b_id_str}': {e}")
+
+    @staticmethod
+    def increment_many(increments):
+        """
+        Bulk variant: increments is an iterable of (business_id, at, counters).
+        Increments for the same bucket are merged client-side first.
+        """
+        from pymongo import UpdateOne
+
+        merged = {}
+        for business_id, at, counters in increments:
+            if not business_id or not counters:
+                continue
+            b_id_str = str(business_id)
+            day = day_key(at)
+            merge_counters(merged.setdefault((b_id_str, day), {}), _flatten(counters))
+
+        if not merged:
+            return
+        ops = [
+            UpdateOne(
+                {"_id": _doc_id(b_id_str, day)},
+                {"$inc": counters, "$setOnInsert": {"business_id": b_id_str, "day": day}},
+                upsert=True,
+            )
+            for (b_id_str, day), counters in merged.items()
+        ]
+        try:
+            mongo.db[ROLLUP_COLLECTION].bulk_write(ops, ordered=False)
+        except Exception as e:
+            logger.warning(f"Metrics rollup bulk increment failed: {e}")
+
+    @staticmethod
+    def counters_for(collection, doc):
+        """Creation counters a single raw record contributes to its day bucket."""
+        if collection in MESSAGE_COLLECTIONS:
+            counters = {f"messages.{collection}": 1}
+        elif collection in BOOKING_COLLECTIONS:
+            counters = {f"bookings.{collection}": 1}
+            if doc.get("status") is not None:
+                counters[f"status.{collection}.{doc['status']}"] = 1
+        elif collection == "child_customers":
+            return {"customers": 1}
+        elif collection == "website_analytics":
+            return {"visits": 1}
+        elif collection == "qr_scans":
+            return {"qr_scans": 1}
+        elif collection == "orders":
+            try:
+                revenue = float(doc.get("total_amount") or 0)
+            except (TypeError, ValueError):
+                revenue = 0
+            return {"orders.count": 1, "orders.revenue": revenue}
+        else:
+            return {}
+        if not doc.get("is_read"):
+            counters[f"unread.{collection}"] = 1
+        return counters
+
+    @classmethod
+    def record_created(cls, business_id, collection, doc):
+        """Counts a freshly inserted raw record."""
+        at = doc.get("created_at") or doc.get("visited_at") or doc.get("scanned_at")
+        cls.increment(business_id, cls.counters_for(collection, doc), at=at)
+
+    @classmethod
+    def record_deleted(cls, business_id, collection, doc):
+        """Reverses record_created for a deleted raw record."""
+        if not doc:
+            return
+        counters = {k: -v for k, v in cls.counters_for(collection, doc).items()}
+        at = doc.get("created_at") or doc.get("visited_at") or doc.get("scanned_at")
+        cls.increment(business_id, counters, at=at)
+
+    @classmethod
+    def record_transition(cls, business_id, collection, before, after):
+        """
+        Moves a record's state counters after an update.
+
+        Args:
+            before: The record as it was (needs created_at, status, is_read).
+            after:  The fields that were $set (status and/or is_read).
+        """
+        if not before:
+            return
+        counters = {}
+        if "status" in after and after["status"] != before.get("status"):
+            if before.get("status") is not None:
+                counters[f"status.{collection}.{before['status']}"] = -1
+            if after["status"] is not None:
+                counters[f"status.{collection}.{after['status']}"] = 1
+        if "is_read" in after and bool(after["is_read"]) != bool(before.get("is_read")):
+            counters[f"unread.{collection}"] = -1 if after["is_read"] else 1
+        if counters:
+            cls.increment(business_id, counters, at=before.get("created_at"))
+
+    # ================================================================
+    # Read path
+    # ================================================================
+
+    @classmethod
+    def daily(cls, business_id, days=None, since=None, fields=None):
+        """
+        Returns the tenant's day buckets (oldest first) for the last `days`
+        days including today, or from `since`, or all-time if neither.
+
+        Args:
+            fields: Optional top-level counter names to project, e.g. ["visits"].
+        """
+        b_id_str = str(business_id)
+        cls.ensure_backfilled(b_id_str)
+
+        query = {"business_id": b_id_str}
+        if since is None and days is not None:
+            since = datetime.utcnow() - timedelta(days=days)
+        if since is not None:
+            query["day"] = {"$gte": day_key(since)}
+
+        projection = {"_id": 0}
+        if fields:
+            projection.update({"day": 1, **{f: 1 for f in fields}})
+
+        return list(
+            mongo.db[ROLLUP_COLLECTION].find(query, projection).sort("day", 1)
+        )
+
+    @classmethod
+    def totals(cls, business_id, days=None, since=None, fields=None):
+        """Sums every counter over the selected window into one nested dict."""
+        summed = {}
+        for doc in cls.daily(business_id, days=days, since=since, fields=fields):
+            doc.pop("business_id", None)
+            doc.pop("day", None)
+            merge_counters(summed, doc)
+        return summed
+
+    # ================================================================
+    # Backfill / rebuild
+    # ================================================================
+
+    @classmethod
+    def ensure_backfilled(cls, business_id):
+        """Rebuilds a tenant's rollups once if it has never been backfilled."""
+        b_id_str = str(business_id)
+        if b_id_str in _backfilled:
+            return
+        try:
+            state = mongo.db[STATE_COLLECTION].find_one({"_id": b_id_str}, {"_id": 1})
+            if not state:
+                cls.rebuild(b_id_str)
+            _backfilled.add(b_id_str)
+        except Exception as e:
+            logger.warning(f"Metrics rollup backfill failed for '{b_id_str}': {e}")
+
+    @classmethod
+    def rebuild(cls, business_id):
+        """
+        Recomputes every day bucket of one tenant from the raw collections
+        and replaces its existing rollup documents.
+        """
+        from pymongo import ReplaceOne
+
+        b_id_str = str(business_id)
+        owner_ids = [b_id_str]
+        try:
+            owner_ids.append(ObjectId(b_id_str))
+        except Exception:
+            pass
+        owner_oid = owner_ids[-1]
+
+        buckets = {}
+
+        def _add(day, counters):
+            merge_counters(buckets.setdefault(day, {}), counters)
+
+        # Messages (all three inbox collections)
+        for collection in MESSAGE_COLLECTIONS:
+            owner_field = "recipient_id" if collection == "messages" else "business_id"
+            for row in cls._group_by_day(collection, {owner_field: owner_oid}, "created_at",
+                                         {"is_read": "$is_read"}):
+                counters = {"messages": {collection: row["count"]}}
+                if not row["_id"].get("is_read"):
+                    counters["unread"] = {collection: row["count"]}
+                _add(row["_id"]["day"], counters)
+
+        # Bookings with status + unread state
+        for collection in BOOKING_COLLECTIONS:
+            for row in cls._group_by_day(collection, {"business_id": owner_oid}, "created_at",
+                                         {"status": "$status", "is_read": "$is_read"}):
+                counters = {"bookings": {collection: row["count"]}}
+                status = row["_id"].get("status")
+                if status is not None:
+                    counters["status"] = {collection: {str(status): row["count"]}}
+                if not row["_id"].get("is_read"):
+                    counters["unread"] = {collection: row["count"]}
+                _add(row["_id"]["day"], counters)
+
+        # Customers
+        for row in cls._group_by_day("child_customers", {"business_owner_id": owner_oid}, "created_at"):
+            _add(row["_id"]["day"], {"customers": row["count"]})
+
+        # Website visits (owner id stored as str or ObjectId)
+        for row in cls._group_by_day("website_analytics",
+                                     {"business_owner_id": {"$in": owner_ids}}, "visited_at"):
+            _add(row["_id"]["day"], {"visits": row["count"]})
+
+        # QR scans
+        for row in cls._group_by_day("qr_scans", {"user_id": owner_oid}, "scanned_at"):
+            _add(row["_id"]["day"], {"qr_scans": row["count"]})
+
+        # Orders — keyed by child website id, attributed to the site owner
+        from app.services.revenue_series import RevenueSeries
+        order_match = RevenueSeries.owner_match(owner_oid)
+        for row in cls._group_by_day("orders", order_match, "created_at", amount_field="total_amount"):
+            _add(row["_id"]["day"], {"orders": {"count": row["count"], "revenue": row["amount"]}})
+
+        collection = mongo.db[ROLLUP_COLLECTION]
+        ops = [
+            ReplaceOne(
+                {"_id": _doc_id(b_id_str, day)},
+                dict(counters, business_id=b_id_str, day=day),
+                upsert=True,
+            )
+            for day, counters in buckets.items()
+        ]
+        if ops:
+            collection.bulk_write(ops, ordered=False)
+        collection.delete_many({"business_id": b_id_str, "day": {"$nin": list(buckets.keys())}})
+
+        mongo.db[STATE_COLLECTION].update_one(
+            {"_id": b_id_str},
+            {"$set": {"backfilled_at": datetime.now(timezone.utc), "days": len(buckets)}},
+            upsert=True,
+        )
+        _backfilled.add(b_id_str)
+        logger.info(f"📈 Rebuilt {len(buckets)} daily metric bucket(s) for business '{b_id_str}'")
+        return len(buckets)
+
+    @staticmethod
+    def _group_by_day(collection, match, date_field, extra_keys=None, amount_field=None):
+        """$group raw records into (day, *extra_keys) buckets server-side."""
+        group_id = {"day": {"$dateTrunc": {"date": f"${date_field}", "unit": "day"}}}
+        group_id.update(extra_keys or {})
+        group = {"_id": group_id, "count": {"$sum": 1}}
+        if amount_field:
+            group["amount"] = {"$sum": {"$ifNull": [f"${amount_field}", 0]}}
+
+        pipeline = [
+            {"$match": dict(match, **{date_field: {"$type": "date"}})},
+            {"$group": group},
+        ]
+        rows = []
+        for row in mongo.db[collection].aggregate(pipeline):
+            row["_id"]["day"] = day_key(row["_id"]["day"])
+            rows.append(row)
+        return rows
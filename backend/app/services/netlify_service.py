@@ -6,13 +6,18 @@ COMPLETE FIXED VERSION - Provides website deployment and hosting through Netlify
 import requests
 from flask import current_app
 import zipfile
+import hashlib
 import io
 import base64
 import random
 import string
 from datetime import datetime
+from urllib.parse import quote
 import os
 
+# Last deployed file digests per Netlify site (digest deploys)
+DEPLOY_DIGEST_COLLECTION = "netlify_deploy_digests"
+
 class NetlifyService:
     
     def __init__(self, api_key=None):
@@ -97,51 +102,178 @@ class NetlifyService:
                 'error': str(e)
             }
     
-    def deploy_site(self, site_id, files_dict):
-        """Deploy files to a Netlify site"""
+    def deploy_site(self, site_id, files_dict, force=False):
+        """
+        Deploy files to a Netlify site.
+
+        Uses a digest deploy: the SHA1 of every file is posted as a manifest
+        and only the files Netlify reports as missing are uploaded, so a
+        patch that changes index.html re-sends only index.html.  The digests
+        of the last successful deploy are kept per site in
+        DEPLOY_DIGEST_COLLECTION; if nothing changed the deploy is skipped
+        and the previous deploy is returned (pass force=True to redeploy).
+        Falls back to a full zip upload if the digest deploy fails, or always
+        with NETLIFY_DEPLOY_MODE=zip.
+        """
         try:
-            # Create a zip file with the website files
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for file_path, content in files_dict.items():
-                    if isinstance(content, str):
-                        zip_file.writestr(file_path, content.encode())
-                    else:
-                        zip_file.writestr(file_path, content)
-            
-            zip_buffer.seek(0)
-            
-            # Deploy to Netlify
-            url = f"{self.base_url}/sites/{site_id}/deploys"
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/zip'
-            }
-            
-            response = requests.post(url, headers=headers, data=zip_buffer.getvalue(), timeout=60)
-            
-            if response.status_code in [200, 201]:
-                deploy_data = response.json()
+            payloads = self._payloads(files_dict)
+            digests = {path: hashlib.sha1(data).hexdigest() for path, data in payloads.items()}
+
+            previous = self.last_deploy(site_id)
+            if not force and previous and previous.get('files') == digests and previous.get('deploy_id'):
+                print(f"⏭️ Netlify deploy skipped for {site_id}: no files changed")
                 return {
                     'success': True,
+                    'skipped': True,
                     'deploy': {
-                        'id': deploy_data['id'],
-                        'url': deploy_data['deploy_ssl_url'],
-                        'state': deploy_data['state'],
-                        'created_at': deploy_data['created_at']
+                        'id': previous['deploy_id'],
+                        'url': previous.get('url'),
+                        'state': 'ready',
+                        'created_at': previous.get('created_at')
                     }
                 }
-            else:
+
+            result = None
+            if os.environ.get('NETLIFY_DEPLOY_MODE', 'digest').lower() != 'zip':
+                result = self._deploy_digest(site_id, payloads, digests)
+                if not result['success']:
+                    print(f"⚠️ Digest deploy failed for {site_id}, falling back to zip: {result['error']}")
+            if not result or not result['success']:
+                result = self._deploy_zip(site_id, files_dict)
+
+            if result['success']:
+                self._record_deploy(site_id, digests, result['deploy'])
+            return result
+
+        except BaseException as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def _deploy_digest(self, site_id, payloads, digests):
+        """Post the SHA1 manifest, then upload only the files Netlify asks for"""
+        url = f"{self.base_url}/sites/{site_id}/deploys"
+        response = requests.post(url, headers=self.headers, json={'files': digests}, timeout=30)
+        if response.status_code not in [200, 201]:
+            return {
+                'success': False,
+                'error': f'Deploy failed: {response.status_code} - {response.text}'
+            }
+
+        deploy_data = response.json()
+        required = set(deploy_data.get('required') or [])
+        uploaded = 0
+        for path, data in payloads.items():
+            sha = digests[path]
+            if sha not in required:
+                continue
+            # Identical files share a digest; Netlify needs each one once
+            required.discard(sha)
+            upload = requests.put(
+                f"{self.base_url}/deploys/{deploy_data['id']}/files{quote(path)}",
+                headers={
+                    'Authorization': f'Bearer {self.api_key}',
+                    'Content-Type': 'application/octet-stream'
+                },
+                data=data,
+                timeout=60
+            )
+            if upload.status_code not in [200, 201]:
                 return {
                     'success': False,
-                    'error': f'Deploy failed: {response.status_code} - {response.text}'
+                    'error': f'Upload of {path} failed: {upload.status_code} - {upload.text}'
                 }
-                
-        except BaseException as e:
+            uploaded += 1
+
+        return {
+            'success': True,
+            'uploaded': uploaded,
+            'deploy': {
+                'id': deploy_data['id'],
+                'url': deploy_data.get('deploy_ssl_url'),
+                'state': deploy_data.get('state'),
+                'created_at': deploy_data.get('created_at')
+            }
+        }
+
+    def _deploy_zip(self, site_id, files_dict):
+        """Upload every file as one zip archive"""
+        # Create a zip file with the website files
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for file_path, content in files_dict.items():
+                if isinstance(content, str):
+                    zip_file.writestr(file_path, content.encode())
+                else:
+                    zip_file.writestr(file_path, content)
+
+        zip_buffer.seek(0)
+
+        # Deploy to Netlify
+        url = f"{self.base_url}/sites/{site_id}/deploys"
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/zip'
+        }
+
+        response = requests.post(url, headers=headers, data=zip_buffer.getvalue(), timeout=60)
+
+        if response.status_code in [200, 201]:
+            deploy_data = response.json()
+            return {
+                'success': True,
+                'deploy': {
+                    'id': deploy_data['id'],
+                    'url': deploy_data['deploy_ssl_url'],
+                    'state': deploy_data['state'],
+                    'created_at': deploy_data['created_at']
+                }
+            }
+        else:
             return {
                 'success': False,
-                'error': str(e)
+                'error': f'Deploy failed: {response.status_code} - {response.text}'
             }
+
+    @classmethod
+    def file_digests(cls, files_dict):
+        """SHA1 per deploy path, as compared against the last deploy"""
+        return {path: hashlib.sha1(data).hexdigest() for path, data in cls._payloads(files_dict).items()}
+
+    @staticmethod
+    def _payloads(files_dict):
+        return {
+            '/' + file_path.replace('\\', '/').lstrip('/'): content.encode() if isinstance(content, str) else content
+            for file_path, content in files_dict.items()
+        }
+
+    @staticmethod
+    def last_deploy(site_id):
+        """Digests of the last successful deploy (None outside an app context)"""
+        try:
+            from app import mongo
+            return mongo.db[DEPLOY_DIGEST_COLLECTION].find_one({'_id': site_id})
+        except BaseException:
+            return None
+
+    @staticmethod
+    def _record_deploy(site_id, digests, deploy):
+        try:
+            from app import mongo
+            mongo.db[DEPLOY_DIGEST_COLLECTION].update_one(
+                {'_id': site_id},
+                {'$set': {
+                    'files': digests,
+                    'deploy_id': deploy.get('id'),
+                    'url': deploy.get('url'),
+                    'created_at': deploy.get('created_at'),
+                    'recorded_at': datetime.utcnow()
+                }},
+                upsert=True
+            )
+        except BaseException as e:
+            print(f"⚠️ Could not record deploy digests for {site_id}: {e}")
     
     def deploy_enhanced_website(self, business_name, website_files):
         """Deploy enhanced website with custom files (FIXED VERSION)"""
@@ -11,11 +11,13 @@ PROBLEM THIS SOLVES:
     previous predictions — not on what actually worked.
 
 HOW THIS CLOSES THE LOOP:
-    1. Periodically scans business_memory for records with
-       patch_outcome == "applied_pending_results".
+    1. Periodically drains business_memory records with
+       patch_outcome == "applied_pending_results" (keyset-paginated, so a
+       backlog is worked through in one tick rather than 20 per tick).
     2. Waits a stabilization window (STABILIZATION_SECONDS) after the patch
        was applied to allow real user traffic to accumulate.
-    3. Reads real analytics from analytics_events via event_collector.
+    3. Reads real analytics via event_collector — once per business per
+       tick, concurrently across businesses, shared by all of its records.
     4. Updates the memory record:
        - metrics_after  = observed real conversion rate
        - conversion_gain = real_rate - predicted_before
@@ -23,6 +25,9 @@ HOW THIS CLOSES THE LOOP:
        - outcome_verified_at = now()
     5. Re-generates the Gemini embedding for the updated memory_context
        so the vector index reflects observed reality, not prediction.
+       Each page of contexts is embedded in a single batch and written
+       with one bulk_write; the in-process MemoryIndex row is updated in
+       place as well.
 
 DEMO / SANDBOX MODE:
     If zero traffic has been logged for a business in the post-deployment window
@@ -36,6 +41,7 @@ DEMO / SANDBOX MODE:
 
 import logging
 import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 from app import mongo
@@ -57,65 +63,162 @@ DEMO_FALLBACK_SECONDS = 120  # 2 minutes
 # How many days of post-patch events to aggregate for the outcome window
 OUTCOME_WINDOW_DAYS = 7
 
+# Backlog draining: pending records are read PAGE_SIZE at a time until
+# none are left or MAX_RECORDS_PER_TICK have been seen; tenant summaries
+# are fetched on up to TENANT_WORKERS threads.
+PAGE_SIZE = 200
+MAX_RECORDS_PER_TICK = 5000
+TENANT_WORKERS = 8
+
 
 # ====================================================================
 # Main updater job
 # ====================================================================
 
-def run_outcome_updates(app):
+def run_outcome_updates(app, lease=None):
     """
     Entry point for the background scheduler.
-    Called every N seconds by APScheduler.
+    Called every N seconds by APScheduler, through the JobCoordinator:
+    `lease` is the held shard — only its tenants are processed.
 
     Must be called with an active Flask app context.
     """
+    from app.services.job_coordinator import LeaseLost
+
     with app.app_context():
         try:
-            _process_pending_outcomes()
+            _process_pending_outcomes(lease)
+        except LeaseLost:
+            raise
         except Exception as e:
             logger.error(f"OutcomeUpdater error: {e}")
 
 
-def _process_pending_outcomes():
+def _process_pending_outcomes(lease=None):
     """
-    Scans for memories awaiting real-world verification and updates them.
+    Drains memories awaiting real-world verification, a page at a time,
+    until the backlog (or the per-tick budget) is exhausted.  With a
+    sharded lease, records of tenants owned by other shards are skipped.
     """
     now = datetime.now(timezone.utc)
     stabilization_cutoff = now - timedelta(seconds=STABILIZATION_SECONDS)
 
-    # Find all records still in the "predicted" state that are old enough
-    pending_records = list(
+    summaries = {}   # business_id → event summary, computed once per tick
+    cursor = None
+    seen = 0
+    written = 0
+
+    with ThreadPoolExecutor(max_workers=TENANT_WORKERS) as pool:
+        while seen < MAX_RECORDS_PER_TICK:
+            page = _fetch_pending_page(stabilization_cutoff, cursor)
+            if not page:
+                break
+            cursor = (page[-1]["created_at"], page[-1]["_id"])
+            full_page = len(page) == PAGE_SIZE
+
+            if lease is not None:
+                lease.check()
+                page = [record for record in page if lease.owns(record["business_id"])]
+            seen += len(page)
+
+            if page:
+                written += _process_page(page, now, summaries, pool)
+
+            if not full_page:
+                break
+
+    if seen:
+        logger.info(
+            f"OutcomeUpdater: {seen} pending outcome(s) across {len(summaries)} "
+            f"business(es), {written} verified"
+        )
+
+
+def _fetch_pending_page(stabilization_cutoff, cursor):
+    """
+    Next page of pending records in (created_at, _id) order.  Keyset
+    pagination moves past records skipped this tick (still stabilizing)
+    instead of re-reading them.
+    """
+    query = {
+        "patch_outcome": "applied_pending_results",
+        "created_at": {"$lte": stabilization_cutoff},
+    }
+    if cursor:
+        created_at, last_id = cursor
+        query["$or"] = [
+            {"created_at": {"$gt": created_at}},
+            {"created_at": created_at, "_id": {"$gt": last_id}},
+        ]
+    return list(
         mongo.db.business_memory.find(
-            {
-                "patch_outcome": "applied_pending_results",
-                "created_at": {"$lte": stabilization_cutoff},
-            },
-            {"vector": 0},   # Exclude the heavy vector blob on first fetch
-        ).limit(20)
+            query,
+            {"vector": 0},   # Exclude the heavy vector blob
+        ).sort([("created_at", 1), ("_id", 1)]).limit(PAGE_SIZE)
     )
 
-    if not pending_records:
-        return
 
-    logger.info(f"OutcomeUpdater: processing {len(pending_records)} pending outcome(s)…")
+def _process_page(page, now, summaries, pool):
+    """
+    Evaluates one page: tenant summaries are fetched concurrently (once
+    per tenant per tick), contexts are embedded in one batch and the
+    results written with one bulk_write.  Returns records written.
+    """
+    from app.services.event_collector import event_collector
 
-    for record in pending_records:
+    missing = {record["business_id"] for record in page} - summaries.keys()
+    futures = {
+        business_id: pool.submit(
+            event_collector.get_event_summary, business_id, days=OUTCOME_WINDOW_DAYS
+        )
+        for business_id in missing
+    }
+    for business_id, future in futures.items():
+        try:
+            summaries[business_id] = future.result()
+        except Exception as e:
+            logger.error(f"OutcomeUpdater [{business_id}]: event summary failed: {e}")
+            summaries[business_id] = None
+
+    evaluated = []
+    for record in page:
+        summary = summaries.get(record["business_id"])
+        if summary is None:
+            continue
         try:
-            _update_single_outcome(record, now)
+            outcome = _evaluate_outcome(record, now, summary)
+            if outcome:
+                evaluated.append(outcome)
         except Exception as e:
             logger.error(
                 f"OutcomeUpdater: failed to update record {record.get('_id')}: {e}"
             )
 
+    if not evaluated:
+        return 0
 
-def _update_single_outcome(record, now):
-    """
-    Evaluates real analytics for a single pending memory record and
-    writes the verified outcome back to MongoDB.
-    """
-    from app.services.event_collector import event_collector
+    # Re-vectorize every updated context in ONE batched embedding call
     from app.services.business_memory import BusinessMemory
+    vectors = BusinessMemory._get_embeddings(
+        [outcome["update_fields"]["memory_context"] for outcome in evaluated]
+    )
 
+    try:
+        return _write_outcomes(evaluated, vectors)
+    except Exception as e:
+        logger.error(f"OutcomeUpdater: failed to write {len(evaluated)} outcome(s): {e}")
+        return 0
+
+
+def _evaluate_outcome(record, now, real_summary):
+    """
+    Evaluates real analytics for a single pending memory record against
+    its tenant's event summary.
+
+    Returns:
+        dict with the record and the fields to $set (minus the vector),
+        or None if the record should be skipped this round.
+    """
     business_id = record["business_id"]
     deployed_at = record["created_at"]
     predicted_before = float(record.get("metrics_before", 0))
@@ -123,10 +226,7 @@ def _update_single_outcome(record, now):
     patch_name = record.get("patch_name", "unknown_patch")
     industry_type = record.get("industry_type", "general")
 
-    # --- Step 1: Pull real event data from analytics_events ---
-    real_summary = event_collector.get_event_summary(
-        business_id, days=OUTCOME_WINDOW_DAYS
-    )
+    # --- Step 1: Real event data (the tenant's summary for this tick) ---
     real_conversion_rate = real_summary.get("booking_conversion_rate", 0.0)
     real_cta_rate = real_summary.get("cta_click_rate", 0.0)
     total_events = real_summary.get("total_events", 0)
@@ -158,7 +258,7 @@ def _update_single_outcome(record, now):
             f"OutcomeUpdater [{business_id}]: '{patch_name}' still in "
             "stabilization window, skipping."
         )
-        return
+        return None
 
     # --- Step 3: Compute real conversion gain ---
     real_gain = real_after - predicted_before
@@ -184,16 +284,11 @@ def _update_single_outcome(record, now):
     if is_demo_simulated:
         updated_context += " (demo_simulated=true)"
 
-    # --- Step 6: Re-generate vector embedding with real outcome text ---
-    new_vector = BusinessMemory._get_embedding(updated_context)
-
-    # --- Step 7: Write everything back to MongoDB ---
     update_fields = {
         "metrics_after": real_after,
         "conversion_gain": real_gain,
         "patch_outcome": outcome_label,
         "memory_context": updated_context,
-        "vector": new_vector,
         "outcome_verified_at": now,
         "outcome_window_days": OUTCOME_WINDOW_DAYS,
         "outcome_real_events": total_events,
@@ -201,15 +296,40 @@ def _update_single_outcome(record, now):
     if is_demo_simulated:
         update_fields["demo_simulated"] = True
 
-    mongo.db.business_memory.update_one(
-        {"_id": record["_id"]},
-        {"$set": update_fields},
-    )
+    return {"record": record, "update_fields": update_fields}
 
-    logger.info(
-        f"✅ OutcomeUpdater [{business_id}]: '{patch_name}' outcome verified → "
-        f"{outcome_label} "
-        f"(before={predicted_before:.1f}% after={real_after:.2f}% "
-        f"gain={real_gain:+.2f}% events={total_events} "
-        f"demo={is_demo_simulated})"
-    )
+
+def _write_outcomes(evaluated, vectors):
+    """
+    Step 6/7: attaches the re-generated embeddings and writes the verified
+    outcomes back to MongoDB (one bulk_write) and the in-process MemoryIndex.
+    """
+    from pymongo import UpdateOne
+    from app.services.memory_index import memory_index
+    from app.utils.vector_codec import encode_vector
+
+    ops = []
+    for outcome, vector in zip(evaluated, vectors):
+        outcome["update_fields"]["vector"] = encode_vector(vector)
+        ops.append(UpdateOne(
+            {"_id": outcome["record"]["_id"], "patch_outcome": "applied_pending_results"},
+            {"$set": outcome["update_fields"]},
+        ))
+    result = mongo.db.business_memory.bulk_write(ops, ordered=False)
+
+    for outcome, vector in zip(evaluated, vectors):
+        record = outcome["record"]
+        update_fields = outcome["update_fields"]
+        business_id = record["business_id"]
+        memory_index.update(business_id, record["_id"], vector, update_fields["patch_outcome"])
+
+        logger.info(
+            f"✅ OutcomeUpdater [{business_id}]: '{record.get('patch_name', 'unknown_patch')}' "
+            f"outcome verified → {update_fields['patch_outcome']} "
+            f"(before={float(record.get('metrics_before', 0)):.1f}% "
+            f"after={update_fields['metrics_after']:.2f}% "
+            f"gain={update_fields['conversion_gain']:+.2f}% "
+            f"events={update_fields['outcome_real_events']} "
+            f"demo={bool(update_fields.get('demo_simulated'))})"
+        )
+    return result.modified_count
@@ -27,9 +27,16 @@ from bson import ObjectId
 from app import mongo
 from app.services.patch_validator import PatchValidator
 from app.services.schema_renderer import SchemaRenderer
+from app.services.site_render_cache import site_render_cache
+from app.services.history_store import HistoryStore
 
 logger = logging.getLogger(__name__)
 
+# Snapshot / delta payloads and chain bookkeeping stay out of timelines
+_HISTORY_LISTING_PROJECTION = {
+    "schema_snapshot": 0, "schema_delta": 0, "encoding": 0, "chain_id": 0, "chain_index": 0,
+}
+
 
 class PatchEngine:
 
@@ -109,8 +116,7 @@ class PatchEngine:
                 "git_ref": None,
                 "deploy_ref": None,
             }
-            history_result = mongo.db.website_history.insert_one(history_record)
-            history_id = history_result.inserted_id
+            history_id = HistoryStore.record(history_record)
 
             # 3. Apply the surgical changes
             action = patch.get("action")
@@ -160,6 +166,7 @@ class PatchEngine:
                 {"business_id": b_id_str, "is_active": True},
                 {"$set": active_schema}
             )
+            site_render_cache.invalidate(b_id_str)
 
             # 6. Render & deploy
             rendered_html = SchemaRenderer.render(active_schema)
@@ -230,18 +237,19 @@ class PatchEngine:
                 if not history_entry:
                     return False, None, "No rollback point found for this business website."
 
-            restored_schema = history_entry["schema_snapshot"]
+            restored_schema = HistoryStore.snapshot(history_entry)
 
             # If targeted rollback, do NOT delete the history entry (preserve timeline)
             # If single-step undo, delete the entry to allow repeated undos
             if target_version is None:
-                mongo.db.website_history.delete_one({"_id": history_entry["_id"]})
+                HistoryStore.delete(history_entry)
 
             restored_schema["updated_at"] = datetime.now(timezone.utc)
             mongo.db.website_schemas.update_one(
                 {"business_id": b_id_str, "is_active": True},
                 {"$set": restored_schema}
             )
+            site_render_cache.invalidate(b_id_str)
 
             rendered_html = SchemaRenderer.render(restored_schema)
             cls.write_website_to_disk(b_id_str, rendered_html)
@@ -276,7 +284,7 @@ class PatchEngine:
         b_id_str = str(business_id)
         cursor = mongo.db.website_history.find(
             {"business_id": b_id_str},
-            {"schema_snapshot": 0},  # Exclude heavy snapshot data
+            _HISTORY_LISTING_PROJECTION,  # Exclude heavy snapshot data
         ).sort("timestamp", -1).limit(limit)
 
         results = []
@@ -301,7 +309,7 @@ class PatchEngine:
                     "$lte": int(to_version),
                 },
             },
-            {"schema_snapshot": 0},
+            _HISTORY_LISTING_PROJECTION,
         ).sort("schema_version", 1)
 
         results = []
@@ -329,6 +337,19 @@ class PatchEngine:
         except Exception as e:
             logger.error(f"Error writing schema site to disk: {e}")
 
+    @staticmethod
+    def netlify_files(html_content):
+        """The file set deployed to Netlify for a rendered schema site."""
+        return {
+            "index.html": html_content,
+            "_redirects": "/*    /index.html   200",
+            "_headers": """/index.html
+  Content-Type: text/html; charset=UTF-8
+/
+  Content-Type: text/html; charset=UTF-8
+"""
+        }
+
     @classmethod
     def _deploy_to_netlify(cls, business_id, html_content):
         """
@@ -351,15 +372,7 @@ class PatchEngine:
 
             from app.services.netlify_service import NetlifyService
             netlify = NetlifyService()
-            deploy_result = netlify.deploy_site(netlify_site_id, {
-                "index.html": html_content,
-                "_redirects": "/*    /index.html   200",
-                "_headers": """/index.html
-  Content-Type: text/html; charset=UTF-8
-/
-  Content-Type: text/html; charset=UTF-8
-"""
-            })
+            deploy_result = netlify.deploy_site(netlify_site_id, cls.netlify_files(html_content))
 
             if deploy_result.get("success"):
                 deploy_ref = (
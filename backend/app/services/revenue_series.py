@@ -0,0 +1,174 @@
+"""
+RevenueSeries — Order count / revenue time series in ONE aggregation.
+
+PROBLEM THIS SOLVES:
+    get_dashboard_data ran a separate orders.find() per 30-day bucket plus
+    another for the current month and summed `total_amount` in Python —
+    seven full order scans per dashboard load.
+
+HOW IT WORKS:
+    A single $match on (business_id, created_at) followed by one $group
+    keyed by bucket index (and optionally a split field such as status).
+    Buckets are contiguous windows of `bin_size` units starting at `start`:
+
+        day / week : fixed-length windows, index computed with date math
+        month      : calendar months, `start` is snapped to the 1st
+
+    The result is dense — every bucket in [start, end) is returned, empty
+    ones with zero count / revenue — so callers can chart it directly.
+    With start=None the whole history collapses into a single bucket.
+"""
+
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from app import mongo
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+UNIT_DELTAS = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+SUPPORTED_UNITS = ("day", "week", "month")
+
+
+def _add_months(dt, months):
+    """First day of the month `months` after dt's month."""
+    index = dt.year * 12 + (dt.month - 1) + months
+    return dt.replace(year=index // 12, month=index % 12 + 1, day=1,
+                      hour=0, minute=0, second=0, microsecond=0)
+
+
+class RevenueSeries:
+
+    # ================================================================
+    # Public API
+    # ================================================================
+
+    @staticmethod
+    def owner_match(owner_id):
+        """
+        Orders are keyed by child website (`business_id` = site _id); this
+        resolves an owner user id to a match over their site(s).
+        """
+        owner_oid = owner_id
+        if isinstance(owner_id, str) and ObjectId.is_valid(owner_id):
+            owner_oid = ObjectId(owner_id)
+        site_ids = [
+            site["_id"]
+            for site in mongo.db.child_websites.find(
+                {"owner_id": {"$in": [owner_oid, str(owner_oid)]}}, {"_id": 1}
+            )
+        ]
+        return {"$or": [{"business_owner_id": owner_oid}, {"business_id": {"$in": site_ids}}]}
+
+    @staticmethod
+    def lookback(unit="day", periods=30, bin_size=1, end=None):
+        """
+        Start datetime covering the last `periods` buckets ending at `end`.
+        Month buckets are calendar months, the last one being the current.
+        """
+        if unit not in SUPPORTED_UNITS:
+            raise ValueError(f"Unsupported bucket unit '{unit}'")
+        end = end or datetime.utcnow()
+        if unit == "month":
+            return _add_months(end, -(periods - 1) * bin_size)
+        return end - UNIT_DELTAS[unit] * bin_size * periods
+
+    @classmethod
+    def series(cls, match, start=None, end=None, unit="day", bin_size=1,
+               split_by=None, date_field="created_at", amount_field="total_amount"):
+        """
+        Runs the aggregation and returns a dense bucket list (oldest first):
+
+            [{"start": dt, "end": dt, "count": n, "revenue": x,
+              "by": {"<split value>": {"count": n, "revenue": x}}}, ...]
+
+        Args:
+            match:     Order filter, e.g. RevenueSeries.owner_match(user_id).
+            start:     First bucket start (see lookback); None = one
+                       all-time bucket.
+            end:       Exclusive upper bound (default: now).
+            unit:      "day", "week" or "month".
+            bin_size:  Units per bucket, e.g. unit="day", bin_size=30.
+            split_by:  Optional field to break each bucket down by
+                       (e.g. "status"); adds the "by" key.
+        """
+        if unit not in SUPPORTED_UNITS:
+            raise ValueError(f"Unsupported bucket unit '{unit}'")
+        end = end or datetime.utcnow()
+        if start is not None and unit == "month":
+            start = _add_months(start, 0)
+
+        query = dict(match)
+        if start is not None:
+            query[date_field] = {"$gte": start, "$lt": end}
+
+        group_id = {"bucket": cls._bucket_expr(start, unit, bin_size, date_field)}
+        if split_by:
+            group_id["split"] = f"${split_by}"
+
+        pipeline = [
+            {"$match": query},
+            {"$group": {
+                "_id": group_id,
+                "count": {"$sum": 1},
+                "revenue": {"$sum": f"${amount_field}"},
+            }},
+        ]
+
+        buckets = cls._empty_buckets(start, end, unit, bin_size, split_by)
+        for row in mongo.db.orders.aggregate(pipeline):
+            index = int(row["_id"]["bucket"] or 0)
+            if not 0 <= index < len(buckets):
+                continue
+            bucket = buckets[index]
+            bucket["count"] += row["count"]
+            bucket["revenue"] += row["revenue"]
+            if split_by:
+                key = row["_id"].get("split")
+                split = bucket["by"].setdefault(key, {"count": 0, "revenue": 0})
+                split["count"] += row["count"]
+                split["revenue"] += row["revenue"]
+        return buckets
+
+    # ================================================================
+    # Private helpers
+    # ================================================================
+
+    @staticmethod
+    def _bucket_expr(start, unit, bin_size, date_field):
+        """Aggregation expression for a record's 0-based bucket index."""
+        if start is None:
+            return {"$literal": 0}
+        if unit == "month":
+            months = {"$dateDiff": {"startDate": start, "endDate": f"${date_field}", "unit": "month"}}
+            return {"$floor": {"$divide": [months, bin_size]}}
+        bin_ms = (UNIT_DELTAS[unit] * bin_size).total_seconds() * 1000
+        return {"$floor": {"$divide": [{"$subtract": [f"${date_field}", start]}, bin_ms]}}
+
+    @staticmethod
+    def _empty_buckets(start, end, unit, bin_size, split_by):
+        """Zero-filled bucket list spanning [start, end)."""
+        def _bucket(bucket_start, bucket_end):
+            bucket = {"start": bucket_start, "end": bucket_end, "count": 0, "revenue": 0}
+            if split_by:
+                bucket["by"] = {}
+            return bucket
+
+        if start is None:
+            return [_bucket(None, end)]
+
+        buckets = []
+        bucket_start = start
+        while bucket_start < end:
+            if unit == "month":
+                bucket_end = _add_months(bucket_start, bin_size)
+            else:
+                bucket_end = bucket_start + UNIT_DELTAS[unit] * bin_size
+            buckets.append(_bucket(bucket_start, min(bucket_end, end)))
+            bucket_start = bucket_end
+        return buckets
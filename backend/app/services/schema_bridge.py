@@ -13,9 +13,9 @@ After a website is deployed, call create_schema_from_deployment() to:
 """
 
 import logging
-import secrets
 from datetime import datetime, timezone
 from app import mongo
+from app.services.history_store import HistoryStore
 
 logger = logging.getLogger(__name__)
 
@@ -322,7 +322,7 @@ class SchemaBridge:
                     "git_ref": None,
                     "deploy_ref": deployment_id,
                 }
-                mongo.db.website_history.insert_one(history_record)
+                HistoryStore.record(history_record)
             else:
                 # Insert new schema (Version 1)
                 schema["schema_version"] = 1
@@ -353,7 +353,7 @@ class SchemaBridge:
                     "git_ref": None,
                     "deploy_ref": deployment_id,
                 }
-                mongo.db.website_history.insert_one(history_record)
+                HistoryStore.record(history_record)
 
             # 3. Extract deployment identifiers
             netlify_site_id = None
@@ -365,8 +365,10 @@ class SchemaBridge:
             elif platform == "github":
                 website_url = deploy_result.get("website_url", "")
 
-            # 4. Generate API key for child→parent event tracking
-            api_key = f"be_{secrets.token_urlsafe(32)}"
+            # 4. Generate API key for child→parent event tracking (stored
+            #    hashed; the owner can rotate it via /events/generate-key)
+            from app.services.api_keys import ApiKeys
+            _, api_key_hash = ApiKeys.generate()
 
             # 5. Upsert child_websites record
             child_update = {
@@ -375,7 +377,7 @@ class SchemaBridge:
                 "business_type": business_info.get("business_type", "general"),
                 "website_url": website_url,
                 "platform": platform,
-                "api_key": api_key,
+                "api_key_hash": api_key_hash,
                 "updated_at": datetime.now(timezone.utc),
             }
 
@@ -385,9 +387,11 @@ class SchemaBridge:
             mongo.db.child_websites.update_one(
                 {"owner_id": b_id_str},
                 {"$set": child_update,
+                 "$unset": {"api_key": ""},
                  "$setOnInsert": {"created_at": datetime.now(timezone.utc)}},
                 upsert=True,
             )
+            ApiKeys.invalidate(b_id_str)
 
             logger.info(
                 f"✅ SchemaBridge complete: business={b_id_str}, "
@@ -15,214 +15,65 @@ template mapping.
 import os
 import logging
 from datetime import datetime
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
 
-class SchemaRenderer:
-
-    # ================================================================
-    # Color Palettes — Design Token System
-    # ================================================================
-
-    COLOR_PALETTES = {
-        "rose-gold-luxury": {
-            "primary": "#b76e79",
-            "secondary": "#3d3234",
-            "accent": "#e4b4b8",
-            "bg_light": "#faf3f3",
-            "text_dark": "#2d2426",
-            "text_light": "#ffffff",
-            "gradient": "linear-gradient(135deg, #b76e79 0%, #e4b4b8 100%)",
-        },
-        "spa-serenity": {
-            "primary": "#8fa89b",
-            "secondary": "#2c3b35",
-            "accent": "#d0dfd8",
-            "bg_light": "#f4f7f6",
-            "text_dark": "#1d2622",
-            "text_light": "#ffffff",
-            "gradient": "linear-gradient(135deg, #8fa89b 0%, #d0dfd8 100%)",
-        },
-        "lavender-luxury": {
-            "primary": "#a799b7",
-            "secondary": "#2d2430",
-            "accent": "#d6cbd9",
-            "bg_light": "#fdfbfd",
-            "text_dark": "#1c1420",
-            "text_light": "#ffffff",
-            "gradient": "linear-gradient(135deg, #a799b7 0%, #d6cbd9 100%)",
-        },
-        "royal-navy": {
-            "primary": "#1d2a44",
-            "secondary": "#0c1524",
-            "accent": "#3b5998",
-            "bg_light": "#f5f7fa",
-            "text_dark": "#0c1524",
-            "text_light": "#ffffff",
-            "gradient": "linear-gradient(135deg, #1d2a44 0%, #3b5998 100%)",
-        },
-        "emerald-gold": {
-            "primary": "#044a27",
-            "secondary": "#112217",
-            "accent": "#d4af37",
-            "bg_light": "#fcfbf7",
-            "text_dark": "#112217",
-            "text_light": "#ffffff",
-            "gradient": "linear-gradient(135deg, #044a27 0%, #d4af37 100%)",
-        },
-    }
-
-    # ================================================================
-    # Component Template Registry — deterministic mapper
-    # ================================================================
+# ====================================================================
+# Precompiled static page fragments
+# ====================================================================
 
-    COMPONENT_MAP = {
-        "hero": "_render_hero",
-        "services": "_render_services",
-        "testimonials": "_render_testimonials",
-        "team": "_render_team",
-        "booking": "_render_booking",
-        "contact": "_render_contact",
-        "footer": "_render_footer",
-        "gallery": "_render_gallery",
-        "cta": "_render_cta",
-        "pricing": "_render_pricing",
-    }
-
-    # ================================================================
-    # Main render entry point
-    # ================================================================
-
-    @classmethod
-    def render(cls, schema):
-        """
-        Compiles a dynamic component graph (WebsiteSchema dict) to a
-        fully responsive, premium static HTML page.
-        """
-        if not isinstance(schema, dict):
-            schema = schema.to_dict()
-
-        seo = schema.get("seo", {})
-        title = seo.get("title", "Break-Even Business Site")
-        description = seo.get("description", "AI-powered small business management platform.")
-        keywords = seo.get("keywords", "business, website, AI, booking, analytics")
-
-        theme = schema.get("theme", {})
-        palette_name = theme.get("palette", "spa-serenity")
-        palette = cls.COLOR_PALETTES.get(palette_name, cls.COLOR_PALETTES["spa-serenity"])
-        font_family = theme.get("font", "Inter")
-
-        # Automatically merge live products from database if available
-        business_id = schema.get("business_id")
-        if business_id:
-            try:
-                from app import mongo
-                from bson import ObjectId
-                query_id = ObjectId(business_id) if isinstance(business_id, str) else business_id
-                products = list(mongo.db.products.find({
-                    'user_id': query_id,
-                    'is_active': True
-                }))
-                if products:
-                    for section in schema.get("sections", []):
-                        if section.get("type") == "services":
-                            section["content"]["items"] = [
-                                {
-                                    "id": str(p.get("_id")),
-                                    "name": p.get("name"),
-                                    "price": f"${p.get('price')}" if p.get('price') is not None else "",
-                                    "description": p.get("description", ""),
-                                    "icon": p.get("icon", "fas fa-tag"),
-                                    "image": p.get("image", "")
-                                }
-                                for p in products
-                            ]
-                            break
-            except Exception as e:
-                logger.warning(f"Could not merge live products in SchemaRenderer.render: {e}")
-
-        css_block = cls._compile_css(palette, font_family)
-        navbar_html = cls._compile_navbar(schema)
-
-        # Deterministic section compilation via component registry
-        sections_html = ""
-        business_id_str = str(business_id) if business_id else None
-        for section in schema.get("sections", []):
-            sections_html += cls._compile_section(section, palette, business_id_str)
-
-        schema_version = schema.get("schema_version", schema.get("version", 1))
-
-        html = f'''<!DOCTYPE html>
+_PAGE_OPEN = '''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <meta name="description" content="{description}">
-    <meta name="keywords" content="{keywords}">
-    <meta name="generator" content="Break-Even AI Business OS v{schema_version}">
-    <!-- Google Fonts -->
-    <link href="https://fonts.googleapis.com/css2?family={font_family.replace(" ", "+")}:wght@300;400;600;700;800&display=swap" rel="stylesheet">
-    <!-- Tailwind CSS CDN -->
-    <script src="https://cdn.tailwindcss.com"></script>
-    <!-- FontAwesome for Premium Icons -->
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
+'''
 
-    <script>
-        tailwind.config = {{
-            theme: {{
-                extend: {{
-                    colors: {{
-                        primary: '{palette["primary"]}',
-                        secondary: '{palette["secondary"]}',
-                        accent: '{palette["accent"]}',
-                        bgLight: '{palette["bg_light"]}',
-                        textDark: '{palette["text_dark"]}'
-                    }}
-                }}
-            }}
-        }}
-    </script>
-    <style>
-        {css_block}
-    </style>
-</head>
+_BODY_OPEN = '''</head>
 <body class="bg-bgLight font-sans antialiased text-textDark">
-    {navbar_html}
+    '''
+
+_MAIN_OPEN = '''
 
     <main>
-        {sections_html}
+        '''
+
+_MAIN_CLOSE = '''
     </main>
+'''
 
+# Shared form / comments runtime, identical on every page
+_RUNTIME_JS = '''
     <!-- Unified Form Submission & Interactivity Scripts -->
     <script>
         // Custom notification banner
-        function showNotification(message, isError = false) {{
+        function showNotification(message, isError = false) {
             const notification = document.createElement("div");
-            notification.className = `fixed bottom-5 right-5 px-6 py-4 rounded-xl shadow-2xl text-white font-semibold z-50 transition-all duration-300 transform translate-y-10 opacity-0 ${{isError ? 'bg-red-500' : 'bg-green-500'}}`;
+            notification.className = `fixed bottom-5 right-5 px-6 py-4 rounded-xl shadow-2xl text-white font-semibold z-50 transition-all duration-300 transform translate-y-10 opacity-0 ${isError ? 'bg-red-500' : 'bg-green-500'}`;
             notification.innerText = message;
             document.body.appendChild(notification);
 
-            setTimeout(() => {{
+            setTimeout(() => {
                 notification.classList.remove("translate-y-10", "opacity-0");
-            }}, 100);
+            }, 100);
 
-            setTimeout(() => {{
+            setTimeout(() => {
                 notification.classList.add("translate-y-10", "opacity-0");
                 setTimeout(() => notification.remove(), 300);
-            }}, 4000);
-        }}
+            }, 4000);
+        }
 
         // Booking submission
-        async function submitBooking(event, businessId) {{
+        async function submitBooking(event, businessId) {
             event.preventDefault();
             const form = event.target;
             const webId = window.__BE_WID;
             const backendUrl = (window.__BE_BACKEND_URL || '').replace(/\/+$/, '');
             
-            let url = `${{backendUrl}}/api/public/submit-consultation`;
-            let payload = {{
+            let url = `${backendUrl}/api/public/submit-consultation`;
+            let payload = {
                 business_id: businessId,
                 customer_name: form.name.value,
                 customer_email: form.email.value,
@@ -231,17 +82,17 @@ class SchemaRenderer:
                 date: form.date.value,
                 time: form.time.value,
                 notes: form.notes ? form.notes.value : ''
-            }};
+            };
             
-            if (webId) {{
-                url = `${{backendUrl}}/api/bookings/create`;
+            if (webId) {
+                url = `${backendUrl}/api/bookings/create`;
                 payload.business_id = webId;
                 payload.attorney_name = 'Staff';
-            }} else {{
+            } else {
                 const nameParts = (form.name.value || '').trim().split(/\\s+/);
                 const firstName = nameParts[0] || '';
                 const lastName = nameParts.slice(1).join(' ') || 'Customer';
-                payload = {{
+                payload = {
                     businessId: businessId,
                     firstName: firstName,
                     lastName: lastName,
@@ -251,203 +102,409 @@ class SchemaRenderer:
                     date: form.date.value,
                     time: form.time.value,
                     caseDescription: form.notes ? form.notes.value : ''
-                }};
-            }}
+                };
+            }
 
-            try {{
-                const res = await fetch(url, {{
+            try {
+                const res = await fetch(url, {
                     method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
+                    headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify(payload)
-                }});
+                });
                 const result = await res.json();
-                if (result.success || result.message === "Booking request submitted successfully" || res.ok) {{
+                if (result.success || result.message === "Booking request submitted successfully" || res.ok) {
                     showNotification("Appointment booked successfully! A confirmation email has been sent.");
                     form.reset();
                     // Close any active booking modals
                     const activeModals = document.querySelectorAll('[id^="booking-modal-"]');
                     activeModals.forEach(modal => modal.classList.add('hidden'));
-                }} else {{
+                } else {
                     showNotification(result.error || result.message || "Booking failed. Please try again.", true);
-                }}
-            }} catch (err) {{
+                }
+            } catch (err) {
                 showNotification("A network error occurred. Please try again.", true);
-            }}
-        }}
+            }
+        }
 
         // Contact submission
-        async function submitContact(event, businessId) {{
+        async function submitContact(event, businessId) {
             event.preventDefault();
             const form = event.target;
             const webId = window.__BE_WID;
             const backendUrl = (window.__BE_BACKEND_URL || '').replace(/\/+$/, '');
             
-            let url = `${{backendUrl}}/api/public/submit-contact`;
-            let payload = {{
+            let url = `${backendUrl}/api/public/submit-contact`;
+            let payload = {
                 business_id: businessId,
                 name: form.name.value,
                 email: form.email.value,
                 subject: form.subject ? form.subject.value : 'General Inquiry',
                 message: form.message.value
-            }};
+            };
             
-            if (webId) {{
-                url = `${{backendUrl}}/api/site/${{webId}}/api/contact`;
-            }} else {{
+            if (webId) {
+                url = `${backendUrl}/api/site/${webId}/api/contact`;
+            } else {
                 const nameParts = (form.name.value || '').trim().split(/\\s+/);
                 const firstName = nameParts[0] || '';
                 const lastName = nameParts.slice(1).join(' ') || 'Customer';
-                payload = {{
+                payload = {
                     businessId: businessId,
                     firstName: firstName,
                     lastName: lastName,
                     email: form.email.value,
                     subject: form.subject ? form.subject.value : 'General Inquiry',
                     message: form.message.value
-                }};
-            }}
+                };
+            }
 
-            try {{
-                const res = await fetch(url, {{
+            try {
+                const res = await fetch(url, {
                     method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
+                    headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify(payload)
-                }});
+                });
                 const result = await res.json();
-                if (result.success || result.message === "Message sent successfully" || res.ok) {{
+                if (result.success || result.message === "Message sent successfully" || res.ok) {
                     showNotification("Message sent successfully! We will contact you soon.");
                     form.reset();
-                }} else {{
+                } else {
                     showNotification(result.error || result.message || "Message failed to send.", true);
-                }}
-            }} catch (err) {{
+                }
+            } catch (err) {
                 showNotification("A network error occurred.", true);
-            }}
-        }}
+            }
+        }
 
         // Product Comments management
-        async function fetchComments(productId) {{
-            const listContainer = document.getElementById(`comments-list-${{productId}}`);
-            const countBadge = document.getElementById(`comment-count-${{productId}}`);
+        async function fetchComments(productId) {
+            const listContainer = document.getElementById(`comments-list-${productId}`);
+            const countBadge = document.getElementById(`comment-count-${productId}`);
             if (!listContainer) return;
 
             const backendUrl = (window.__BE_BACKEND_URL || '').replace(/\/+$/, '');
-            const url = `${{backendUrl}}/api/public/products/${{productId}}/comments`;
+            const url = `${backendUrl}/api/public/products/${productId}/comments`;
 
-            try {{
+            try {
                 const res = await fetch(url);
                 const result = await res.json();
-                if (result.success && Array.isArray(result.comments)) {{
+                if (result.success && Array.isArray(result.comments)) {
                     const comments = result.comments;
                     
-                    if (countBadge) {{
+                    if (countBadge) {
                         countBadge.innerText = comments.length;
-                        if (comments.length > 0) {{
+                        if (comments.length > 0) {
                             countBadge.classList.remove('hidden');
-                        }} else {{
+                        } else {
                             countBadge.classList.add('hidden');
-                        }}
-                    }}
+                        }
+                    }
 
-                    if (comments.length === 0) {{
+                    if (comments.length === 0) {
                         listContainer.innerHTML = '<p class="text-[10px] text-gray-400 italic text-left">No comments yet. Be the first to comment!</p>';
-                    }} else {{
-                        listContainer.innerHTML = comments.map(c => {{
+                    } else {
+                        listContainer.innerHTML = comments.map(c => {
                             const dateStr = c.created_at ? new Date(c.created_at).toLocaleDateString() : '';
                             return `
                                 <div class="bg-gray-50 rounded-xl p-2.5 space-y-1 text-left">
                                     <div class="flex items-center justify-between gap-2">
-                                        <span class="text-[11px] font-bold text-textDark">${{c.name}}</span>
-                                        <span class="text-[9px] text-gray-400">${{dateStr}}</span>
+                                        <span class="text-[11px] font-bold text-textDark">${c.name}</span>
+                                        <span class="text-[9px] text-gray-400">${dateStr}</span>
                                     </div>
-                                    <p class="text-[11px] text-gray-600">${{c.comment}}</p>
+                                    <p class="text-[11px] text-gray-600">${c.comment}</p>
                                 </div>
                             `;
-                        }}).join('');
-                    }}
-                }} else {{
+                        }).join('');
+                    }
+                } else {
                     listContainer.innerHTML = '<p class="text-[10px] text-red-400 text-left">Failed to load comments.</p>';
-                }}
-            }} catch (err) {{
+                }
+            } catch (err) {
                 listContainer.innerHTML = '<p class="text-[10px] text-red-400 text-left">Error loading comments.</p>';
-            }}
-        }}
+            }
+        }
 
-        async function toggleComments(productId) {{
-            const section = document.getElementById(`comments-section-${{productId}}`);
+        async function toggleComments(productId) {
+            const section = document.getElementById(`comments-section-${productId}`);
             if (!section) return;
 
             const isHidden = section.classList.contains('hidden');
-            if (isHidden) {{
+            if (isHidden) {
                 section.classList.remove('hidden');
                 await fetchComments(productId);
-            }} else {{
+            } else {
                 section.classList.add('hidden');
-            }}
-        }}
+            }
+        }
 
-        async function submitProductComment(event, productId, businessId) {{
+        async function submitProductComment(event, productId, businessId) {
             event.preventDefault();
             const form = event.target;
             const submitBtn = form.querySelector('button[type="submit"]');
             if (submitBtn) submitBtn.disabled = true;
 
             const backendUrl = (window.__BE_BACKEND_URL || '').replace(/\/+$/, '');
-            const url = `${{backendUrl}}/api/public/products/${{productId}}/comments`;
+            const url = `${backendUrl}/api/public/products/${productId}/comments`;
             
-            const payload = {{
+            const payload = {
                 business_id: businessId,
                 name: form.name.value.trim(),
                 comment: form.comment.value.trim()
-            }};
+            };
 
-            try {{
-                const res = await fetch(url, {{
+            try {
+                const res = await fetch(url, {
                     method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
+                    headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify(payload)
-                }});
+                });
                 const result = await res.json();
-                if (result.success) {{
+                if (result.success) {
                     showNotification("Comment posted successfully!");
                     form.reset();
                     await fetchComments(productId);
-                }} else {{
+                } else {
                     showNotification(result.message || "Failed to post comment.", true);
-                }}
-            }} catch (err) {{
+                }
+            } catch (err) {
                 showNotification("A network error occurred.", true);
-            }} finally {{
+            } finally {
                 if (submitBtn) submitBtn.disabled = false;
-            }}
-        }}
+            }
+        }
 
         // On DOM load, fetch initial comment counts for all products
-        document.addEventListener("DOMContentLoaded", () => {{
-            setTimeout(() => {{
+        document.addEventListener("DOMContentLoaded", () => {
+            setTimeout(() => {
                 const productElements = document.querySelectorAll("[data-track-product-view]");
-                productElements.forEach(el => {{
+                productElements.forEach(el => {
                     const productId = el.getAttribute("data-product-id");
-                    if (productId) {{
+                    if (productId) {
                         fetchComments(productId);
-                    }}
-                }});
-            }}, 500); // Small delay to allow script environment initialization
-        }});
+                    }
+                });
+            }, 500); // Small delay to allow script environment initialization
+        });
     </script>
 </body>
 </html>
 '''
+
+
+class SchemaRenderer:
+
+    # ================================================================
+    # Color Palettes — Design Token System
+    # ================================================================
+
+    COLOR_PALETTES = {
+        "rose-gold-luxury": {
+            "primary": "#b76e79",
+            "secondary": "#3d3234",
+            "accent": "#e4b4b8",
+            "bg_light": "#faf3f3",
+            "text_dark": "#2d2426",
+            "text_light": "#ffffff",
+            "gradient": "linear-gradient(135deg, #b76e79 0%, #e4b4b8 100%)",
+        },
+        "spa-serenity": {
+            "primary": "#8fa89b",
+            "secondary": "#2c3b35",
+            "accent": "#d0dfd8",
+            "bg_light": "#f4f7f6",
+            "text_dark": "#1d2622",
+            "text_light": "#ffffff",
+            "gradient": "linear-gradient(135deg, #8fa89b 0%, #d0dfd8 100%)",
+        },
+        "lavender-luxury": {
+            "primary": "#a799b7",
+            "secondary": "#2d2430",
+            "accent": "#d6cbd9",
+            "bg_light": "#fdfbfd",
+            "text_dark": "#1c1420",
+            "text_light": "#ffffff",
+            "gradient": "linear-gradient(135deg, #a799b7 0%, #d6cbd9 100%)",
+        },
+        "royal-navy": {
+            "primary": "#1d2a44",
+            "secondary": "#0c1524",
+            "accent": "#3b5998",
+            "bg_light": "#f5f7fa",
+            "text_dark": "#0c1524",
+            "text_light": "#ffffff",
+            "gradient": "linear-gradient(135deg, #1d2a44 0%, #3b5998 100%)",
+        },
+        "emerald-gold": {
+            "primary": "#044a27",
+            "secondary": "#112217",
+            "accent": "#d4af37",
+            "bg_light": "#fcfbf7",
+            "text_dark": "#112217",
+            "text_light": "#ffffff",
+            "gradient": "linear-gradient(135deg, #044a27 0%, #d4af37 100%)",
+        },
+    }
+
+    # ================================================================
+    # Component Template Registry — deterministic mapper
+    # ================================================================
+
+    COMPONENT_MAP = {
+        "hero": "_render_hero",
+        "services": "_render_services",
+        "testimonials": "_render_testimonials",
+        "team": "_render_team",
+        "booking": "_render_booking",
+        "contact": "_render_contact",
+        "footer": "_render_footer",
+        "gallery": "_render_gallery",
+        "cta": "_render_cta",
+        "pricing": "_render_pricing",
+    }
+
+    # ================================================================
+    # Main render entry point
+    # ================================================================
+
+    @classmethod
+    def render(cls, schema, products=None, inject_tracking=True, website_id=None):
+        """
+        Compiles a dynamic component graph (WebsiteSchema dict) to a
+        fully responsive, premium static HTML page.
+
+        Args:
+            products:        Pre-fetched active product docs; fetched from
+                             MongoDB when None.
+            inject_tracking: Set False when the caller injects the tracking
+                             snippet itself.
+            website_id:      Child website id for the tracking snippet;
+                             looked up from child_websites when None.
+        """
+        if not isinstance(schema, dict):
+            schema = schema.to_dict()
+
+        seo = schema.get("seo", {})
+        title = seo.get("title", "Break-Even Business Site")
+        description = seo.get("description", "AI-powered small business management platform.")
+        keywords = seo.get("keywords", "business, website, AI, booking, analytics")
+
+        theme = schema.get("theme", {})
+        palette_name = theme.get("palette", "spa-serenity")
+        palette = cls.COLOR_PALETTES.get(palette_name, cls.COLOR_PALETTES["spa-serenity"])
+        font_family = theme.get("font", "Inter")
+
+        # Automatically merge live products from database if available
+        business_id = schema.get("business_id")
+        if business_id:
+            try:
+                from app import mongo
+                from bson import ObjectId
+                if products is None:
+                    query_id = ObjectId(business_id) if isinstance(business_id, str) else business_id
+                    products = list(mongo.db.products.find({
+                        'user_id': query_id,
+                        'is_active': True
+                    }))
+                if products:
+                    for section in schema.get("sections", []):
+                        if section.get("type") == "services":
+                            section["content"]["items"] = [
+                                {
+                                    "id": str(p.get("_id")),
+                                    "name": p.get("name"),
+                                    "price": f"${p.get('price')}" if p.get('price') is not None else "",
+                                    "description": p.get("description", ""),
+                                    "icon": p.get("icon", "fas fa-tag"),
+                                    "image": p.get("image", "")
+                                }
+                                for p in products
+                            ]
+                            break
+            except Exception as e:
+                logger.warning(f"Could not merge live products in SchemaRenderer.render: {e}")
+
+        palette_key = palette_name if palette_name in cls.COLOR_PALETTES else "spa-serenity"
+        head_assets = cls._compile_head_assets(palette_key, font_family)
+        navbar_html = cls._compile_navbar(schema)
+
+        business_id_str = str(business_id) if business_id else None
+        schema_version = schema.get("schema_version", schema.get("version", 1))
+
+        # Assemble from precompiled static fragments; sections are rendered on every call
+        parts = [
+            _PAGE_OPEN,
+            f'''    <title>{title}</title>
+    <meta name="description" content="{description}">
+    <meta name="keywords" content="{keywords}">
+    <meta name="generator" content="Break-Even AI Business OS v{schema_version}">
+''',
+            head_assets,
+            _BODY_OPEN,
+            navbar_html,
+            _MAIN_OPEN,
+        ]
+        # Deterministic section compilation via component registry
+        for section in schema.get("sections", []):
+            parts.append(cls._compile_section(section, palette, business_id_str))
+        parts.append(_MAIN_CLOSE)
+        parts.append(_RUNTIME_JS)
+        html = "".join(parts)
+
+        if not inject_tracking:
+            return html
+
         # Inject child→parent analytics tracking snippet
         try:
             from app.services.tracking_snippet import TrackingSnippet
             business_id = schema.get("business_id", "")
-            html = TrackingSnippet.inject(html, business_id=business_id)
+            html = TrackingSnippet.inject(html, business_id=business_id, website_id=website_id)
         except Exception as e:
             logger.warning(f"Could not inject tracking snippet: {e}")
 
         return html
 
+    @classmethod
+    def clear_caches(cls):
+        """Drops every memoized fragment (benchmarks / tests)."""
+        cls._compile_head_assets.cache_clear()
+        cls._navbar_html.cache_clear()
+
+    # ================================================================
+    # Head assets — fonts, Tailwind config and CSS per palette/font
+    # ================================================================
+
+    @classmethod
+    @lru_cache(maxsize=64)
+    def _compile_head_assets(cls, palette_key, font_family):
+        palette = cls.COLOR_PALETTES[palette_key]
+        css_block = cls._compile_css(palette, font_family)
+        return f'''    <!-- Google Fonts -->
+    <link href="https://fonts.googleapis.com/css2?family={font_family.replace(" ", "+")}:wght@300;400;600;700;800&display=swap" rel="stylesheet">
+    <!-- Tailwind CSS CDN -->
+    <script src="https://cdn.tailwindcss.com"></script>
+    <!-- FontAwesome for Premium Icons -->
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
+
+    <script>
+        tailwind.config = {{
+            theme: {{
+                extend: {{
+                    colors: {{
+                        primary: '{palette["primary"]}',
+                        secondary: '{palette["secondary"]}',
+                        accent: '{palette["accent"]}',
+                        bgLight: '{palette["bg_light"]}',
+                        textDark: '{palette["text_dark"]}'
+                    }}
+                }}
+            }}
+        }}
+    </script>
+    <style>
+        {css_block}
+    </style>
+'''
+
     # ================================================================
     # CSS Compilation — design token system
     # ================================================================
@@ -513,11 +570,14 @@ class SchemaRenderer:
     def _compile_navbar(cls, schema):
         seo = schema.get("seo", {})
         title = seo.get("title", "Break-Even Business")
-        sections = schema.get("sections", [])
+        section_types = tuple(sec.get("type") for sec in schema.get("sections", []))
+        return cls._navbar_html(title, section_types)
 
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def _navbar_html(cls, title, section_types):
         nav_links = ""
-        for sec in sections:
-            sec_type = sec.get("type")
+        for sec_type in section_types:
             if sec_type in ["services", "testimonials", "team", "booking", "contact", "gallery", "pricing"]:
                 label = sec_type.capitalize()
                 nav_links += f'<a href="#{sec_type}" class="text-sm font-semibold hover:text-primary transition">{label}</a>'
@@ -0,0 +1,249 @@
+"""
+SentimentPipeline — Batched, write-time sentiment scoring for messages and feedback.
+
+PROBLEM THIS SOLVES:
+    /analytics/sentiment loaded every message and feedback entry of the
+    tenant and called SentimentService.analyze_sentiment on each one —
+    one Gemini round trip per text, inside the HTTP request.  A tenant
+    with 2,000 messages meant 2,000 sequential LLM calls, repeated on
+    every page load, for scores that never change.
+
+HOW IT WORKS:
+    Scores are stored on the document once, as
+
+        sentiment: { label, score, confidence, method, analyzed_at }
+
+    (the shape the chatbot's feedback summary already reads).
+
+    Write time — routes that insert a message or feedback call
+    enqueue(collection, _id, text).  A writer thread drains the queue
+    every FLUSH_INTERVAL_SECONDS (or as soon as BATCH_SIZE texts wait),
+    scores them with SentimentService.analyze_batch — BATCH_SIZE texts
+    per Gemini prompt, TextBlob as the fallback — and writes the results
+    back with one bulk_write per collection.
+
+    Backfill — documents without a score (older data, or lost from the
+    in-memory queue on a restart) are picked up incrementally by
+    score_pending(): the scheduled backfill job sweeps every tenant, and
+    the endpoint scores up to ON_READ_LIMIT of the tenant's own before
+    reading.  Batches run concurrently on SCORING_WORKERS threads.
+
+    Read time — summary() is one $group per collection over the stored
+    labels and scores.
+"""
+
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from app import mongo
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+# collection → text field and tenant (owner) field
+SOURCES = {
+    "messages": {"text": "content", "owner": "recipient_id"},
+    "customer_feedback": {"text": "feedback_text", "owner": "business_owner_id"},
+}
+
+BATCH_SIZE = 25                 # texts per Gemini prompt
+FLUSH_INTERVAL_SECONDS = 5
+SCORING_WORKERS = 4             # concurrent batches during backfill
+
+ON_READ_LIMIT = 200             # unscored docs scored per endpoint call
+BACKFILL_INTERVAL_MINUTES = 5
+BACKFILL_DOCS_PER_RUN = 2000
+
+LABELS = ("positive", "negative", "neutral")
+
+
+class SentimentPipeline:
+
+    def __init__(self):
+        self._queue = []        # (collection, _id, text)
+        self._app = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=SCORING_WORKERS, thread_name_prefix="sentiment")
+        self._writer = threading.Thread(target=self._run, name="sentiment-writer", daemon=True)
+        self._writer.start()
+
+    # ================================================================
+    # Public API
+    # ================================================================
+
+    def enqueue(self, collection, doc_id, text):
+        """
+        Schedules a freshly written document for scoring (non-blocking).
+        Must be called inside an app context — the writer reuses that app.
+        """
+        if not text or not str(text).strip():
+            return
+        if self._app is None:
+            from flask import current_app
+            self._app = current_app._get_current_object()
+
+        with self._lock:
+            self._queue.append((collection, doc_id, str(text)))
+            full = len(self._queue) >= BATCH_SIZE
+        if full:
+            self._wakeup.set()
+
+    def score_pending(self, owner_id=None, limit=ON_READ_LIMIT, lease=None):
+        """
+        Scores documents that have no stored sentiment yet, oldest first,
+        optionally for one tenant.  Returns the number scored.
+        """
+        items = []
+        for collection, fields in SOURCES.items():
+            if lease is not None:
+                lease.check()
+            remaining = limit - len(items)
+            if remaining <= 0:
+                break
+            query = _unscored_query(fields)
+            if owner_id is not None:
+                query[fields["owner"]] = ObjectId(owner_id)
+            cursor = mongo.db[collection].find(query, {fields["text"]: 1}).sort("_id", 1).limit(remaining)
+            items.extend((collection, doc["_id"], doc[fields["text"]]) for doc in cursor)
+
+        if items:
+            self._score_and_store(items)
+        return len(items)
+
+    def pending_count(self, owner_id):
+        """Tenant documents still waiting for a score."""
+        owner = ObjectId(owner_id)
+        return sum(
+            mongo.db[collection].count_documents(dict(_unscored_query(fields), **{fields["owner"]: owner}))
+            for collection, fields in SOURCES.items()
+        )
+
+    def summary(self, owner_id):
+        """
+        Label distribution and average score from the stored scores:
+        {"distribution": {label: count}, "average_score": float,
+         "total": int, "by_source": {collection: {label: count}}}.
+        """
+        owner = ObjectId(owner_id)
+        distribution = {label: 0 for label in LABELS}
+        by_source = {}
+        total, score_sum = 0, 0.0
+
+        for collection, fields in SOURCES.items():
+            rows = mongo.db[collection].aggregate([
+                {"$match": {fields["owner"]: owner, "sentiment.label": {"$in": list(LABELS)}}},
+                {"$group": {
+                    "_id": "$sentiment.label",
+                    "count": {"$sum": 1},
+                    "score_sum": {"$sum": "$sentiment.score"},
+                }},
+            ])
+            by_source[collection] = {}
+            for row in rows:
+                distribution[row["_id"]] += row["count"]
+                by_source[collection][row["_id"]] = row["count"]
+                total += row["count"]
+                score_sum += row["score_sum"]
+
+        return {
+            "distribution": distribution,
+            "average_score": score_sum / total if total else 0,
+            "total": total,
+            "by_source": by_source,
+        }
+
+    def shutdown(self, timeout=10):
+        """Scores whatever is still queued (process exit)."""
+        self._stopped.set()
+        self._wakeup.set()
+        self._writer.join(timeout)
+        self._pool.shutdown(wait=False)
+
+    # ================================================================
+    # Private helpers
+    # ================================================================
+
+    def _run(self):
+        """Writer: drains the queue every FLUSH_INTERVAL_SECONDS or when a batch is full."""
+        while True:
+            self._wakeup.wait(FLUSH_INTERVAL_SECONDS)
+            self._wakeup.clear()
+            with self._lock:
+                items, self._queue = self._queue, []
+            if items:
+                try:
+                    with self._app.app_context():
+                        self._score_and_store(items)
+                except Exception as e:
+                    # Unscored docs are picked up again by the backfill
+                    logger.error(f"SentimentPipeline: scoring {len(items)} queued doc(s) failed: {e}")
+            if self._stopped.is_set():
+                return
+
+    def _score_and_store(self, items):
+        """Scores (collection, _id, text) items in batches and bulk-writes the results."""
+        from flask import current_app
+        from app.services.sentiment_service import SentimentService
+
+        app = current_app._get_current_object()
+        service = SentimentService()
+        batches = [items[i:i + BATCH_SIZE] for i in range(0, len(items), BATCH_SIZE)]
+
+        def _score(batch):
+            with app.app_context():
+                return service.analyze_batch([text for _, _, text in batch])
+
+        results = self._pool.map(_score, batches) if len(batches) > 1 else map(_score, batches)
+
+        now = datetime.utcnow()
+        ops = {}
+        for batch, scores in zip(batches, results):
+            for (collection, doc_id, _), result in zip(batch, scores):
+                ops.setdefault(collection, []).append(UpdateOne(
+                    {"_id": doc_id},
+                    {"$set": {"sentiment": {
+                        "label": result["sentiment"],
+                        "score": result["score"],
+                        "confidence": result.get("confidence", 0.0),
+                        "method": result.get("method"),
+                        "analyzed_at": now,
+                    }}},
+                ))
+        for collection, collection_ops in ops.items():
+            mongo.db[collection].bulk_write(collection_ops, ordered=False)
+        logger.info(f"💬 Scored sentiment for {len(items)} doc(s) in {len(batches)} batch(es)")
+
+
+def _unscored_query(fields):
+    return {"sentiment.label": {"$exists": False}, fields["text"]: {"$type": "string", "$ne": ""}}
+
+
+def run_sentiment_backfill(app, lease=None):
+    """Scheduler entry point: scores documents written without a sentiment."""
+    from app.services.job_coordinator import LeaseLost
+
+    with app.app_context():
+        try:
+            sentiment_pipeline.score_pending(limit=BACKFILL_DOCS_PER_RUN, lease=lease)
+        except LeaseLost:
+            raise
+        except Exception as e:
+            logger.error(f"Sentiment backfill failed: {e}")
+
+
+# ====================================================================
+# Module-level singleton
+# ====================================================================
+
+sentiment_pipeline = SentimentPipeline()
+atexit.register(sentiment_pipeline.shutdown)
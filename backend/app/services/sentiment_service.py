@@ -1,13 +1,14 @@
-from google import genai
 from google.genai import types as genai_types
 from textblob import TextBlob
 from flask import current_app
 import json
+from app.services.llm_transport import llm_transport
 
 class SentimentService:
     def __init__(self, api_key=None):
         self.api_key = api_key or current_app.config.get("GEMINI_API_KEY")
-        self._client = genai.Client(api_key=self.api_key) if self.api_key else None
+        # One shared client per key (pooled connections, bounded timeouts)
+        self._client = llm_transport.genai_client(self.api_key) if self.api_key else None
         self._model = "models/gemini-2.0-flash"
 
     def analyze_sentiment(self, text):
@@ -20,13 +21,15 @@ class SentimentService:
             }
 
         try:
-            if self.api_key and self._client:
+            # Skip the round trip entirely while Gemini's circuit is open
+            if self.api_key and self._client and llm_transport.is_available("gemini"):
                 prompt = (
                     "Analyze the sentiment of this text and respond ONLY in JSON format like this:\n"
                     '{ "sentiment": "positive", "score": 0.8, "confidence": 0.9 }\n'
                     f'Text: "{text}"'
                 )
-                response = self._client.models.generate_content(
+                response = llm_transport.call(
+                    "gemini", self._model, self._client.models.generate_content,
                     model=self._model,
                     contents=prompt,
                     config=genai_types.GenerateContentConfig(
@@ -45,8 +48,61 @@ class SentimentService:
             current_app.logger.warning(f"Gemini API failed: {e}")
 
         # Fallback to TextBlob
-        blob = TextBlob(text)
-        polarity = blob.sentiment.polarity
+        return self._textblob_sentiment(text)
+
+    def analyze_batch(self, texts):
+        """
+        Scores many texts with one Gemini call (a numbered list in, a JSON
+        array out), falling back to TextBlob for the whole batch or for any
+        entry Gemini leaves out.  Returns one result per text, in order,
+        shaped like analyze_sentiment().
+        """
+        results = [None] * len(texts)
+        pending = [i for i, text in enumerate(texts) if text and text.strip()]
+        for i, text in enumerate(texts):
+            if i not in pending:
+                results[i] = {"sentiment": "neutral", "score": 0.0, "confidence": 0.0, "method": "empty_text"}
+
+        if pending and self.api_key and self._client and llm_transport.is_available("gemini"):
+            try:
+                numbered = "\n".join(f'{n}. "{texts[i]}"' for n, i in enumerate(pending, 1))
+                prompt = (
+                    "Analyze the sentiment of each numbered text and respond ONLY with a JSON array, "
+                    "one object per text, like this:\n"
+                    '[{ "id": 1, "sentiment": "positive", "score": 0.8, "confidence": 0.9 }]\n'
+                    "score is between -1 (negative) and 1 (positive).\n"
+                    f"Texts:\n{numbered}"
+                )
+                response = llm_transport.call(
+                    "gemini", self._model, self._client.models.generate_content,
+                    model=self._model,
+                    contents=prompt,
+                    config=genai_types.GenerateContentConfig(
+                        temperature=0.1,
+                        max_output_tokens=60 * len(pending) + 100,
+                        response_mime_type="application/json",
+                    ),
+                )
+                for item in json.loads(response.text.strip()):
+                    n = int(item.get("id", 0))
+                    if 1 <= n <= len(pending) and item.get("sentiment") in ("positive", "negative", "neutral"):
+                        results[pending[n - 1]] = {
+                            "sentiment": item["sentiment"],
+                            "score": float(item.get("score", 0.0)),
+                            "confidence": float(item.get("confidence", 0.0)),
+                            "method": "gemini_batch",
+                        }
+            except Exception as e:
+                current_app.logger.warning(f"Gemini batch sentiment failed for {len(pending)} texts: {e}")
+
+        for i in pending:
+            if results[i] is None:
+                results[i] = self._textblob_sentiment(texts[i])
+        return results
+
+    @staticmethod
+    def _textblob_sentiment(text):
+        polarity = TextBlob(text).sentiment.polarity
         sentiment = "positive" if polarity > 0 else "negative" if polarity < 0 else "neutral"
 
         return {
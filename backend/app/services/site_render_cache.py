@@ -0,0 +1,209 @@
+"""
+SiteRenderCache — In-memory rendered pages for /site/<website_id>.
+
+PROBLEM THIS SOLVES:
+    Every page view of a child site fetched products, loaded the active
+    schema, rendered it (SchemaRenderer then queried products a second
+    time), injected the tracking snippet twice and inserted the visit
+    synchronously — the same work and the same bytes on every request.
+
+HOW IT WORKS:
+    One entry per site holds the final HTML, pre-compressed gzip and
+    brotli variants and a strong ETag per variant.  Entries are keyed by
+    (business_id, schema version, products fingerprint):
+
+        fresh (validated < REVALIDATE_SECONDS ago)
+            → served straight from memory, zero queries
+        stale
+            → three tiny projected queries rebuild the key; an unchanged
+              key just refreshes the entry, a changed one re-renders
+
+    PatchEngine.apply_patch / rollback and the product routes drop a
+    tenant's entry immediately, so the revalidation window only bounds
+    staleness for writes made outside those paths.
+"""
+
+import gzip
+import hashlib
+import logging
+import threading
+import time
+
+from bson import ObjectId
+from app import mongo
+from app.utils.ttl_cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is in requirements.txt
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================
+# Configuration
+# ====================================================================
+
+REVALIDATE_SECONDS = 30
+ENTRY_TTL_SECONDS = 3600
+MAX_SITES = 512
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+class RenderedSite:
+    """One cached page with its compressed variants."""
+
+    __slots__ = ("website_id", "owner_id", "key", "variants", "validated_at")
+
+    def __init__(self, website_id, owner_id, key, html):
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+
+        self.website_id = website_id
+        self.owner_id = owner_id
+        self.key = key
+        # encoding → (body bytes, strong ETag); ETags differ per encoding
+        self.variants = {"identity": (body, f'"{digest}"')}
+        self.variants["gzip"] = (gzip.compress(body, GZIP_LEVEL), f'"{digest}-gz"')
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body, quality=BROTLI_QUALITY), f'"{digest}-br"')
+        self.validated_at = time.monotonic()
+
+    def choose(self, accept_encodings):
+        """
+        Picks the best variant for a werkzeug Accept-Encoding header.
+        Returns (encoding, body, etag).
+        """
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and accept_encodings[encoding]:
+                body, etag = self.variants[encoding]
+                return encoding, body, etag
+        body, etag = self.variants["identity"]
+        return "identity", body, etag
+
+    def matches(self, etags):
+        """True if any variant's ETag is in the request's If-None-Match."""
+        return any(etags.contains_weak(etag.strip('"')) for _, etag in self.variants.values())
+
+
+class SiteRenderCache:
+
+    def __init__(self):
+        self._entries = TTLCache(ttl=ENTRY_TTL_SECONDS, maxsize=MAX_SITES)
+        self._owner_sites = {}
+        self._lock = threading.Lock()
+
+    # ================================================================
+    # Public API
+    # ================================================================
+
+    def get(self, website_id):
+        """
+        Returns the site's RenderedSite, rendering or revalidating as
+        needed.  Raises LookupError (with a user-facing message) if the
+        site does not exist or is inactive.
+        """
+        entry = self._entries.get(website_id)
+        if entry is not None and time.monotonic() - entry.validated_at < REVALIDATE_SECONDS:
+            return entry
+
+        website = mongo.db.child_websites.find_one(
+            {"_id": ObjectId(website_id)}, {"owner_id": 1, "is_active": 1}
+        )
+        if not website:
+            raise LookupError("Website not found")
+        if not website.get("is_active", True):
+            raise LookupError("Website is not active")
+
+        owner_id = website["owner_id"]
+        if isinstance(owner_id, str):
+            owner_id = ObjectId(owner_id)
+
+        if entry is not None and entry.key == self._current_key(owner_id):
+            entry.validated_at = time.monotonic()
+            return entry
+
+        entry = self._render(website_id, owner_id)
+        self._entries.set(website_id, entry)
+        with self._lock:
+            self._owner_sites.setdefault(str(owner_id), set()).add(website_id)
+        return entry
+
+    def invalidate(self, business_id):
+        """Drops every cached page of one business (owner user id)."""
+        with self._lock:
+            website_ids = self._owner_sites.pop(str(business_id), set())
+        for website_id in website_ids:
+            self._entries.invalidate(website_id)
+
+    def clear(self):
+        with self._lock:
+            self._owner_sites.clear()
+        self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters of the underlying entry cache."""
+        return self._entries.stats()
+
+    # ================================================================
+    # Private helpers
+    # ================================================================
+
+    @staticmethod
+    def _schema_token(schema):
+        """Schema version plus updated_at, so unversioned writes also change the key."""
+        version = schema.get("schema_version", schema.get("version", 1))
+        return f"{version}@{schema.get('updated_at')}"
+
+    @staticmethod
+    def _products_fingerprint(products):
+        """Stable hash over the active products' ids and update times."""
+        h = hashlib.sha1()
+        for p in sorted(products, key=lambda p: str(p["_id"])):
+            h.update(f"{p['_id']}:{p.get('updated_at')};".encode())
+        return h.hexdigest()
+
+    @classmethod
+    def _current_key(cls, owner_id):
+        """Cache key from projected queries only (no full documents)."""
+        schema = mongo.db.website_schemas.find_one(
+            {"business_id": str(owner_id), "is_active": True},
+            {"schema_version": 1, "version": 1, "updated_at": 1},
+        )
+        if not schema:
+            return None
+        products = mongo.db.products.find(
+            {"user_id": owner_id, "is_active": True}, {"_id": 1, "updated_at": 1}
+        )
+        return (str(owner_id), cls._schema_token(schema), cls._products_fingerprint(products))
+
+    @classmethod
+    def _render(cls, website_id, owner_id):
+        """Full render: schema + live products + a single tracking snippet."""
+        from app.services.patch_engine import PatchEngine
+        from app.services.schema_renderer import SchemaRenderer
+        from app.services.tracking_snippet import TrackingSnippet
+
+        schema = PatchEngine.get_active_schema(owner_id)
+        products = list(mongo.db.products.find({"user_id": owner_id, "is_active": True}))
+
+        html = SchemaRenderer.render(schema, products=products, inject_tracking=False)
+        html = TrackingSnippet.inject(
+            html,
+            business_id=str(owner_id),
+            backend_url=None,
+            website_id=website_id,
+        )
+
+        key = (str(owner_id), cls._schema_token(schema), cls._products_fingerprint(products))
+        logger.info(f"🧱 Rendered site {website_id} for business {owner_id} ({len(html)} bytes)")
+        return RenderedSite(website_id, owner_id, key, html)
+
+
+# ====================================================================
+# Module-level singleton
+# ====================================================================
+
+site_render_cache = SiteRenderCache()
@@ -6,6 +6,7 @@ import base64
 import json
 import logging
 from typing import Dict, Any, Optional
+from app.services.llm_transport import llm_transport
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +39,8 @@ class StabilityService:
                 }
             
             # Test with account endpoint
-            response = requests.get(
+            response = llm_transport.get(
+                "stability",
                 f"{self.base_url}/v1/user/account",
                 headers=self.headers,
                 timeout=10
@@ -95,11 +97,12 @@ class StabilityService:
                 "style_preset": self._get_style_preset(style)
             }
             
-            response = requests.post(
+            response = llm_transport.post(
+                "stability",
                 f"{self.base_url}/v1/generation/stable-diffusion-xl-1024-v1-0/text-to-image",
+                model="stable-diffusion-xl-1024-v1-0",
                 headers=self.headers,
-                json=payload,
-                timeout=60
+                json=payload
             )
             
             if response.status_code == 200:
@@ -2,16 +2,18 @@
 TrackingSnippet — Lightweight analytics tracker for deployed child websites.
 
 Generates a <script> tag that, when embedded in any deployed child website,
-automatically sends analytics events back to the main Break-Even backend
-via POST /api/events/ingest.
+automatically sends analytics events back to the main Break-Even backend.
+Events are queued client-side and flushed as batches to POST
+/api/events/batch with navigator.sendBeacon — typically one or two
+requests per page view instead of one per event.
 
 Events tracked:
     page_view      — on DOMContentLoaded
     cta_click      — click on buttons/links with cta/btn/book classes
     booking_click  — click on booking form elements
     scroll_depth   — at 25%, 50%, 75%, 100% thresholds
-    bounce         — on beforeunload if time_on_page < 10s
-    time_on_page   — on beforeunload with elapsed seconds
+    bounce         — when the page is first hidden, if time_on_page < 10s
+    time_on_page   — when the page is first hidden, with elapsed seconds
 
 The snippet is ~2KB minified and runs without any external dependencies.
 """
@@ -62,29 +64,55 @@ class TrackingSnippet:
   var WID = "{web_id_str}";
   window.__BE_WID = WID;
   window.__BE_BACKEND_URL = "{backend_url}";
-  var API = "{backend_url}/api/events/ingest";
+  var API = "{backend_url}/api/events/batch";
+  var KEY = "{api_key or ""}";
   var HEADERS = {{
     "Content-Type": "application/json",
     {api_key_header}
   }};
+  var MAX_BATCH = 20;
+  var FLUSH_DELAY_MS = 5000;
   var startTime = Date.now();
   var scrollMarks = {{}};
+  var queue = [];
+  var flushTimer = null;
+  var exitSent = false;
 
+  /* Events are coalesced and flushed as one batch — on a short timer,
+     when MAX_BATCH are queued, or when the page is hidden. */
   function send(eventType, eventData) {{
+    queue.push({{
+      event_type: eventType,
+      event_data: eventData || {{}},
+      timestamp: new Date().toISOString()
+    }});
+    if (queue.length >= MAX_BATCH) {{
+      flush();
+    }} else if (!flushTimer) {{
+      flushTimer = setTimeout(flush, FLUSH_DELAY_MS);
+    }}
+  }}
+
+  function flush() {{
+    if (flushTimer) {{
+      clearTimeout(flushTimer);
+      flushTimer = null;
+    }}
+    if (!queue.length) return;
     try {{
-      var body = JSON.stringify({{
+      var payload = {{
         business_id: BID,
-        event_type: eventType,
-        event_data: eventData || {{}},
         source_url: window.location.href,
-        timestamp: new Date().toISOString()
-      }});
-      if (navigator.sendBeacon) {{
-        var blob = new Blob([body], {{ type: "application/json" }});
-        navigator.sendBeacon(API, blob);
-      }} else {{
-        fetch(API, {{ method: "POST", headers: HEADERS, body: body, keepalive: true }});
+        events: queue.splice(0, 100)
+      }};
+      if (KEY) payload.key = KEY;
+      var body = JSON.stringify(payload);
+      /* text/plain keeps the beacon a CORS-simple request */
+      if (navigator.sendBeacon &&
+          navigator.sendBeacon(API, new Blob([body], {{ type: "text/plain" }}))) {{
+        return;
       }}
+      fetch(API, {{ method: "POST", headers: HEADERS, body: body, keepalive: true }});
     }} catch (e) {{
       /* silent fail — never break the host page */
     }}
@@ -195,14 +223,23 @@ class TrackingSnippet:
     }}, 200);
   }}, {{ passive: true }});
 
-  /* Bounce + Time on Page */
-  window.addEventListener("beforeunload", function() {{
-    var elapsed = Math.round((Date.now() - startTime) / 1000);
-    if (elapsed < 10) {{
-      send("bounce", {{ time_on_page_seconds: elapsed }});
+  /* Bounce + Time on Page — recorded once, when the page is first
+     hidden (the last reliable signal on mobile), then flushed */
+  function onExit() {{
+    if (!exitSent) {{
+      exitSent = true;
+      var elapsed = Math.round((Date.now() - startTime) / 1000);
+      if (elapsed < 10) {{
+        send("bounce", {{ time_on_page_seconds: elapsed }});
+      }}
+      send("time_on_page", {{ seconds: elapsed }});
     }}
-    send("time_on_page", {{ seconds: elapsed }});
+    flush();
+  }}
+  document.addEventListener("visibilitychange", function() {{
+    if (document.visibilityState === "hidden") onExit();
   }});
+  window.addEventListener("pagehide", onExit);
 
   /* Form Submissions */
   document.addEventListener("submit", function(e) {{
@@ -5,21 +5,39 @@ Cache layer:
     Primary:  Small LRU in-memory cache (last 200 entries) for hot-path speed.
     Backend:  MongoDB `translation_cache` collection for persistence across restarts
               and cross-user scaling. TTL index auto-expires entries after 30 days.
+
+Batch mode (translate_many, used by translate_object / translate_website_content):
+    Leaf strings of the whole content tree are collected and deduplicated,
+    LRU misses are resolved with one `$in` query, the remaining misses are
+    packed into a few JSON-array prompts (MAX_TEXTS_PER_PROMPT /
+    MAX_CHARS_PER_PROMPT) sent at most PROMPT_CONCURRENCY at a time, and
+    new translations are written back with one bulk_write.  hit_count
+    bumps happen on a background thread, off the request path.
 """
 
-import requests
 import logging
 from typing import Dict, Any
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import json
 import os
 from datetime import datetime, timezone
+from pymongo import UpdateOne
 from app import mongo
+from app.services.llm_transport import llm_transport
 
 logger = logging.getLogger(__name__)
 
 LRU_MAX_SIZE = 200
 
+# Batch translation: misses per packed Gemini prompt, and prompts in flight
+MAX_TEXTS_PER_PROMPT = 40
+MAX_CHARS_PER_PROMPT = 6000
+PROMPT_CONCURRENCY = 4
+
+# hit_count bumps are fire-and-forget on this single worker
+_hit_counter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="translation-hits")
+
 
 class TranslationService:
     """Service for handling translations using Gemini API with MongoDB + LRU cache"""
@@ -66,11 +84,7 @@ class TranslationService:
             if doc:
                 translated = doc["translated_text"]
                 self._put_lru(key, translated)
-                # Bump hit_count
-                mongo.db.translation_cache.update_one(
-                    {"_id": doc["_id"]},
-                    {"$inc": {"hit_count": 1}},
-                )
+                self._count_hits([doc["_id"]])
                 return translated
         except Exception as e:
             logger.warning(f"MongoDB translation cache lookup failed: {e}")
@@ -95,6 +109,65 @@ class TranslationService:
         except Exception as e:
             logger.warning(f"MongoDB translation cache write failed: {e}")
 
+    def _get_many_from_cache(self, source_lang, target_lang, texts):
+        """LRU first, then one `$in` query for the rest.  Returns {text: translation}."""
+        found, missing = {}, []
+        for text in texts:
+            key = self._cache_key(source_lang, target_lang, text)
+            if key in self._lru_cache:
+                self._lru_cache.move_to_end(key)
+                found[text] = self._lru_cache[key]
+            else:
+                missing.append(text)
+
+        if missing:
+            try:
+                docs = mongo.db.translation_cache.find(
+                    {"source_lang": source_lang, "target_lang": target_lang, "source_text": {"$in": missing}},
+                    {"source_text": 1, "translated_text": 1}
+                )
+                hit_ids = []
+                for doc in docs:
+                    found[doc["source_text"]] = doc["translated_text"]
+                    self._put_lru(self._cache_key(source_lang, target_lang, doc["source_text"]), doc["translated_text"])
+                    hit_ids.append(doc["_id"])
+                self._count_hits(hit_ids)
+            except Exception as e:
+                logger.warning(f"MongoDB translation cache batch lookup failed: {e}")
+
+        return found
+
+    def _put_many_to_cache(self, source_lang, target_lang, translations):
+        """Write {text: translation} to the LRU and MongoDB (one bulk_write)."""
+        now = datetime.now(timezone.utc)
+        ops = []
+        for text, translated_text in translations.items():
+            self._put_lru(self._cache_key(source_lang, target_lang, text), translated_text)
+            ops.append(UpdateOne(
+                {"source_lang": source_lang, "target_lang": target_lang, "source_text": text},
+                {"$set": {"translated_text": translated_text, "created_at": now, "hit_count": 1}},
+                upsert=True,
+            ))
+        if not ops:
+            return
+        try:
+            mongo.db.translation_cache.bulk_write(ops, ordered=False)
+        except Exception as e:
+            logger.warning(f"MongoDB translation cache bulk write failed: {e}")
+
+    def _count_hits(self, doc_ids):
+        """Bumps hit_count in the background so cache hits never wait on a write."""
+        if not doc_ids:
+            return
+
+        def _bump():
+            try:
+                mongo.db.translation_cache.update_many({"_id": {"$in": doc_ids}}, {"$inc": {"hit_count": 1}})
+            except Exception as e:
+                logger.warning(f"MongoDB translation hit count update failed: {e}")
+
+        _hit_counter.submit(_bump)
+
     def _put_lru(self, key, value):
         """Add to LRU, evicting oldest if full."""
         if key in self._lru_cache:
@@ -183,7 +256,9 @@ Text to translate: {text}"""
             url = f"{self.gemini_api_url}?key={self.gemini_api_key}"
 
             logger.info(f"Making Gemini API request for: {text[:50]}...")
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = llm_transport.post(
+                "gemini", url, model="gemini-2.5-flash", json=payload, headers=headers
+            )
 
             if response.status_code == 200:
                 result = response.json()
@@ -206,6 +281,115 @@ Text to translate: {text}"""
             logger.error(f"Error calling Gemini API: {e}")
             return text
 
+    def translate_many(self, texts, target_lang='en', source_lang='en') -> Dict[str, str]:
+        """
+        Translates many strings with a handful of round trips: deduplicate,
+        resolve cache hits in one query, pack the misses into a few
+        concurrent Gemini prompts, write back with one bulk_write.
+        Returns {text: translation} for every input text.
+        """
+        unique = list(dict.fromkeys(text for text in texts if isinstance(text, str)))
+        result = {text: text for text in unique}
+        if target_lang == source_lang or target_lang not in self.supported_languages:
+            return result
+
+        pending = [text for text in unique if text.strip()]
+        cached = self._get_many_from_cache(source_lang, target_lang, pending)
+        result.update(cached)
+        misses = [text for text in pending if text not in cached]
+        if not misses:
+            return result
+
+        batches = self._pack_prompts(misses)
+        logger.info(
+            f"Translating {len(misses)} of {len(unique)} unique strings to {target_lang} "
+            f"in {len(batches)} prompt(s) ({len(cached)} cache hits)"
+        )
+        with ThreadPoolExecutor(max_workers=min(PROMPT_CONCURRENCY, len(batches))) as pool:
+            translated = list(pool.map(
+                lambda batch: self._translate_batch_with_gemini(batch, target_lang, source_lang), batches
+            ))
+
+        fresh = {}
+        for batch, outputs in zip(batches, translated):
+            for text, output in zip(batch, outputs or [None] * len(batch)):
+                if output:
+                    fresh[text] = output
+                else:
+                    # Not cached, so a failed prompt is retried next time
+                    result[text] = self._fallback_translate(text, target_lang)
+        result.update(fresh)
+        self._put_many_to_cache(source_lang, target_lang, fresh)
+        return result
+
+    def _pack_prompts(self, texts):
+        """Splits texts into prompt-sized batches (by count and total length)."""
+        batches, current, size = [], [], 0
+        for text in texts:
+            if current and (len(current) >= MAX_TEXTS_PER_PROMPT or size + len(text) > MAX_CHARS_PER_PROMPT):
+                batches.append(current)
+                current, size = [], 0
+            current.append(text)
+            size += len(text)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _translate_batch_with_gemini(self, texts, target_lang, source_lang='en'):
+        """
+        Translates a list of texts with one Gemini call (JSON array in, JSON
+        array out).  Returns the translations in order, or None on failure.
+        """
+        try:
+            lang_names = {
+                'en': 'English',
+                'te': 'Telugu',
+                'hi': 'Hindi'
+            }
+
+            source_name = lang_names.get(source_lang, 'English')
+            target_name = lang_names.get(target_lang, 'English')
+
+            prompt = f"""Translate each string in the following JSON array from {source_name} to {target_name}.
+Return only a JSON array of the translated strings, in the same order and with the same length.
+Keep placeholders, URLs, numbers and brand names unchanged.
+
+{json.dumps(texts, ensure_ascii=False)}"""
+
+            payload = {
+                "contents": [{
+                    "parts": [{
+                        "text": prompt
+                    }]
+                }],
+                "generationConfig": {
+                    "responseMimeType": "application/json"
+                }
+            }
+
+            url = f"{self.gemini_api_url}?key={self.gemini_api_key}"
+            response = llm_transport.post(
+                "gemini", url, model="gemini-2.5-flash", json=payload,
+                headers={'Content-Type': 'application/json'}
+            )
+
+            if response.status_code != 200:
+                logger.error(f"Gemini batch translation error: {response.status_code} - {response.text}")
+                return None
+
+            content = response.json()['candidates'][0]['content']['parts'][0]['text'].strip()
+            if content.startswith('```'):
+                content = content.strip('`').removeprefix('json').strip()
+            translations = json.loads(content)
+            if not isinstance(translations, list) or len(translations) != len(texts):
+                logger.warning(f"Gemini batch translation returned {len(translations)} items for {len(texts)}")
+                return None
+            return [t.strip() if isinstance(t, str) else None for t in translations]
+
+        except Exception as e:
+            logger.error(f"Error calling Gemini API for batch translation: {e}")
+            return None
+
     def _fallback_translate(self, text, target_lang):
         """Fallback translations for common UI elements"""
         fallback_translations = {
@@ -259,26 +443,37 @@ Text to translate: {text}"""
         """
         Recursively translate all strings in an object (dict, list, or string)
         """
-        if isinstance(obj, str):
-            return self.translate_text(obj, target_lang, source_lang)
-        elif isinstance(obj, dict):
-            return {key: self.translate_object(value, target_lang, source_lang) for key, value in obj.items()}
-        elif isinstance(obj, list):
-            return [self.translate_object(item, target_lang, source_lang) for item in obj]
-        else:
-            return obj
+        strings = []
+        self._collect_strings(obj, strings)
+        translations = self.translate_many(strings, target_lang, source_lang)
+        return self._replace_strings(obj, translations)
 
     def translate_website_content(self, content: Dict, target_lang: str, source_lang: str = 'en') -> Dict:
         """
         Translate website content structure
         """
-        translated_content = {}
+        logger.info(f"Translating {len(content)} sections to {target_lang}")
+        return self.translate_object(content, target_lang, source_lang)
 
-        for section, data in content.items():
-            logger.info(f"Translating section: {section}")
-            translated_content[section] = self.translate_object(data, target_lang, source_lang)
+    def _collect_strings(self, obj, strings):
+        if isinstance(obj, str):
+            strings.append(obj)
+        elif isinstance(obj, dict):
+            for value in obj.values():
+                self._collect_strings(value, strings)
+        elif isinstance(obj, list):
+            for item in obj:
+                self._collect_strings(item, strings)
 
-        return translated_content
+    def _replace_strings(self, obj, translations):
+        if isinstance(obj, str):
+            return translations.get(obj, obj)
+        elif isinstance(obj, dict):
+            return {key: self._replace_strings(value, translations) for key, value in obj.items()}
+        elif isinstance(obj, list):
+            return [self._replace_strings(item, translations) for item in obj]
+        else:
+            return obj
 
     def get_ui_translations(self, target_lang: str) -> Dict[str, str]:
         """
@@ -290,21 +485,13 @@ Text to translate: {text}"""
             'Testimonials', 'FAQ', 'Blog', 'Subscribe'
         ]
 
-        translations = {}
-        for element in ui_elements:
-            translations[element] = self.translate_text(element, target_lang, 'en')
-
-        return translations
+        return self.translate_many(ui_elements, target_lang, 'en')
 
     def bulk_translate(self, texts: list, target_lang: str, source_lang: str = 'en') -> Dict[str, str]:
         """
         Translate multiple texts at once and return a mapping
         """
-        translations = {}
-        for text in texts:
-            if text:
-                translations[text] = self.translate_text(text, target_lang, source_lang)
-        return translations
+        return self.translate_many([text for text in texts if text], target_lang, source_lang)
 
     def clear_cache(self):
         """Clear the translation cache (both LRU and MongoDB)"""
@@ -12,6 +12,10 @@ IMPORTANT — Atlas Vector Search:
         Dimensions : 768
         Similarity : "cosine"
         Filter     : ["business_id", "industry_type", "patch_outcome"]
+
+    `vector` is stored as a float32 BSON vector binary (subtype 9), which
+    Atlas Vector Search indexes natively.  Run `python -m scripts.migrate_vectors`
+    once to convert documents written as float lists.
 """
 
 import logging
@@ -35,6 +39,16 @@ def init_database():
 
         # ── Messages ──
         mongo.db.messages.create_index([("recipient_id", 1), ("created_at", -1)])
+        # Unified inbox keyset pagination (created_at, _id) and unread filter
+        mongo.db.messages.create_index([("recipient_id", 1), ("created_at", -1), ("_id", -1)])
+        mongo.db.messages.create_index(
+            [("recipient_id", 1), ("is_read", 1), ("created_at", -1), ("_id", -1)]
+        )
+        for inbox in ("contact_messages", "client_messages"):
+            mongo.db[inbox].create_index([("business_id", 1), ("created_at", -1), ("_id", -1)])
+            mongo.db[inbox].create_index(
+                [("business_id", 1), ("is_read", 1), ("created_at", -1), ("_id", -1)]
+            )
         mongo.db.messages.create_index("is_read")
         mongo.db.messages.create_index("customer_email")
 
@@ -43,12 +57,17 @@ def init_database():
             [("business_owner_id", 1), ("email", 1)], unique=True
         )
         mongo.db.child_customers.create_index("created_at")
+        mongo.db.child_customers.create_index(
+            [("business_owner_id", 1), ("created_at", -1)]
+        )
         mongo.db.child_customers.create_index("is_subscribed")
 
         # ── Child Websites ──
         mongo.db.child_websites.create_index("owner_id", unique=True)
         mongo.db.child_websites.create_index("is_active")
         mongo.db.child_websites.create_index("industry_type")
+        # Ingestion key verification is a point read on the key hash
+        mongo.db.child_websites.create_index("api_key_hash", unique=True, sparse=True)
 
         # ── Website Analytics ──
         mongo.db.website_analytics.create_index(
@@ -70,23 +89,42 @@ def init_database():
         mongo.db.website_schemas.create_index([("business_id", 1), ("is_active", 1)])
         mongo.db.website_history.create_index([("business_id", 1), ("timestamp", -1)])
         mongo.db.website_history.create_index([("business_id", 1), ("schema_version", -1)])
+        # Delta-encoded history: (chain_id, chain_index) locates every link
+        from app.services.history_store import HistoryStore
+        HistoryStore.ensure_indexes()
         mongo.db.business_memory.create_index("business_id")
         mongo.db.business_memory.create_index(
             [("industry_type", 1), ("patch_outcome", 1)]
         )
+        # OutcomeUpdater drains pending outcomes in (created_at, _id) order
+        mongo.db.business_memory.create_index(
+            [("patch_outcome", 1), ("created_at", 1), ("_id", 1)]
+        )
+        # TTL — expire cached embeddings after 90 days
+        mongo.db.embedding_cache.create_index(
+            "created_at", expireAfterSeconds=7776000
+        )
         mongo.db.pending_patches.create_index([("business_id", 1), ("is_applied", 1)])
         # TTL — expire unapplied patches after 24 hours
         mongo.db.pending_patches.create_index(
             "created_at", expireAfterSeconds=86400
         )
 
+        # ── Background job leases ──
+        from app.services.job_coordinator import JobCoordinator
+        JobCoordinator.ensure_indexes()
+
         # ── Analytics Events (Event Collector) ──
-        mongo.db.analytics_events.create_index(
-            [("business_id", 1), ("event_type", 1), ("timestamp", -1)]
-        )
-        mongo.db.analytics_events.create_index(
-            [("business_id", 1), ("timestamp", -1)]
-        )
+        # Raw layout (regular or time-series) plus hourly / daily buckets
+        from app.services.event_store import EventStore
+        EventStore.ensure_collections()
+
+        # ── Orders (keyed by child website) ──
+        mongo.db.orders.create_index([("business_id", 1), ("created_at", -1)])
+
+        # ── Tenant Daily Metric Rollups ──
+        mongo.db.tenant_daily_metrics.create_index([("business_id", 1), ("day", 1)])
+        mongo.db.qr_scans.create_index([("user_id", 1), ("scanned_at", -1)])
 
         # ── Industry Benchmark Patterns ──
         mongo.db.industry_benchmark_patterns.create_index("industry")
@@ -309,6 +347,8 @@ def create_sample_data():
 def cleanup_old_data():
     """Clean up old analytics, log data, and unbounded memory collections."""
     try:
+        from app.services.memory_index import memory_index
+
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=365)
 
         # Analytics & AI logs — older than 1 year
@@ -333,24 +373,17 @@ def cleanup_old_data():
                 mongo.db.business_memory.delete_many(
                     {"business_id": bid, "_id": {"$nin": keep_ids}}
                 )
+                memory_index.invalidate(bid)
 
         # Website history — keep only the last 50 versions per business
         pipeline_hist = [
             {"$group": {"_id": "$business_id", "count": {"$sum": 1}}},
             {"$match": {"count": {"$gt": 50}}},
         ]
+        from app.services.history_store import HistoryStore
         for group in mongo.db.website_history.aggregate(pipeline_hist):
-            bid = group["_id"]
-            keep_ids = [
-                doc["_id"]
-                for doc in mongo.db.website_history.find(
-                    {"business_id": bid}, {"_id": 1}
-                ).sort("timestamp", -1).limit(50)
-            ]
-            if keep_ids:
-                mongo.db.website_history.delete_many(
-                    {"business_id": bid, "_id": {"$nin": keep_ids}}
-                )
+            # Re-keyframes the oldest kept entry if it was a delta
+            HistoryStore.trim(group["_id"], keep=50)
 
         logger.info("Old data cleanup completed (analytics, memory, history)")
 
@@ -1,6 +1,8 @@
 from datetime import datetime, timezone
 from bson import ObjectId
+import base64
 import hashlib
+import json
 import secrets
 import string
 
@@ -59,6 +61,22 @@ def calculate_pagination(total, page, per_page):
         'next_page': next_page
     }
 
+def encode_cursor(created_at, doc_id):
+    """Opaque keyset cursor for a (created_at, _id) position; created_at may be None"""
+    stamp = created_at.isoformat() if created_at is not None else None
+    payload = json.dumps({'t': stamp, 'id': str(doc_id)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        stamp = payload['t']
+        return (datetime.fromisoformat(stamp) if stamp is not None else None), ObjectId(payload['id'])
+    except Exception as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
 def truncate_text(text, max_length=100):
     """Truncate text to specified length"""
     if not text:
@@ -0,0 +1,60 @@
+"""
+Compact vector storage for MongoDB.
+
+Embeddings are stored as BSON Binary subtype 9 (the BSON "vector" subtype
+understood by Atlas Vector Search), FLOAT32 dtype:
+
+    byte 0      : dtype tag 0x27 (FLOAT32)
+    byte 1      : padding (always 0 for float vectors)
+    bytes 2..   : little-endian float32 values
+
+A 768-dim vector is 3,074 bytes instead of ~7 KB of BSON doubles, and
+decode_vector() reads it back zero-copy with np.frombuffer.
+
+decode_vector() also accepts legacy float lists so documents written
+before scripts/migrate_vectors.py has run keep working.
+"""
+
+import numpy as np
+from bson.binary import Binary
+
+VECTOR_SUBTYPE = 9
+FLOAT32_DTYPE_TAG = 0x27
+_HEADER = bytes([FLOAT32_DTYPE_TAG, 0])
+_LE_FLOAT32 = np.dtype("<f4")
+
+
+def encode_vector(vector):
+    """Encodes a float sequence / ndarray as a float32 BSON vector Binary."""
+    if vector is None:
+        return None
+    data = np.asarray(vector, dtype=_LE_FLOAT32).ravel()
+    return Binary(_HEADER + data.tobytes(), VECTOR_SUBTYPE)
+
+
+def decode_vector(value):
+    """
+    Returns a 1-D float32 ndarray for a stored vector, or None.
+
+    Binary values are decoded zero-copy (the result is read-only);
+    legacy lists are converted once.
+    """
+    if value is None:
+        return None
+    if isinstance(value, Binary) and value.subtype == VECTOR_SUBTYPE:
+        if len(value) < 2 or value[0] != FLOAT32_DTYPE_TAG:
+            return None
+        return np.frombuffer(value, dtype=_LE_FLOAT32, offset=2)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # Headerless float32 payload
+        return np.frombuffer(value, dtype=_LE_FLOAT32)
+    if isinstance(value, (list, tuple, np.ndarray)):
+        if len(value) == 0:
+            return None
+        return np.asarray(value, dtype=np.float32)
+    return None
+
+
+def is_encoded(value):
+    """True if the stored value already uses the compact Binary format."""
+    return isinstance(value, Binary) and value.subtype == VECTOR_SUBTYPE
@@ -0,0 +1,133 @@
+"""
+Micro-benchmark: SchemaRenderer throughput.
+
+Usage:
+    cd backend
+    python -m scripts.bench_schema_renderer [--count 1000] [--products 20]
+                                            [--rounds 5] [--baseline-ref REF]
+
+Renders `count` schemas (the default schema cycled through every palette,
+font and section variant, with `products` catalogue items in the services
+section) and reports renders/second — best of `rounds`.
+
+With --baseline-ref, the renderer at that git ref is loaded side by side
+and benchmarked on the same schemas, giving a before/after comparison,
+e.g. `--baseline-ref HEAD~1`.  No database is needed: products are passed
+in explicitly and the tracking snippet is skipped.
+"""
+
+import argparse
+import copy
+import importlib.util
+import subprocess
+import sys
+import os
+import tempfile
+import time
+
+# Ensure the backend root is in the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.patch_engine import PatchEngine
+from app.services.schema_renderer import SchemaRenderer
+
+RENDERER_PATH = "backend/app/services/schema_renderer.py"
+
+VARIANTS = {
+    "hero": ["hero-split", "hero-centered", "hero-luxury"],
+    "services": ["services-grid", "services-list", "services-carousel"],
+    "testimonials": ["testimonials-grid", "testimonials-carousel"],
+    "team": ["team-cards", "team-list"],
+    "booking": ["booking-embedded", "booking-modal"],
+}
+FONTS = ["Inter", "Playfair Display", "Poppins"]
+
+
+def build_schemas(count, products):
+    """`count` schemas cycling palettes, fonts, variants and titles."""
+    base = PatchEngine.create_default_schema("65f0c0ffee0000000000abcd")
+    palettes = list(SchemaRenderer.COLOR_PALETTES)
+    items = [
+        {
+            "id": f"65f0c0ffee00000000{i:06d}",
+            "name": f"Product {i}",
+            "price": f"${10 + i}",
+            "description": "Handcrafted with care and finished to order.",
+            "icon": "fas fa-tag",
+            "image": f"https://example.com/products/{i}.jpg",
+        }
+        for i in range(products)
+    ]
+
+    schemas = []
+    for i in range(count):
+        schema = copy.deepcopy(base)
+        schema["theme"] = {"palette": palettes[i % len(palettes)], "font": FONTS[i % len(FONTS)]}
+        schema["seo"]["title"] = f"Business {i % 100}"
+        schema["schema_version"] = i % 9 + 1
+        for section in schema["sections"]:
+            variants = VARIANTS.get(section["type"])
+            if variants:
+                section["variant"] = variants[(i // len(palettes)) % len(variants)]
+            if section["type"] == "services" and items:
+                section["content"]["items"] = copy.deepcopy(items)
+        schemas.append(schema)
+    return schemas
+
+
+def load_baseline(ref):
+    """Imports the renderer module as it was at a git ref."""
+    source = subprocess.run(
+        ["git", "show", f"{ref}:{RENDERER_PATH}"],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    path = os.path.join(tempfile.mkdtemp(), "schema_renderer_baseline.py")
+    with open(path, "w") as f:
+        f.write(source)
+    spec = importlib.util.spec_from_file_location("schema_renderer_baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.SchemaRenderer
+
+
+def bench(renderer, schemas, rounds):
+    """Best-of-`rounds` renders/second."""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for schema in schemas:
+            renderer.render(schema, products=[], inject_tracking=False)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(schemas) / best
+
+
+def run_benchmark(count=1000, products=20, rounds=5, baseline_ref=None):
+    schemas = build_schemas(count, products)
+    print(f"\n📊 Rendering {count} schemas ({products} products each), best of {rounds}")
+
+    results = {}
+    if baseline_ref:
+        results[f"baseline ({baseline_ref})"] = bench(load_baseline(baseline_ref), schemas, rounds)
+
+    SchemaRenderer.clear_caches()
+    results["current"] = bench(SchemaRenderer, schemas, rounds)
+
+    print(f"\n{'='*50}")
+    for label, throughput in results.items():
+        print(f"  {label:<28} {throughput:>10,.0f} renders/s  ({1e6 / throughput:,.1f} µs/render)")
+    if baseline_ref:
+        before, after = results[f"baseline ({baseline_ref})"], results["current"]
+        print(f"  speed-up: {after / before:.2f}x")
+    print(f"{'='*50}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SchemaRenderer throughput")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--baseline-ref", help="git ref to compare against, e.g. HEAD~1")
+    args = parser.parse_args()
+    run_benchmark(count=args.count, products=args.products, rounds=args.rounds,
+                  baseline_ref=args.baseline_ref)
@@ -236,7 +236,7 @@ def step1_child_website():
         print(f"     business_type: {child.get('business_type')}")
         print(f"     website_url: {child.get('website_url', 'N/A')}")
         print(f"     netlify_site_id: {child.get('netlify_site_id', 'N/A')}")
-        print(f"     api_key: {child.get('api_key', 'N/A')[:20]}..." if child.get('api_key') else "     api_key: N/A")
+        print(f"     api_key_hash: {child.get('api_key_hash', 'N/A')[:20]}..." if child.get('api_key_hash') else "     api_key_hash: N/A")
 
     # Check website_schemas
     schema = db.website_schemas.find_one({"business_id": user_id, "is_active": True})
@@ -548,9 +548,9 @@ def step7_analytics_events():
     user_id = state["user_id"]
     db = state["db"]
 
-    # Check if child_websites has an API key for this business
-    child = db.child_websites.find_one({"owner_id": user_id})
-    api_key = child.get("api_key") if child else None
+    # Keys are stored hashed, so rotate one to get a usable plaintext key
+    status, body = api("POST", f"/events/generate-key/{user_id}", token=state["token"])
+    api_key = body.get("api_key") if status == 200 else None
     headers_extra = {}
     if api_key:
         headers_extra["X-BE-Key"] = api_key
@@ -585,7 +585,9 @@ def step7_analytics_events():
     time.sleep(12)
 
     # Verify in MongoDB
-    events_count = db.analytics_events.count_documents({"business_id": user_id})
+    events_count = db.analytics_events.count_documents(
+        {"$or": [{"business_id": user_id}, {"meta.business_id": user_id}]}
+    )
     # Also check 'events' collection as alternate name
     if events_count == 0:
         events_count = db.events.count_documents({"business_id": user_id})
@@ -647,10 +649,17 @@ def step8_rag_memory():
 
         # Check vector field
         vector = latest.get("vector")
-        if vector and isinstance(vector, list):
+        if isinstance(vector, bytes):
+            # float32 BSON vector binary: 2-byte header + 4 bytes per dimension
+            vector_dims = (len(vector) - 2) // 4
+        elif isinstance(vector, list):
+            vector_dims = len(vector)
+        else:
+            vector_dims = None
+        if vector and vector_dims is not None:
             check("vector field has 768 dimensions",
-                  len(vector) == 768,
-                  f"vector dimensions: {len(vector)}")
+                  vector_dims == 768,
+                  f"vector dimensions: {vector_dims}")
         else:
             check("vector field exists",
                   vector is not None,
@@ -661,7 +670,7 @@ def step8_rag_memory():
         print(f"     industry_type: {latest.get('industry_type')}")
         print(f"     metrics_before: {latest.get('metrics_before')}")
         if vector:
-            print(f"     vector dims: {len(vector) if isinstance(vector, list) else 'N/A'}")
+            print(f"     vector dims: {vector_dims if vector_dims is not None else 'N/A'}")
     else:
         print("  ℹ️  No business_memory records. This could mean:")
         print("     - The optimization loop used the fallback (no Gemini API key)")
@@ -0,0 +1,68 @@
+"""
+Migration Script: Replace plaintext ingestion API keys with their hashes.
+
+Usage:
+    cd backend
+    python -m scripts.hash_api_keys [--dry-run]
+
+Ingestion keys (X-BE-Key) are now verified against
+child_websites.api_key_hash.  This moves every legacy plaintext
+`api_key` to `api_key_hash` (SHA-256) and removes the plaintext field,
+so existing keys keep working.  Safe to re-run.
+"""
+
+import argparse
+import sys
+import os
+
+# Ensure the backend root is in the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dotenv import load_dotenv
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+from app import create_app
+from app.services.api_keys import ApiKeys
+
+
+def run_migration(dry_run=False):
+    """Hash every child_websites.api_key still stored in plaintext."""
+    app = create_app()
+
+    with app.app_context():
+        from app import mongo
+
+        sites = list(mongo.db.child_websites.find(
+            {"api_key": {"$exists": True, "$nin": [None, ""]}},
+            {"api_key": 1, "owner_id": 1},
+        ))
+        print(f"\n🔑 Found {len(sites)} site(s) with plaintext API keys")
+
+        migrated = 0
+        errors = 0
+        for site in sites:
+            try:
+                if not dry_run:
+                    mongo.db.child_websites.update_one(
+                        {"_id": site["_id"]},
+                        {"$set": {"api_key_hash": ApiKeys.hash_key(site["api_key"])},
+                         "$unset": {"api_key": ""}},
+                    )
+                migrated += 1
+                print(f"  ✅ {site.get('owner_id')}")
+            except Exception as e:
+                errors += 1
+                print(f"  ❌ {site.get('owner_id')}: {e}")
+
+        print(f"\n{'='*50}")
+        print(f"Migration complete!{' (dry run)' if dry_run else ''}")
+        print(f"  ✅ Migrated: {migrated}")
+        print(f"  ❌ Errors:   {errors}")
+        print(f"{'='*50}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hash plaintext ingestion API keys")
+    parser.add_argument("--dry-run", action="store_true", help="List affected sites without writing")
+    args = parser.parse_args()
+    run_migration(dry_run=args.dry_run)
@@ -0,0 +1,111 @@
+"""
+Migration Script: Convert analytics_events to a MongoDB time-series collection.
+
+Usage:
+    cd backend
+    python -m scripts.migrate_events_timeseries [--drop-legacy] [--batch-size 1000]
+
+Stop the backend first — the EventCollector writer must not insert while
+the collection is being swapped, and running processes cache the layout.
+
+Steps:
+    1. Folds every raw event into the hourly / daily buckets
+       (EventStore.downsample), so history older than the raw retention
+       window survives as buckets.
+    2. Renames analytics_events → analytics_events_legacy.
+    3. Creates analytics_events as a time-series collection
+       (metaField: {business_id, event_type}, timeField: timestamp).
+    4. Copies events still inside RAW_RETENTION_DAYS across, converting
+       each to the time-series layout.
+    5. Recreates the indexes; with --drop-legacy, drops the old collection.
+"""
+
+import argparse
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Ensure the backend root is in the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dotenv import load_dotenv
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+from app import create_app
+from app.services.event_store import EventStore, RAW_COLLECTION, RAW_RETENTION_DAYS
+
+LEGACY_COLLECTION = f"{RAW_COLLECTION}_legacy"
+
+
+def run_migration(drop_legacy=False, batch_size=1000):
+    """Swap analytics_events for a time-series collection, copying recent events."""
+    app = create_app()
+
+    with app.app_context():
+        from app import mongo
+
+        if EventStore.is_timeseries():
+            print("\n✅ analytics_events is already a time-series collection")
+            return
+        if LEGACY_COLLECTION in mongo.db.list_collection_names():
+            print(f"\n❌ {LEGACY_COLLECTION} already exists — drop or rename it first")
+            return
+
+        print("\n🗜️ Folding existing events into hourly / daily buckets...")
+        folded = EventStore.downsample(max_slices=100000)
+        print(f"  ✅ {folded} event(s) downsampled")
+
+        mongo.db[RAW_COLLECTION].rename(LEGACY_COLLECTION)
+        EventStore.create_timeseries_collection()
+
+        cutoff = datetime.utcnow() - timedelta(days=RAW_RETENTION_DAYS)
+        legacy = mongo.db[LEGACY_COLLECTION]
+        target = mongo.db[RAW_COLLECTION]
+        total = legacy.count_documents({"timestamp": {"$gte": cutoff}})
+        print(f"\n📦 Copying {total} event(s) from the last {RAW_RETENTION_DAYS} days")
+
+        copied = 0
+        errors = 0
+        batch = []
+        for doc in legacy.find({"timestamp": {"$gte": cutoff}}).sort("_id", 1):
+            doc.pop("_id", None)
+            batch.append(EventStore.to_storage(doc))
+            if len(batch) >= batch_size:
+                copied, errors = _flush(target, batch, copied, errors)
+                print(f"  … {copied}/{total}")
+        copied, errors = _flush(target, batch, copied, errors)
+
+        EventStore.ensure_collections()
+
+        if drop_legacy and not errors:
+            legacy.drop()
+            print(f"  🗑️ Dropped {LEGACY_COLLECTION}")
+
+        print(f"\n{'='*50}")
+        print(f"Migration complete!")
+        print(f"  ✅ Copied: {copied}")
+        print(f"  ❌ Errors: {errors}")
+        if not drop_legacy or errors:
+            print(f"  Legacy events kept in '{LEGACY_COLLECTION}'")
+        print(f"{'='*50}\n")
+
+
+def _flush(target, batch, copied, errors):
+    if not batch:
+        return copied, errors
+    try:
+        target.insert_many(batch, ordered=False)
+        copied += len(batch)
+    except Exception as e:
+        errors += len(batch)
+        print(f"  ❌ Batch failed: {e}")
+    batch.clear()
+    return copied, errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert analytics_events to a time-series collection")
+    parser.add_argument("--drop-legacy", action="store_true", help="Drop the old collection after copying")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    run_migration(drop_legacy=args.drop_legacy, batch_size=args.batch_size)
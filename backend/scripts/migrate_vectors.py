@@ -0,0 +1,106 @@
+"""
+Migration Script: Convert stored embedding vectors to compact float32 binaries.
+
+Usage:
+    cd backend
+    python -m scripts.migrate_vectors [--dry-run] [--batch-size N]
+
+Older business_memory (and embedding_cache) documents store `vector` as a
+list of 768 BSON doubles (~7 KB each).  This rewrites every such document
+to the float32 BSON vector binary written by app.utils.vector_codec
+(~3 KB), in bulk batches.  Documents already converted are skipped, so
+the script is safe to re-run.
+"""
+
+import argparse
+import sys
+import os
+
+# Ensure the backend root is in the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dotenv import load_dotenv
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+from pymongo import UpdateOne
+
+from app import create_app
+from app.utils.vector_codec import encode_vector
+
+COLLECTIONS = ("business_memory", "embedding_cache")
+
+
+def migrate_collection(collection, batch_size, dry_run):
+    """Rewrites list-encoded vectors in one collection. Returns (migrated, errors)."""
+    # $type "array" matches only legacy list-encoded vectors
+    cursor = collection.find(
+        {"vector": {"$type": "array"}},
+        {"vector": 1},
+        batch_size=batch_size,
+    )
+
+    migrated = 0
+    errors = 0
+    ops = []
+
+    def _flush():
+        nonlocal migrated, errors
+        if not ops:
+            return
+        if dry_run:
+            migrated += len(ops)
+        else:
+            try:
+                result = collection.bulk_write(ops, ordered=False)
+                migrated += result.modified_count
+            except Exception as e:
+                print(f"  ❌ Bulk write error: {e}")
+                errors += len(ops)
+        ops.clear()
+
+    for doc in cursor:
+        vector = doc.get("vector")
+        if not vector:
+            continue
+        ops.append(UpdateOne(
+            {"_id": doc["_id"], "vector": {"$type": "array"}},
+            {"$set": {"vector": encode_vector(vector)}},
+        ))
+        if len(ops) >= batch_size:
+            _flush()
+            print(f"  … {collection.name}: {migrated} converted so far")
+
+    _flush()
+    return migrated, errors
+
+
+def run_migration(batch_size=500, dry_run=False):
+    """Convert every list-encoded vector to the float32 binary format."""
+    app = create_app()
+
+    with app.app_context():
+        from app import mongo
+
+        totals = {}
+        for name in COLLECTIONS:
+            collection = mongo.db[name]
+            pending = collection.count_documents({"vector": {"$type": "array"}})
+            print(f"\n📊 {name}: {pending} document(s) with list-encoded vectors")
+            if pending == 0:
+                totals[name] = (0, 0)
+                continue
+            totals[name] = migrate_collection(collection, batch_size, dry_run)
+
+        print(f"\n{'='*50}")
+        print(f"Migration complete!{' (dry run — nothing written)' if dry_run else ''}")
+        for name, (migrated, errors) in totals.items():
+            print(f"  ✅ {name}: {migrated} converted, {errors} error(s)")
+        print(f"{'='*50}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert stored vectors to float32 binaries")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    run_migration(batch_size=args.batch_size, dry_run=args.dry_run)
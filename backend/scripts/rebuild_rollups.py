@@ -0,0 +1,67 @@
+"""
+Maintenance Script: Rebuild the per-tenant daily metric rollups.
+
+Usage:
+    cd backend
+    python -m scripts.rebuild_rollups [--business-id ID]
+
+Recomputes every tenant_daily_metrics bucket from the raw collections
+(messages, bookings, customers, visits, QR scans and orders) via
+MetricsRollup.rebuild.  Run it once after deploying the rollups, or
+whenever counters are suspected to have drifted.  Analytics event
+counts live in EventStore's own hourly / daily buckets.
+
+Note: rollups outlive raw records removed by cleanup_old_data, so a
+rebuild drops history older than the raw retention window.
+"""
+
+import argparse
+import sys
+import os
+
+# Ensure the backend root is in the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dotenv import load_dotenv
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+from app import create_app
+from app.services.metrics_rollup import MetricsRollup
+
+
+def run_rebuild(business_id=None):
+    """Rebuild rollups for one tenant, or for every user."""
+    app = create_app()
+
+    with app.app_context():
+        from app import mongo
+
+        if business_id:
+            business_ids = [business_id]
+        else:
+            business_ids = [str(user["_id"]) for user in mongo.db.users.find({}, {"_id": 1})]
+        print(f"\n📊 Rebuilding rollups for {len(business_ids)} tenant(s)")
+
+        rebuilt = 0
+        errors = 0
+        for b_id in business_ids:
+            try:
+                days = MetricsRollup.rebuild(b_id)
+                rebuilt += 1
+                print(f"  ✅ {b_id}: {days} day bucket(s)")
+            except Exception as e:
+                errors += 1
+                print(f"  ❌ {b_id}: {e}")
+
+        print(f"\n{'='*50}")
+        print(f"Rebuild complete!")
+        print(f"  ✅ Rebuilt: {rebuilt}")
+        print(f"  ❌ Errors:  {errors}")
+        print(f"{'='*50}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild per-tenant daily metric rollups")
+    parser.add_argument("--business-id", help="Rebuild a single tenant only")
+    args = parser.parse_args()
+    run_rebuild(business_id=args.business_id)
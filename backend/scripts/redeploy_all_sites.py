@@ -1,13 +1,40 @@
 """
-Redeploy All Sites Script: Force compiles and deploys all active schemas to Netlify and disk.
+Redeploy All Sites Script: Re-render every active schema and deploy it to Netlify and disk.
 
 Usage:
     cd backend
-    python -m scripts.redeploy_all_sites
+    python -m scripts.redeploy_all_sites [--resume | --run-id ID] [--force]
+                                         [--render-workers N] [--upload-workers N]
+                                         [--host-limit N] [--retries N] [--chunk-size N]
+
+Built for redeploying the whole fleet after a renderer change:
+
+    1. Active schemas are streamed with a cursor in chunks; each chunk's
+       products and child_websites records are fetched with one $in
+       query apiece.
+    2. Pages are rendered in a process pool (rendering is CPU-bound
+       string work), with a bounded number of chunks in flight.
+    3. Sites whose rendered files hash to the digests of their last
+       Netlify deploy are skipped; the rest are uploaded from a bounded
+       thread pool, at most --host-limit concurrent requests per API host,
+       retrying failures with exponential backoff.
+    4. Every site's outcome is checkpointed in site_redeploy_checkpoints.
+       A crashed or interrupted run continues with --resume (the latest
+       unfinished run) or --run-id, skipping sites already done.
 """
 
+import argparse
+import multiprocessing
+import random
 import sys
 import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from urllib.parse import urlparse
 
 # Ensure the backend root is in the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -19,46 +46,238 @@ from app import create_app
 from app.services.schema_renderer import SchemaRenderer
 from app.services.patch_engine import PatchEngine
 
+RUN_COLLECTION = "site_redeploy_runs"
+CHECKPOINT_COLLECTION = "site_redeploy_checkpoints"
+
+# Checkpoint statuses that count as done when resuming a run
+DONE_STATUSES = ("deployed", "unchanged", "no_site")
+
+
+def render_site(schema, products, website_id):
+    """
+    Process-pool worker: renders one schema without touching MongoDB.
+    Same output as SchemaRenderer.render(schema) on the patch / rollback
+    deploy paths — products and website_id are just resolved up front.
+    """
+    return SchemaRenderer.render(schema, products=products, website_id=website_id)
+
+
+class HostLimiter:
+    """Caps concurrent requests per API host."""
 
-def redeploy_sites():
+    def __init__(self, limit):
+        self._limit = limit
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self._limit)
+            return self._semaphores[host]
+
+
+def redeploy_sites(run_id=None, resume=False, force=False, render_workers=None,
+                   upload_workers=8, host_limit=8, retries=3, chunk_size=100):
     app = create_app()
 
     with app.app_context():
         from app import mongo
+        from app.services.netlify_service import NetlifyService
+
+        runs = mongo.db[RUN_COLLECTION]
+        checkpoints = mongo.db[CHECKPOINT_COLLECTION]
+        checkpoints.create_index([("run_id", 1), ("status", 1)])
 
-        # Find all active schemas
-        schemas = list(mongo.db.website_schemas.find({"is_active": True}))
-        print(f"\n📊 Found {len(schemas)} active schemas to redeploy")
+        if resume and not run_id:
+            last = runs.find_one({"finished_at": None}, sort=[("started_at", -1)])
+            if not last:
+                print("\n❌ No unfinished run to resume")
+                return
+            run_id = last["_id"]
+        run_id = run_id or datetime.utcnow().strftime("%Y%m%d%H%M%S-") + uuid.uuid4().hex[:6]
 
-        success_count = 0
-        error_count = 0
+        done = {
+            c["business_id"]
+            for c in checkpoints.find({"run_id": run_id, "status": {"$in": list(DONE_STATUSES)}},
+                                      {"business_id": 1})
+        }
+        runs.update_one(
+            {"_id": run_id},
+            {"$setOnInsert": {"started_at": datetime.utcnow(), "finished_at": None}},
+            upsert=True,
+        )
 
-        for schema in schemas:
-            business_id = schema.get("business_id")
-            if not business_id:
-                continue
+        total = mongo.db.website_schemas.count_documents({"is_active": True})
+        print(f"\n📊 Run {run_id}: {total} active schemas, {len(done)} already done")
 
+        netlify = NetlifyService()
+        limiter = HostLimiter(host_limit)
+        counts = {status: 0 for status in DONE_STATUSES + ("failed", "resumed")}
+        counts["resumed"] = len(done)
+        counts_lock = threading.Lock()
+        started = time.monotonic()
+
+        def checkpoint(business_id, status, **fields):
+            checkpoints.update_one(
+                {"_id": f"{run_id}:{business_id}"},
+                {"$set": dict(fields, run_id=run_id, business_id=business_id,
+                              status=status, updated_at=datetime.utcnow())},
+                upsert=True,
+            )
+            with counts_lock:
+                counts[status] += 1
+                finished = sum(counts[s] for s in DONE_STATUSES + ("failed",))
+            if finished % 50 == 0:
+                rate = finished / max(time.monotonic() - started, 1e-6)
+                remaining = total - finished - counts["resumed"]
+                print(f"  … {finished + counts['resumed']}/{total} "
+                      f"({rate:.1f} sites/s, ~{remaining / max(rate, 1e-6):.0f}s left)")
+
+        def upload(business_id, site, html):
+            """Upload thread: disk write, digest skip, Netlify deploy with retries."""
             try:
-                print(f"🔄 Redeploying website for business {business_id}...")
-                rendered_html = SchemaRenderer.render(schema)
-
-                # Write to disk
-                PatchEngine.write_website_to_disk(business_id, rendered_html)
-
-                # Deploy to Netlify
-                deploy_ref = PatchEngine._deploy_to_netlify(business_id, rendered_html)
-                if deploy_ref:
-                    print(f"  ✅ Netlify deploy successful for business {business_id} (ref={deploy_ref})")
-                    success_count += 1
-                else:
-                    print(f"  ⚠️  Netlify deploy skipped/failed for business {business_id}")
-                    success_count += 1
+                PatchEngine.write_website_to_disk(business_id, html)
+                site_id = site.get("netlify_site_id") if site else None
+                if not site_id:
+                    checkpoint(business_id, "no_site")
+                    return
+
+                files = PatchEngine.netlify_files(html)
+                last = NetlifyService.last_deploy(site_id)
+                if not force and last and last.get("files") == NetlifyService.file_digests(files):
+                    checkpoint(business_id, "unchanged", deploy_ref=last.get("deploy_id"))
+                    return
+
+                error = None
+                for attempt in range(retries + 1):
+                    with limiter.slot(netlify.base_url):
+                        result = netlify.deploy_site(site_id, files, force=force)
+                    if result.get("success"):
+                        deploy_ref = result["deploy"]["id"]
+                        checkpoint(business_id, "deployed", deploy_ref=deploy_ref, attempts=attempt + 1)
+                        return
+                    error = result.get("error")
+                    if attempt < retries:
+                        time.sleep(min(2 ** attempt, 30) + random.uniform(0, 1))
+                print(f"  ❌ Netlify deploy failed for business {business_id}: {error}")
+                checkpoint(business_id, "failed", error=error)
             except Exception as e:
                 print(f"  ❌ Error redeploying business {business_id}: {e}")
-                error_count += 1
+                checkpoint(business_id, "failed", error=str(e))
+
+        def chunks():
+            """Streams remaining active schemas with their products and site records."""
+            chunk = []
+            cursor = mongo.db.website_schemas.find({"is_active": True}).batch_size(chunk_size)
+            for schema in cursor:
+                business_id = schema.get("business_id")
+                if not business_id or str(business_id) in done:
+                    continue
+                chunk.append(schema)
+                if len(chunk) >= chunk_size:
+                    yield _with_context(mongo, chunk)
+                    chunk = []
+            if chunk:
+                yield _with_context(mongo, chunk)
+
+        mp_context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=render_workers, mp_context=mp_context) as renderers, \
+                ThreadPoolExecutor(max_workers=upload_workers, thread_name_prefix="redeploy") as uploaders:
+            max_in_flight = (render_workers or os.cpu_count() or 1) * 4
+            rendering = {}
+            uploads = deque()
+
+            def collect(finished):
+                for future in finished:
+                    business_id, site = rendering.pop(future)
+                    try:
+                        html = future.result()
+                    except Exception as e:
+                        print(f"  ❌ Render failed for business {business_id}: {e}")
+                        checkpoint(business_id, "failed", error=f"render: {e}")
+                        continue
+                    uploads.append(uploaders.submit(upload, business_id, site, html))
+                # Drop finished uploads so memory stays bounded
+                while uploads and uploads[0].done():
+                    uploads.popleft()
+
+            for chunk in chunks():
+                for schema, products, site in chunk:
+                    if len(rendering) >= max_in_flight:
+                        finished, _ = wait(list(rendering), return_when=FIRST_COMPLETED)
+                        collect(finished)
+                    while len(uploads) >= upload_workers * 4:
+                        uploads.popleft().result()
+                    website_id = str(site["_id"]) if site else None
+                    future = renderers.submit(render_site, schema, products, website_id)
+                    rendering[future] = (str(schema["business_id"]), site)
+
+            while rendering:
+                finished, _ = wait(list(rendering), return_when=FIRST_COMPLETED)
+                collect(finished)
+            for future in uploads:
+                future.result()
+
+        elapsed = time.monotonic() - started
+        if not counts["failed"]:
+            runs.update_one({"_id": run_id}, {"$set": {"finished_at": datetime.utcnow(), "counts": counts}})
+
+        print(f"\n{'='*50}")
+        print(f"Redeploy complete! (run {run_id}, {elapsed:.0f}s)")
+        print(f"  ✅ Deployed:   {counts['deployed']}")
+        print(f"  ⏭️  Unchanged:  {counts['unchanged']}")
+        print(f"  📄 Disk only:  {counts['no_site']}")
+        print(f"  ↩️  Resumed:    {counts['resumed']}")
+        print(f"  ❌ Failed:     {counts['failed']}")
+        if counts["failed"]:
+            print(f"  Re-run with --run-id {run_id} to retry the failed sites")
+        print(f"{'='*50}\n")
+
+
+def _with_context(mongo, schemas):
+    """(schema, products, child_websites record) per schema — two $in queries per chunk."""
+    from bson import ObjectId
+
+    owner_ids = [str(s["business_id"]) for s in schemas]
+    object_ids = [ObjectId(b) for b in owner_ids if ObjectId.is_valid(b)]
+
+    products = {}
+    for product in mongo.db.products.find({"user_id": {"$in": object_ids}, "is_active": True}):
+        products.setdefault(str(product["user_id"]), []).append(product)
+
+    # Same precedence as TrackingSnippet.inject's lookup: a string owner_id
+    # match wins over an ObjectId one
+    sites = {}
+    for site in mongo.db.child_websites.find({"owner_id": {"$in": owner_ids + object_ids}},
+                                             {"owner_id": 1, "netlify_site_id": 1}):
+        key = str(site["owner_id"])
+        if key not in sites or (isinstance(site["owner_id"], str) and not isinstance(sites[key]["owner_id"], str)):
+            sites[key] = site
 
-        print(f"\nRedeploy complete: {success_count} succeeded, {error_count} failed.\n")
+    return [(s, products.get(str(s["business_id"]), []), sites.get(str(s["business_id"])))
+            for s in schemas]
 
 
 if __name__ == "__main__":
-    redeploy_sites()
+    parser = argparse.ArgumentParser(description="Re-render and redeploy every active site")
+    parser.add_argument("--run-id", help="Continue (or name) a specific run")
+    parser.add_argument("--resume", action="store_true", help="Continue the latest unfinished run")
+    parser.add_argument("--force", action="store_true", help="Deploy even if the files are unchanged")
+    parser.add_argument("--render-workers", type=int, default=None, help="Render processes (default: CPUs)")
+    parser.add_argument("--upload-workers", type=int, default=8)
+    parser.add_argument("--host-limit", type=int, default=8, help="Concurrent requests per API host")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    args = parser.parse_args()
+    redeploy_sites(
+        run_id=args.run_id,
+        resume=args.resume,
+        force=args.force,
+        render_workers=args.render_workers,
+        upload_workers=args.upload_workers,
+        host_limit=args.host_limit,
+        retries=args.retries,
+        chunk_size=args.chunk_size,
+    )
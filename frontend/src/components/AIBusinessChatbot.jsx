@@ -3,6 +3,10 @@ import { useEffect, useRef, useState } from 'react';
 import { useAuth } from '../context/AuthContext';
 import { useTranslation } from '../context/TranslationContext';
 import { api } from '../services/api';
+import webSocketService from '../services/websocket';
+
+// Give up on a socket stream that stops sending and use the HTTP endpoint
+const STREAM_IDLE_TIMEOUT_MS = 20000;
 
 const AIBusinessChatbot = ({ isOpen, onClose }) => {
   const { t: translate, currentLanguage } = useTranslation();
@@ -48,22 +52,35 @@ const AIBusinessChatbot = ({ isOpen, onClose }) => {
     setInputMessage('');
     setLoading(true);
 
+    const payload = {
+      message: inputMessage,
+      language: currentLanguage,
+      user_context: {
+        name: user?.name,
+        business_type: user?.business_category,
+        business_name: user?.business_name || user?.name
+      },
+      conversation_history: messages.slice(-5) // Last 5 messages for context
+    };
+    const botMessageId = Date.now() + 1;
+
     try {
+      if (webSocketService.isConnected) {
+        try {
+          await streamResponse(payload, botMessageId);
+          return;
+        } catch (streamError) {
+          console.warn('Chat stream failed, falling back to HTTP:', streamError);
+          setMessages(prev => prev.filter(msg => msg.id !== botMessageId));
+        }
+      }
+
       // Call Gemini API for business co-partner response via Axios
-      const response = await api.post('/ai/business-chat', {
-        message: inputMessage,
-        language: currentLanguage,
-        user_context: {
-          name: user?.name,
-          business_type: user?.business_category,
-          business_name: user?.business_name || user?.name
-        },
-        conversation_history: messages.slice(-5) // Last 5 messages for context
-      });
+      const response = await api.post('/ai/business-chat', payload);
 
       const data = response.data;
       const botMessage = {
-        id: Date.now() + 1,
+        id: botMessageId,
         type: 'bot',
         content: data.response,
         timestamp: new Date()
@@ -72,7 +89,7 @@ const AIBusinessChatbot = ({ isOpen, onClose }) => {
     } catch (error) {
       console.error('Chat error:', error);
       const errorMessage = {
-        id: Date.now() + 1,
+        id: botMessageId,
         type: 'bot',
         content: translate('Sorry, I encountered an error. Please try again.'),
         timestamp: new Date()
@@ -83,6 +100,67 @@ const AIBusinessChatbot = ({ isOpen, onClose }) => {
     }
   };
 
+  // Streams the answer over Socket.IO into one bot message, chunk by chunk.
+  // Rejects before the first chunk so the caller can fall back to HTTP.
+  const streamResponse = (payload, botMessageId) => new Promise((resolve, reject) => {
+    const streamId = `${botMessageId}-${Math.random().toString(36).slice(2, 8)}`;
+    let received = false;
+    let idleTimer = null;
+
+    const setContent = (update) => setMessages(prev => prev.map(msg =>
+      msg.id === botMessageId ? { ...msg, content: update(msg.content) } : msg
+    ));
+    const cleanup = () => {
+      clearTimeout(idleTimer);
+      webSocketService.off('chat_stream_chunk', onChunk);
+      webSocketService.off('chat_stream_end', onEnd);
+      webSocketService.off('chat_stream_error', onError);
+    };
+    const armIdleTimer = () => {
+      clearTimeout(idleTimer);
+      idleTimer = setTimeout(() => {
+        cleanup();
+        if (received) resolve();
+        else reject(new Error('stream timed out'));
+      }, STREAM_IDLE_TIMEOUT_MS);
+    };
+    const onChunk = (data) => {
+      if (data.stream_id !== streamId) return;
+      if (!received) {
+        received = true;
+        setLoading(false);
+        setMessages(prev => [...prev, { id: botMessageId, type: 'bot', content: '', timestamp: new Date() }]);
+      }
+      setContent(content => content + data.delta);
+      armIdleTimer();
+    };
+    const onEnd = (data) => {
+      if (data.stream_id !== streamId) return;
+      cleanup();
+      if (!received) {
+        setMessages(prev => [...prev, { id: botMessageId, type: 'bot', content: data.response, timestamp: new Date() }]);
+      } else {
+        setContent(() => data.response);
+      }
+      resolve();
+    };
+    const onError = (data) => {
+      if (data.stream_id !== streamId) return;
+      cleanup();
+      reject(new Error(data.error));
+    };
+
+    webSocketService.on('chat_stream_chunk', onChunk);
+    webSocketService.on('chat_stream_end', onEnd);
+    webSocketService.on('chat_stream_error', onError);
+    armIdleTimer();
+
+    api.post('/ai/business-chat/stream', { ...payload, stream_id: streamId }).catch((error) => {
+      cleanup();
+      reject(error);
+    });
+  });
+
   const handleKeyPress = (e) => {
     if (e.key === 'Enter' && !e.shiftKey) {
       e.preventDefault();